@@ -114,6 +114,7 @@ class LobbyUI:
         # UI State
         self.state = "main_menu"  # main_menu, room_list, create_room, in_room, playing
         self.rooms: List[Dict] = []
+        self.room_list_version: Optional[int] = None
         self.current_room: Optional[Dict] = None
         
         # UI Components
@@ -170,6 +171,17 @@ class LobbyUI:
         
         if msg_type == "room_list":
             self.rooms = data["rooms"]
+            self.room_list_version = data.get("version")
+
+        elif msg_type == "room_list_diff":
+            if data["base_version"] != self.room_list_version:
+                await self.request_room_list()  # 중간 diff 를 놓침 - 전체 목록 다시 요청
+            else:
+                self.room_list_version = data["version"]
+                removed = set(data["remove"])
+                upserts = {room["room_id"]: room for room in data["upsert"]}
+                rooms = [upserts.pop(room["room_id"], room) for room in self.rooms if room["room_id"] not in removed]
+                self.rooms = rooms + list(upserts.values())
             
         elif msg_type == "room_joined":
             self.current_room = data["room"]
@@ -192,7 +204,7 @@ class LobbyUI:
             print(f"Error: {data['message']}")
 
     async def request_room_list(self):
-        await self.send_message({"type": "list_rooms"})
+        await self.send_message({"type": "list_rooms", "subscribe": True})
 
     async def create_room(self, room_name: str):
         await self.send_message({
@@ -0,0 +1,374 @@
+"""NumPy 배치 엔진 - 보드 N개를 배열 하나에 두고 충돌/드롭/merge/줄 제거를 보드 축으로 한꺼번에 계산
+
+봇 학습과 공격/콤보 규칙 밸런스 실험처럼 블록 수백만 개를 돌릴 때 쓴다.
+
+    batch = BatchTetris(4096, seeds=range(4096))
+    batch.step(actions)          # 보드마다 ACTIONS 인덱스 하나 (-1 = 입력 없음), 게임 오버 보드는 건너뜀
+    batch.game(0).hard_drop()    # 보드 하나를 TetrisGame 과 같은 API 로 (검증용)
+
+- 같은 seed 의 TetrisGame 과 블록 순서, 그리드, 점수, 줄 수가 입력마다 같다 (bench.py batch 가 확인).
+- 공격/콤보/B2B 는 client/tetris.py clear_lines 의 표를 따른다 (쓰레기 줄 상쇄는 없음).
+- numpy 는 선택 의존성: 설치되어 있지 않으면 BatchTetris 를 만들 때 RuntimeError.
+"""
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from game import LINE_SCORES, BagRandom
+from garbage import ATTACK_LINES, MAX_B2B_BONUS, MAX_COMBO_BONUS
+from pieces import KICKS, NO_KICKS, PIECES, SPAWN_SHAPES, Piece
+
+ACTIONS = ("left", "right", "soft_drop", "hard_drop", "rotate_cw", "rotate_ccw", "hold")
+NO_ACTION = -1
+
+BAG_SIZE = len(SPAWN_SHAPES)
+QUEUE_SIZE = 2 * BAG_SIZE  # 보드마다 다음 블록 링 버퍼 (가방 두 개)
+
+
+def _tables(cols: int):
+    """블록 테이블을 배열로: 줄 마스크 [s, r, 4], 칸 [s, r, 4, 2], 크기 [s, r], 킥 [s, r, 방향, 5, 2]"""
+    shapes = len(PIECES)
+    row_masks = np.zeros((shapes, 4, 4), dtype=np.int32)
+    cells = np.zeros((shapes, 4, 4, 2), dtype=np.int64)
+    width = np.zeros((shapes, 4), dtype=np.int64)
+    height = np.zeros((shapes, 4), dtype=np.int64)
+    kicks = np.zeros((shapes, 4, 2, 5, 2), dtype=np.int64)
+    for s, rotations in enumerate(PIECES):
+        for r, rotation in enumerate(rotations):
+            row_masks[s, r, :rotation.height] = rotation.row_masks
+            cells[s, r] = rotation.cells
+            width[s, r] = rotation.width
+            height[s, r] = rotation.height
+            for d, to_rot in enumerate(((r + 1) % 4, (r - 1) % 4)):
+                offsets = KICKS[s].get((r, to_rot), NO_KICKS)
+                # 킥이 5개보다 적으면 마지막 킥을 반복 (같은 위치는 다시 시도해도 결과가 같음)
+                kicks[s, r, d] = [offsets[min(k, len(offsets) - 1)] for k in range(5)]
+    spawn_x = np.array([cols // 2 - len(shape[0]) // 2 for shape in SPAWN_SHAPES], dtype=np.int64)
+    return row_masks, cells, width, height, kicks, spawn_x
+
+
+class BatchTetris:
+    """보드 N개 - masks[b, y] 는 줄 점유 비트마스크, cells[b, y, x] 는 색 인덱스 (TetrisGame.grid 와 같은 값)"""
+
+    def __init__(self, n: int, rows: int = 20, cols: int = 10, seeds: Optional[Iterable] = None):
+        if np is None:
+            raise RuntimeError("BatchTetris requires numpy (pip install numpy)")
+        if cols > 30:
+            raise ValueError("BatchTetris supports at most 30 columns")
+        self.n = n
+        self.rows = rows
+        self.cols = cols
+        self.full_row = (1 << cols) - 1
+        (self.row_masks, self.piece_cells, self.width, self.height,
+         self.kicks, self.spawn_x) = _tables(cols)
+
+        seeds = list(seeds) if seeds is not None else [None] * n
+        if len(seeds) != n:
+            raise ValueError(f"expected {n} seeds, got {len(seeds)}")
+        self.rngs = [BagRandom(seed) for seed in seeds]
+
+        self.masks = np.zeros((n, rows), dtype=np.int32)
+        self.cells = np.zeros((n, rows, cols), dtype=np.int8)
+        self.shape = np.zeros(n, dtype=np.int64)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.next_shape = np.zeros(n, dtype=np.int64)
+        self.held = np.full(n, -1, dtype=np.int64)  # -1 = 보관 블록 없음
+        self.can_hold = np.ones(n, dtype=bool)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lines_cleared = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.last_lines_cleared = np.zeros(n, dtype=np.int64)
+        self.pieces_placed = np.zeros(n, dtype=np.int64)
+
+        # 공격 규칙 (client/tetris.py clear_lines)
+        self.combo = np.zeros(n, dtype=np.int64)
+        self.back_to_back = np.zeros(n, dtype=np.int64)
+        self.last_clear_was_difficult = np.zeros(n, dtype=bool)
+        self.last_attack = np.zeros(n, dtype=np.int64)
+        self.attack_sent = np.zeros(n, dtype=np.int64)
+
+        # 7-bag: 보드마다 자기 rng 로 섞은 가방을 링 버퍼에 이어 붙임 (TetrisGame.bag 과 같은 순서)
+        self.queue = np.zeros((n, QUEUE_SIZE), dtype=np.int64)
+        self.queue_head = np.zeros(n, dtype=np.int64)
+        self.queue_count = np.zeros(n, dtype=np.int64)
+
+        self.attack_table = np.array(ATTACK_LINES, dtype=np.int64)
+        self.line_scores = np.array([LINE_SCORES.get(lines, 0) for lines in range(len(ATTACK_LINES))],
+                                    dtype=np.int64)
+        self._spawn(np.arange(n))
+
+    # --- 블록 공급 ---
+
+    def _refill(self, boards):
+        """다음 블록이 두 개보다 적은 보드에 가방 하나씩 추가 (가방을 섞는 것만 보드별 파이썬 루프)"""
+        for b in boards[self.queue_count[boards] < 2].tolist():
+            pieces = list(range(BAG_SIZE))
+            self.rngs[b].shuffle(pieces)
+            start = self.queue_head[b] + self.queue_count[b]
+            self.queue[b, (start + np.arange(BAG_SIZE)) % QUEUE_SIZE] = pieces
+            self.queue_count[b] += BAG_SIZE
+
+    def _spawn(self, boards):
+        if not len(boards):
+            return
+        self._refill(boards)
+        head = self.queue_head[boards]
+        shape = self.queue[boards, head]
+        head = (head + 1) % QUEUE_SIZE
+        self.queue_head[boards] = head
+        self.queue_count[boards] -= 1
+        self.next_shape[boards] = self.queue[boards, head]
+        self._reset_piece(boards, shape)
+        fits = self._fits(boards, shape, self.rotation[boards], self.x[boards], self.y[boards])
+        self.game_over[boards[~fits]] = True
+
+    def _reset_piece(self, boards, shape):
+        self.shape[boards] = shape
+        self.rotation[boards] = 0
+        self.x[boards] = self.spawn_x[shape]
+        self.y[boards] = 0
+
+    # --- 충돌 ---
+
+    def _fits(self, boards, shape, rotation, x, y):
+        """보드마다 (shape, rotation) 블록을 (x, y) 에 놓을 수 있는지 - 블록 줄 4개를 비트 AND"""
+        fits = ((x >= 0) & (y >= 0) & (x + self.width[shape, rotation] <= self.cols)
+                & (y + self.height[shape, rotation] <= self.rows))
+        shift = np.maximum(x, 0)  # 범위를 벗어난 보드는 이미 False, 음수 시프트만 피함
+        for dy in range(4):
+            piece_row = self.row_masks[shape, rotation, dy] << shift
+            row = self.masks[boards, np.clip(y + dy, 0, self.rows - 1)]
+            fits &= (row & piece_row) == 0
+        return fits
+
+    # --- 입력 (boards: 보드 인덱스 배열) ---
+
+    def move(self, boards, dx: int):
+        shape, rotation = self.shape[boards], self.rotation[boards]
+        moved = self._fits(boards, shape, rotation, self.x[boards] + dx, self.y[boards])
+        self.x[boards[moved]] += dx
+
+    def move_left(self, boards):
+        self.move(boards, -1)
+
+    def move_right(self, boards):
+        self.move(boards, 1)
+
+    def move_down(self, boards):
+        """한 칸 내림 - 못 내려가는 보드는 merge. 보드마다 내려갔는지 반환"""
+        moved = self._fits(boards, self.shape[boards], self.rotation[boards], self.x[boards], self.y[boards] + 1)
+        self.y[boards[moved]] += 1
+        self.merge(boards[~moved])
+        return moved
+
+    def hard_drop(self, boards):
+        shape, rotation, x = self.shape[boards], self.rotation[boards], self.x[boards]
+        y = self.y[boards].copy()
+        falling = np.ones(len(boards), dtype=bool)
+        while True:
+            falling &= self._fits(boards, shape, rotation, x, y + 1)
+            if not falling.any():
+                break
+            y += falling
+        self.y[boards] = y
+        self.merge(boards)
+
+    def rotate(self, boards, clockwise: bool = True):
+        """SRS 킥을 순서대로 시도 - 보드마다 처음 들어맞는 킥 적용"""
+        shape, from_rot = self.shape[boards], self.rotation[boards]
+        to_rot = (from_rot + (1 if clockwise else -1)) % 4
+        kicks = self.kicks[shape, from_rot, 0 if clockwise else 1]
+        x, y = self.x[boards], self.y[boards]
+        pending = np.ones(len(boards), dtype=bool)
+        for k in range(kicks.shape[1]):
+            dx, dy = kicks[:, k, 0], kicks[:, k, 1]
+            ok = pending & self._fits(boards, shape, to_rot, x + dx, y + dy)
+            if ok.any():
+                rotated = boards[ok]
+                self.x[rotated] = x[ok] + dx[ok]
+                self.y[rotated] = y[ok] + dy[ok]
+                self.rotation[rotated] = to_rot[ok]
+                pending &= ~ok
+            if not pending.any():
+                break
+
+    def hold_piece(self, boards):
+        boards = boards[self.can_hold[boards]]
+        current = self.shape[boards]
+        first = self.held[boards] < 0
+        swap = boards[~first]
+        held = self.held[swap]
+        self.held[boards] = current
+        self._reset_piece(swap, held)
+        self._spawn(boards[first])
+        self.can_hold[boards] = False
+
+    # --- merge / 줄 제거 ---
+
+    def merge(self, boards):
+        if not len(boards):
+            return
+        shape, rotation, x, y = self.shape[boards], self.rotation[boards], self.x[boards], self.y[boards]
+        for dy in range(4):
+            self.masks[boards, np.clip(y + dy, 0, self.rows - 1)] |= self.row_masks[shape, rotation, dy] << x
+        cells = self.piece_cells[shape, rotation]  # [보드, 칸, (dx, dy)]
+        color = (shape + 1).astype(self.cells.dtype)
+        for cell in range(cells.shape[1]):
+            self.cells[boards, y + cells[:, cell, 1], x + cells[:, cell, 0]] = color
+        self.clear_lines(boards)
+        self.pieces_placed[boards] += 1
+        self.can_hold[boards] = True
+        self._spawn(boards)
+
+    def clear_lines(self, boards):
+        full = self.masks[boards] == self.full_row
+        lines = full.sum(axis=1)
+        cleared = lines > 0
+        if cleared.any():
+            # 꽉 찬 줄을 위로 모으는 안정 정렬 후 그 줄들을 비움 = 남은 줄이 순서대로 아래로 내려옴
+            target = boards[cleared]
+            order = np.argsort(~full[cleared], axis=1, kind="stable")
+            masks = np.take_along_axis(self.masks[target], order, axis=1)
+            cells = np.take_along_axis(self.cells[target], order[:, :, None], axis=1)
+            empty = np.arange(self.rows) < lines[cleared][:, None]
+            masks[empty] = 0
+            cells[empty] = 0
+            self.masks[target] = masks
+            self.cells[target] = cells
+        self.add_cleared_lines(boards, lines)
+        return lines
+
+    def add_cleared_lines(self, boards, lines):
+        self.last_lines_cleared[boards] = lines
+        self.lines_cleared[boards] += lines
+        self.score[boards] += self.line_scores[np.minimum(lines, len(self.line_scores) - 1)] * self.level[boards]
+        self.level[boards] = self.lines_cleared[boards] // 10 + 1
+        self._attack(boards, lines)
+
+    def _attack(self, boards, lines):
+        """client/tetris.py 공격 표: 1/2/3/4줄 = 0/1/2/4, 콤보 보너스 min(combo - 1, 10), 테트리스 연속 B2B"""
+        cleared = lines > 0
+        tetris = lines >= 4
+        combo = np.where(cleared, self.combo[boards] + 1, 0)
+        difficult = self.last_clear_was_difficult[boards]
+        b2b_hit = tetris & difficult
+        back_to_back = self.back_to_back[boards] + b2b_hit
+        attack = self.attack_table[np.minimum(lines, len(self.attack_table) - 1)] + b2b_hit
+        attack += np.where(cleared, np.minimum(np.maximum(combo - 1, 0), MAX_COMBO_BONUS), 0)
+        attack += np.where(cleared & (back_to_back > 1), np.minimum(back_to_back // 2, MAX_B2B_BONUS), 0)
+        self.combo[boards] = combo
+        self.back_to_back[boards] = back_to_back
+        self.last_clear_was_difficult[boards] = np.where(cleared, tetris, difficult)
+        self.last_attack[boards] = attack
+        self.attack_sent[boards] += attack
+
+    # --- 배치 진행 ---
+
+    def step(self, actions):
+        """보드마다 ACTIONS 인덱스 하나씩 적용 (NO_ACTION 과 게임 오버 보드는 그대로)"""
+        actions = np.asarray(actions)
+        alive = ~self.game_over
+        for code, name in enumerate(ACTIONS):
+            boards = np.flatnonzero(alive & (actions == code))
+            if len(boards):
+                self._apply(name, boards)
+
+    def _apply(self, name: str, boards):
+        if name == "left":
+            self.move(boards, -1)
+        elif name == "right":
+            self.move(boards, 1)
+        elif name == "soft_drop":
+            self.move_down(boards)
+        elif name == "hard_drop":
+            self.hard_drop(boards)
+        elif name == "rotate_cw":
+            self.rotate(boards, True)
+        elif name == "rotate_ccw":
+            self.rotate(boards, False)
+        elif name == "hold":
+            self.hold_piece(boards)
+
+    def reset_boards(self, boards, seeds):
+        """끝난 보드를 새 게임으로 (seed 는 보드마다 하나)"""
+        boards = np.asarray(boards, dtype=np.int64)
+        for b, seed in zip(boards.tolist(), seeds):
+            self.rngs[b] = BagRandom(seed)
+        for array in (self.masks, self.cells, self.score, self.lines_cleared, self.last_lines_cleared,
+                      self.pieces_placed, self.combo, self.back_to_back, self.last_attack, self.attack_sent,
+                      self.queue_head, self.queue_count):
+            array[boards] = 0
+        self.level[boards] = 1
+        self.held[boards] = -1
+        self.can_hold[boards] = True
+        self.game_over[boards] = False
+        self.last_clear_was_difficult[boards] = False
+        self._spawn(boards)
+
+    def game(self, index: int) -> "BatchGameView":
+        return BatchGameView(self, index)
+
+
+class BatchGameView:
+    """배치 안의 보드 하나를 TetrisGame 과 같은 API 로 - 입력은 보드 하나짜리 배치 연산 (검증/디버그용)"""
+
+    __slots__ = ("batch", "index", "_boards")
+
+    def __init__(self, batch: BatchTetris, index: int):
+        self.batch = batch
+        self.index = index
+        self._boards = np.array([index], dtype=np.int64)
+
+    rows = property(lambda self: self.batch.rows)
+    cols = property(lambda self: self.batch.cols)
+    game_over = property(lambda self: bool(self.batch.game_over[self.index]))
+    score = property(lambda self: int(self.batch.score[self.index]))
+    lines_cleared = property(lambda self: int(self.batch.lines_cleared[self.index]))
+    level = property(lambda self: int(self.batch.level[self.index]))
+    can_hold = property(lambda self: bool(self.batch.can_hold[self.index]))
+    last_lines_cleared = property(lambda self: int(self.batch.last_lines_cleared[self.index]))
+
+    @property
+    def grid(self):
+        return self.batch.cells[self.index].tolist()
+
+    @property
+    def current_piece(self) -> Piece:
+        batch, i = self.batch, self.index
+        piece = Piece(int(batch.shape[i]), int(batch.x[i]), int(batch.y[i]))
+        piece.rotation = int(batch.rotation[i])
+        piece.shape = PIECES[piece.shape_index][piece.rotation].shape
+        return piece
+
+    @property
+    def next_piece(self) -> Piece:
+        return Piece(int(self.batch.next_shape[self.index]))
+
+    @property
+    def held_piece(self) -> Optional[Piece]:
+        held = int(self.batch.held[self.index])
+        return Piece(held) if held >= 0 else None
+
+    def move_left(self):
+        self.batch.move(self._boards, -1)
+
+    def move_right(self):
+        self.batch.move(self._boards, 1)
+
+    def move_down(self):
+        return bool(self.batch.move_down(self._boards)[0])
+
+    def hard_drop(self):
+        self.batch.hard_drop(self._boards)
+
+    def rotate(self, clockwise=True):
+        self.batch.rotate(self._boards, clockwise)
+
+    def hold_piece(self):
+        self.batch.hold_piece(self._boards)
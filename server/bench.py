@@ -0,0 +1,385 @@
+"""서버 성능 벤치마크
+
+    cd server
+    python bench.py sim --rooms 200 --players 16 --seconds 10
+    python bench.py engine --pieces 20000
+    python bench.py memory --games 2000
+    python bench.py bot --pieces 2000 --pps 2
+    python bench.py batch --boards 4096 --steps 200
+    python bench.py features --boards 20000
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from bot import board_masks, plan
+from game import BagRandom, TetrisGame
+from legacy_game import LegacyTetrisGame
+from simulation import ENGINES, INPUT_ACTIONS, RoomSimulation
+
+try:
+    import numpy as np
+    from batch import ACTIONS as BATCH_ACTIONS, BatchTetris
+    from features import board_features, candidate_boards, features_reference
+except ImportError:
+    np = None
+
+
+def _random_actions(rng, count):
+    """블록 하나를 놓기까지의 무작위 입력 (이동/회전 후 하드 드롭)"""
+    moves = ["left", "right", "rotate_cw", "rotate_ccw", "soft_drop"]
+    return [rng.choice(moves) for _ in range(count)] + ["hard_drop"]
+
+
+def _play(game, rng, pieces):
+    """블록 pieces 개를 놓을 때까지 진행, 게임 오버면 새 게임으로 교체"""
+    placed = 0
+    while placed < pieces:
+        for action in _random_actions(rng, rng.randrange(8)):
+            INPUT_ACTIONS[action](game)
+        placed += 1
+        if game.game_over:
+            game = type(game)(seed=rng.randrange(1 << 30))
+    return game
+
+
+def verify_engines(seed, pieces):
+    """두 엔진에 같은 seed/입력을 주고 매 입력마다 상태가 같은지 확인"""
+    rng = random.Random(seed)
+    games = [engine(seed=seed) for engine in ENGINES.values()]
+    for _ in range(pieces):
+        for action in _random_actions(rng, rng.randrange(8)):
+            states = []
+            for game in games:
+                INPUT_ACTIONS[action](game)
+                piece = game.current_piece
+                states.append((game.grid, game.score, game.lines_cleared, game.game_over,
+                               piece.shape, piece.x, piece.y, piece.rotation,
+                               game.held_piece and game.held_piece.shape_index))
+            if states[0] != states[1]:
+                raise AssertionError(f"engines diverged after action {action!r}")
+        if games[0].game_over:
+            seed = rng.randrange(1 << 30)
+            games = [engine(seed=seed) for engine in ENGINES.values()]
+
+
+def bench_engine(args):
+    """TetrisGame(리스트) vs BitboardTetrisGame: 동작 일치 확인 후 블록/초, 충돌 검사/초 측정"""
+    verify_engines(args.seed, args.verify_pieces)
+    print(f"verified: engines identical over {args.verify_pieces} random placements")
+
+    for name, engine in ENGINES.items():
+        rng = random.Random(args.seed)
+        start = time.perf_counter()
+        _play(engine(seed=args.seed), rng, args.pieces)
+        placements = args.pieces / (time.perf_counter() - start)
+
+        game = engine(seed=args.seed)
+        piece = game.current_piece
+        start = time.perf_counter()
+        for _ in range(args.pieces):
+            game.is_valid_position(piece.shape, piece.x, piece.y + 5)
+            game.move_left()
+            game.move_right()
+        checks = args.pieces * 3 / (time.perf_counter() - start)
+
+        game = engine(seed=args.seed)
+        start = time.perf_counter()
+        for _ in range(args.pieces):
+            game.clear_lines()
+        clears = args.pieces / (time.perf_counter() - start)
+        print(f"{name:>8}: {placements:>10,.0f} placements/s  {checks:>12,.0f} collision checks/s"
+              f"  {clears:>12,.0f} clear_lines/s")
+
+
+def bench_memory(args):
+    """게임 N개를 만들고 몇 수 진행한 뒤 tracemalloc 으로 게임당 바이트 측정
+
+    legacy 는 슬롯/공유 테이블 도입 전 TetrisGame (legacy_game.py) 으로, 같은 입력에서 같은 보드가 되는지 먼저 확인한다
+    (legacy 는 random.Random 으로 가방을 섞으므로 확인할 때만 같은 BagRandom 으로 바꿔 끼움).
+    """
+    legacy, current = LegacyTetrisGame(seed=args.seed), TetrisGame(seed=args.seed)
+    legacy.rng, legacy.bag = BagRandom(args.seed), []
+    legacy.fill_bag()
+    legacy.spawn_piece()
+    _play(legacy, random.Random(args.seed), 50)
+    _play(current, random.Random(args.seed), 50)
+    if (legacy.grid, legacy.score, legacy.lines_cleared) != (current.grid, current.score, current.lines_cleared):
+        raise AssertionError("legacy TetrisGame diverged from TetrisGame")
+
+    for name, engine in {"legacy": LegacyTetrisGame, **ENGINES}.items():
+        rng = random.Random(args.seed)
+        gc.collect()
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        games = [engine(seed=rng.randrange(1 << 30)) for _ in range(args.games)]
+        for game in games:
+            _play(game, rng, args.pieces)
+        after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>8}: {(after - before) / args.games:>8,.0f} bytes/game"
+              f"  (peak {(peak - before) / args.games:,.0f})")
+        del games
+
+
+def bench_sim(args):
+    """서버 권한 시뮬레이션: 방 N개 x 플레이어 M명을 입력과 함께 진행, 코어당 틱/초 측정"""
+    rng = random.Random(args.seed)
+    actions = list(INPUT_ACTIONS)
+    rooms = [
+        RoomSimulation([f"p{i}" for i in range(args.players)], args.tick_rate, seed=rng.randrange(1 << 30),
+                       engine=args.engine)
+        for _ in range(args.rooms)
+    ]
+    total_ticks = int(args.seconds * args.tick_rate)
+    # 플레이어당 초당 입력 수 (사람 기준 약 3~5회)
+    input_chance = args.inputs_per_second / args.tick_rate
+
+    start = time.perf_counter()
+    for tick in range(1, total_ticks + 1):
+        for room in rooms:
+            for player_id in room.players:
+                if rng.random() < input_chance:
+                    room.queue_input(player_id, tick, rng.choice(actions))
+            room.step_to(tick)
+            room.collect_changes()
+    elapsed = time.perf_counter() - start
+
+    boards = args.rooms * args.players
+    alive = sum(1 for room in rooms for sim in room.players.values() if not sim.game.game_over)
+    events = sum(room.events_processed for room in rooms)
+    print(f"rooms={args.rooms} players/room={args.players} boards={boards} (alive at end {alive})")
+    print(f"simulated {total_ticks} ticks ({args.seconds}s of game time) in {elapsed:.2f}s")
+    print(f"room ticks/s:  {args.rooms * total_ticks / elapsed:,.0f}")
+    print(f"board ticks/s: {boards * total_ticks / elapsed:,.0f}")
+    print(f"events/s:      {events / elapsed:,.0f}")
+    print(f"real-time load: {elapsed / args.seconds * 100:.1f}% of one core")
+
+
+def bench_bot(args):
+    """봇 배치 탐색: 탐색 결과대로 입력하면 예측한 자리에 놓이는지 확인하고 배치 평가/초, 블록/초 측정"""
+    for name, engine in ENGINES.items():
+        game = engine(seed=args.seed)
+        games = 1
+        evaluated = lines = 0
+        start = time.perf_counter()
+        for placed in range(args.pieces):
+            placement, actions, count = plan(game)
+            evaluated += count
+            for action in actions[:-1]:
+                INPUT_ACTIONS[action](game)
+            piece = game.current_piece
+            if placement and (piece.rotation, piece.x) != (placement.rotation, placement.x):
+                raise AssertionError(f"{name}: inputs {actions} did not reach {placement}")
+            before = game.lines_cleared
+            INPUT_ACTIONS[actions[-1]](game)
+            lines += game.lines_cleared - before
+            if game.game_over:
+                game = engine(seed=args.seed + placed)
+                games += 1
+        elapsed = time.perf_counter() - start
+        pieces_per_second = args.pieces / elapsed
+        print(f"{name:>8}: {evaluated / elapsed:>10,.0f} placements evaluated/s  {pieces_per_second:>8,.0f} pieces/s"
+              f"  ({args.pieces / max(1, lines) * 10:.1f} pieces per 10 lines, {games} game(s))")
+        print(f"{'':>8}  one core keeps up with ~{pieces_per_second / args.pps:,.0f} bots at {args.pps:g} pps"
+              f" ({1000 / pieces_per_second:.2f} ms event loop time per piece)")
+
+
+def verify_batch(seed, boards, pieces):
+    """BatchTetris 보드마다 TetrisGame 과 같은 seed/입력을 주고 매 입력마다 상태가 같은지 확인"""
+    rng = random.Random(seed)
+    seeds = [rng.randrange(1 << 30) for _ in range(boards)]
+    batch = BatchTetris(boards, seeds=seeds)
+    for index, board_seed in enumerate(seeds):
+        view, game = batch.game(index), TetrisGame(seed=board_seed)
+        for _ in range(pieces):
+            for action in _random_actions(rng, rng.randrange(8)) + ["hold"] * (rng.random() < 0.2):
+                INPUT_ACTIONS[action](view)
+                INPUT_ACTIONS[action](game)
+                states = []
+                for board in (view, game):
+                    piece = board.current_piece
+                    states.append((board.grid, board.score, board.lines_cleared, board.level, board.game_over,
+                                   board.can_hold, piece.shape, piece.x, piece.y, piece.rotation,
+                                   board.next_piece.shape_index,
+                                   board.held_piece and board.held_piece.shape_index))
+                if states[0] != states[1]:
+                    raise AssertionError(f"batch board {index} diverged after action {action!r}")
+            if game.game_over:
+                break
+
+
+def bench_batch(args):
+    """NumPy 배치 엔진: TetrisGame 과 일치 확인 후 보드 N개를 한꺼번에 진행한 보드-스텝/초를 TetrisGame 루프와 비교"""
+    if np is None:
+        print("numpy is not installed - pip install numpy to run the batch engine")
+        return
+    verify_batch(args.seed, args.verify_boards, args.verify_pieces)
+    print(f"verified: batch identical to TetrisGame on {args.verify_boards} boards"
+          f" x {args.verify_pieces} random placements")
+
+    # 입력 분포: 하드 드롭 약 1/6, 나머지는 이동/회전/소프트 드롭/홀드
+    weights = np.array([4, 4, 2, 3, 2, 2, 1], dtype=float)
+    weights /= weights.sum()
+    rng = np.random.default_rng(args.seed)
+    actions = rng.choice(len(BATCH_ACTIONS), size=(args.steps, args.boards), p=weights)
+
+    # 같은 입력을 같은 보드 수로 두 엔진에 주고, 보드 수를 늘려 가며 배치가 앞서는 지점을 찾음
+    sizes = sorted({size for size in (16, 64, 256, 1024, 4096, 16384) if size < args.boards} | {args.boards})
+    print(f"{'boards':>8} {'batch':>14} {'loop':>14} {'speedup':>8}   (board-steps/s, {args.steps} steps)")
+    crossover = slower = None
+    for size in sizes:
+        batch_rate, batch = _run_batch(actions[:, :size])
+        loop_rate = _run_loop(actions[:, :size])
+        print(f"{size:>8} {batch_rate:>14,.0f} {loop_rate:>14,.0f} {batch_rate / loop_rate:>7.1f}x")
+        if crossover is None:
+            if batch_rate > loop_rate:
+                crossover = size
+            else:
+                slower = size
+    print(f"batch at {args.boards} boards: {int(batch.pieces_placed.sum()):,} pieces,"
+          f" {int(batch.attack_sent.sum()):,} attack lines in current games")
+    if crossover is None:
+        print("the batch engine did not beat the TetrisGame loop at any measured board count")
+    else:
+        below = f", slower at {slower}" if slower else ""
+        print(f"crossover: the batch engine is faster at {crossover} boards{below}"
+              f" (per-call NumPy overhead dominates small batches)")
+
+
+def _run_batch(actions):
+    """(board-steps/s, BatchTetris) - 끝난 보드는 새 seed 로 다시 시작"""
+    steps, boards = actions.shape
+    batch = BatchTetris(boards, seeds=range(boards))
+    next_seed = boards
+    start = time.perf_counter()
+    for step in actions:
+        batch.step(step)
+        over = np.flatnonzero(batch.game_over)
+        if len(over):
+            batch.reset_boards(over, range(next_seed, next_seed + len(over)))
+            next_seed += len(over)
+    return boards * steps / (time.perf_counter() - start), batch
+
+
+def _run_loop(actions):
+    """같은 입력으로 TetrisGame 객체 보드 수만큼을 파이썬 루프로 진행한 board-steps/s"""
+    steps, boards = actions.shape
+    games = [TetrisGame(seed=index) for index in range(boards)]
+    handlers = [INPUT_ACTIONS[name] for name in BATCH_ACTIONS]
+    next_seed = boards
+    start = time.perf_counter()
+    for step in actions.tolist():
+        for index, game in enumerate(games):
+            handlers[step[index]](game)
+            if game.game_over:
+                games[index] = TetrisGame(seed=next_seed)
+                next_seed += 1
+    return boards * steps / (time.perf_counter() - start)
+
+
+def _candidate_stack(seed, count):
+    """봇이 플레이하는 게임에서 블록마다 모든 배치 후보 보드를 모음 (줄 마스크 목록 count 개 이상)"""
+    game = TetrisGame(seed=seed)
+    boards = []
+    while len(boards) < count:
+        masks = board_masks(game)
+        candidates, _ = candidate_boards(masks, game.rows, game.cols, game.current_piece.shape_index)
+        boards.extend(candidates)
+        for action in plan(game)[1]:
+            INPUT_ACTIONS[action](game)
+        if game.game_over:
+            seed += 1
+            game = TetrisGame(seed=seed)
+    return boards[:count]
+
+
+def bench_features(args):
+    """배치 후보 보드 특징: 파이썬 기준 구현과 같은 값인지 확인하고 보드/초 비교"""
+    if np is None:
+        print("numpy is not installed - pip install numpy to run the feature extractor")
+        return
+    boards = _candidate_stack(args.seed, args.boards)
+    cols = TetrisGame().cols
+    grids = [[[(mask >> x) & 1 for x in range(cols)] for mask in board] for board in boards]
+    stack = np.array(boards, dtype=np.int64)
+
+    start = time.perf_counter()
+    reference = [features_reference(grid) for grid in grids]
+    reference_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        matrix = board_features(stack, cols)
+    vector_elapsed = (time.perf_counter() - start) / args.repeat
+
+    if matrix.tolist() != reference:
+        bad = next(i for i, row in enumerate(matrix.tolist()) if row != reference[i])
+        raise AssertionError(f"board {bad}: {matrix[bad].tolist()} != reference {reference[bad]}")
+    print(f"verified: {len(boards)} candidate boards identical to the pure-Python reference")
+    print(f"reference: {len(boards) / reference_elapsed:>12,.0f} boards/s")
+    print(f"    numpy: {len(boards) / vector_elapsed:>12,.0f} boards/s  ({reference_elapsed / vector_elapsed:.1f}x)")
+
+    # 블록 하나의 후보(약 10~34개)만 넘길 때 - 봇 한 수 기준
+    per_piece = [stack[i:i + args.batch] for i in range(0, len(stack), args.batch)]
+    start = time.perf_counter()
+    for chunk in per_piece:
+        board_features(chunk, cols)
+    print(f"  batches of {args.batch}: {len(boards) / (time.perf_counter() - start):>8,.0f} boards/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tetris server benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sim = subparsers.add_parser("sim", help="server-authoritative simulation ticks per second")
+    sim.add_argument("--rooms", type=int, default=100)
+    sim.add_argument("--players", type=int, default=16)
+    sim.add_argument("--seconds", type=float, default=10)
+    sim.add_argument("--tick-rate", type=int, default=60)
+    sim.add_argument("--inputs-per-second", type=float, default=4)
+    sim.add_argument("--seed", type=int, default=1)
+    sim.add_argument("--engine", choices=sorted(ENGINES), default="bitboard")
+    sim.set_defaults(func=bench_sim)
+
+    engine = subparsers.add_parser("engine", help="list vs bitboard TetrisGame engine")
+    engine.add_argument("--pieces", type=int, default=20000)
+    engine.add_argument("--verify-pieces", type=int, default=2000)
+    engine.add_argument("--seed", type=int, default=1)
+    engine.set_defaults(func=bench_engine)
+
+    memory = subparsers.add_parser("memory", help="tracemalloc bytes per game: legacy vs current engines")
+    memory.add_argument("--games", type=int, default=2000)
+    memory.add_argument("--pieces", type=int, default=5)
+    memory.add_argument("--seed", type=int, default=1)
+    memory.set_defaults(func=bench_memory)
+
+    bot = subparsers.add_parser("bot", help="bot placement search speed")
+    bot.add_argument("--pieces", type=int, default=2000)
+    bot.add_argument("--pps", type=float, default=2, help="bot speed for the capacity estimate")
+    bot.add_argument("--seed", type=int, default=1)
+    bot.set_defaults(func=bench_bot)
+
+    batch = subparsers.add_parser("batch", help="NumPy batch engine vs looping over TetrisGame")
+    batch.add_argument("--boards", type=int, default=4096)
+    batch.add_argument("--steps", type=int, default=200)
+    batch.add_argument("--verify-boards", type=int, default=50)
+    batch.add_argument("--verify-pieces", type=int, default=100)
+    batch.add_argument("--seed", type=int, default=1)
+    batch.set_defaults(func=bench_batch)
+
+    features = subparsers.add_parser("features", help="vectorized board features vs pure-Python reference")
+    features.add_argument("--boards", type=int, default=20000)
+    features.add_argument("--repeat", type=int, default=5)
+    features.add_argument("--batch", type=int, default=34, help="candidate boards per call in the small-batch run")
+    features.add_argument("--seed", type=int, default=1)
+    features.set_defaults(func=bench_features)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
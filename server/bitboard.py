@@ -0,0 +1,117 @@
+from game import TetrisGame
+from pieces import PIECES, shape_row_masks
+
+# 테이블 모양 객체 id -> Rotation (모듈이 살아 있는 동안 id 가 바뀌지 않음)
+_ROTATION_BY_SHAPE_ID = {id(rotation.shape): rotation for rotations in PIECES for rotation in rotations}
+
+
+class BitboardTetrisGame(TetrisGame):
+    """줄마다 정수 비트마스크를 쓰는 TetrisGame
+
+    충돌 검사는 블록 줄 마스크와 보드 줄 마스크의 AND, 꽉 찬 줄은 마스크 비교로 찾는다.
+    공개 API 는 TetrisGame 과 같고, grid 는 요청할 때 리스트로 만들어 주는 읽기용 사본이다
+    (grid 에 새 리스트를 대입하면 마스크를 다시 만든다). 칸 색은 보드 전체를 bytearray 하나에 줄 순서로 담는다.
+    """
+
+    __slots__ = ("full_row", "cells", "masks")
+
+    def __init__(self, rows=20, cols=10, seed=None):
+        self.full_row = (1 << cols) - 1
+        super().__init__(rows, cols, seed)
+
+    @property
+    def grid(self):
+        cells, cols = self.cells, self.cols
+        return [list(cells[start:start + cols]) for start in range(0, len(cells), cols)]
+
+    @grid.setter
+    def grid(self, grid):
+        self.cells = bytearray(cell for row in grid for cell in row)  # 칸 색 (shape_index + 1), [y * cols + x]
+        self.masks = [shape_row_masks([row])[0] for row in grid]  # 줄마다 점유 비트마스크
+
+    def _fits(self, row_masks, width, x, y) -> bool:
+        if x < 0 or y < 0 or x + width > self.cols or y + len(row_masks) > self.rows:
+            return False
+        board = self.masks
+        for i, mask in enumerate(row_masks):
+            if board[y + i] & (mask << x):
+                return False
+        return True
+
+    def _current_rotation(self):
+        piece = self.current_piece
+        return piece, PIECES[piece.shape_index][piece.rotation]
+
+    def is_valid_position(self, shape, x, y):
+        rotation = _ROTATION_BY_SHAPE_ID.get(id(shape))
+        if rotation is not None and rotation.shape is shape:
+            return self._fits(rotation.row_masks, rotation.width, x, y)
+        return self._fits(shape_row_masks(shape), len(shape[0]), x, y)
+
+    def move_left(self):
+        piece, rotation = self._current_rotation()
+        if self._fits(rotation.row_masks, rotation.width, piece.x - 1, piece.y):
+            piece.x -= 1
+
+    def move_right(self):
+        piece, rotation = self._current_rotation()
+        if self._fits(rotation.row_masks, rotation.width, piece.x + 1, piece.y):
+            piece.x += 1
+
+    def move_down(self):
+        piece, rotation = self._current_rotation()
+        if self._fits(rotation.row_masks, rotation.width, piece.x, piece.y + 1):
+            piece.y += 1
+            return True
+        else:
+            self.merge()
+            return False
+
+    def hard_drop(self):
+        piece, rotation = self._current_rotation()
+        row_masks, width = rotation.row_masks, rotation.width
+        x, y = piece.x, piece.y
+        while self._fits(row_masks, width, x, y + 1):
+            y += 1
+        piece.y = y
+        self.merge()
+
+    def merge(self):
+        piece, rotation = self._current_rotation()
+        x, y = piece.x, piece.y
+        color = piece.shape_index + 1
+        cells = self.cells
+        for i, mask in enumerate(rotation.row_masks):
+            self.masks[y + i] |= mask << x
+            base = (y + i) * self.cols + x
+            while mask:
+                low = mask & -mask
+                cells[base + low.bit_length() - 1] = color
+                mask ^= low
+        self.clear_lines()
+        self.can_hold = True
+        self.spawn_piece()
+
+    def clear_lines(self):
+        full_row = self.full_row
+        lines_cleared = 0
+        if full_row in self.masks:
+            keep = [i for i, mask in enumerate(self.masks) if mask != full_row]
+            lines_cleared = self.rows - len(keep)
+            self.masks = [0] * lines_cleared + [self.masks[i] for i in keep]
+            cells, cols = self.cells, self.cols
+            self.cells = bytearray(lines_cleared * cols) + b"".join(cells[i * cols:(i + 1) * cols] for i in keep)
+        self.add_cleared_lines(lines_cleared)
+
+    def rotate(self, clockwise=True):
+        piece = self.current_piece
+        from_rot = piece.rotation
+        to_rot = (from_rot + (1 if clockwise else -1)) % 4
+        rotation = PIECES[piece.shape_index][to_rot]
+        for dx, dy in self.get_wall_kick_offsets(from_rot, to_rot, piece.shape_index):
+            if self._fits(rotation.row_masks, rotation.width, piece.x + dx, piece.y + dy):
+                piece.x += dx
+                piece.y += dy
+                piece.shape = rotation.shape
+                piece.rotation = to_rot
+                return
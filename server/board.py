@@ -0,0 +1,253 @@
+import json
+import struct
+
+# 기본 팔레트: 0 = 빈 칸, 1~7 = 블록 색 (game.js 순서), 8 = 쓰레기 줄
+# 팔레트에 없는 값은 보드마다 추가 팔레트로 함께 인코딩한다.
+DEFAULT_PALETTE = [
+    0,
+    '#00ffff', '#ffff00', '#ff00ff', '#ffa500', '#0000ff', '#00ff00', '#ff0000',
+    '#808080',
+]
+MAX_PALETTE = 16  # 색 인덱스는 4비트
+
+# 바이너리 WebSocket 프레임 타입
+FRAME_UPDATE_GRID = 0x01
+FRAME_GAME_STATE = 0x02
+
+_UPDATE_HEADER = struct.Struct("<BIIHHH")  # type, seq, score, level, lines, combo
+_STATE_HEADER = struct.Struct("<BIB")  # type, snapshot seq, player count
+_PLAYER_STATS = struct.Struct("<IHHHB")  # score, level, lines, combo, game_over
+
+# 클라이언트 보드 크기 (game.js, client/tetris.py, TetrisGame 기본값)
+GRID_ROWS = 20
+GRID_COLS = 10
+
+# 헤더 필드 범위 (점수는 uint32, 레벨/줄/콤보는 uint16)
+MAX_SCORE = 0xFFFFFFFF
+MAX_STAT = 0xFFFF
+
+
+def _clamp(value, limit: int) -> int:
+    return min(max(int(value or 0), 0), limit)
+
+
+class PackedBoard:
+    """비트 패킹된 보드 - 줄마다 점유 비트마스크 + 점유된 칸만 담은 4비트 색 평면
+
+    비트 x 가 x 번째 열을 나타낸다 (cols <= 16).
+    """
+
+    __slots__ = ("rows", "cols", "masks", "colors", "palette")
+
+    def __init__(self, rows: int = 20, cols: int = 10):
+        if cols > 16:
+            raise ValueError("PackedBoard supports at most 16 columns")
+        self.rows = rows
+        self.cols = cols
+        self.masks = [0] * rows
+        self.colors = bytearray(rows * cols)  # 팔레트 인덱스 (빈 칸은 0)
+        self.palette = list(DEFAULT_PALETTE)
+
+    @classmethod
+    def from_grid(cls, grid: list) -> "PackedBoard":
+        rows = len(grid)
+        cols = len(grid[0]) if rows else 0
+        # 줄 길이가 다르면 encode 의 struct.pack 이 struct.error 로 실패하므로 여기서 ValueError
+        if any(len(row) != cols for row in grid):
+            raise ValueError("PackedBoard grid rows must all have the same length")
+        board = cls(rows, cols)
+        lookup = {value: i for i, value in enumerate(board.palette)}
+        colors = board.colors
+        for y, row in enumerate(grid):
+            mask = 0
+            base = y * cols
+            for x, cell in enumerate(row):
+                if cell:
+                    mask |= 1 << x
+                    index = lookup.get(cell)
+                    if index is None:
+                        index = board._add_color(cell)
+                        lookup[cell] = index
+                    colors[base + x] = index
+            board.masks[y] = mask
+        return board
+
+    def _add_color(self, value) -> int:
+        if len(self.palette) >= MAX_PALETTE:
+            raise ValueError("too many distinct cell values for PackedBoard")
+        self.palette.append(value)
+        return len(self.palette) - 1
+
+    def to_grid(self) -> list:
+        palette = self.palette
+        colors = self.colors
+        cols = self.cols
+        grid = []
+        for y, mask in enumerate(self.masks):
+            if not mask:
+                grid.append([0] * cols)
+                continue
+            base = y * cols
+            grid.append([palette[colors[base + x]] if mask >> x & 1 else 0 for x in range(cols)])
+        return grid
+
+    def get(self, x: int, y: int):
+        if self.masks[y] >> x & 1:
+            return self.palette[self.colors[y * self.cols + x]]
+        return 0
+
+    def set(self, x: int, y: int, value):
+        if value:
+            try:
+                index = self.palette.index(value)
+            except ValueError:
+                index = self._add_color(value)
+            self.masks[y] |= 1 << x
+            self.colors[y * self.cols + x] = index
+        else:
+            self.masks[y] &= ~(1 << x)
+            self.colors[y * self.cols + x] = 0
+
+    def is_row_full(self, y: int) -> bool:
+        return self.masks[y] == (1 << self.cols) - 1
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PackedBoard):
+            return NotImplemented
+        return self.to_grid() == other.to_grid()
+
+    def encode(self) -> bytes:
+        """rows, cols, 추가 팔레트, 줄 마스크(u16), 점유 칸의 색 니블 순서로 직렬화"""
+        extra = self.palette[len(DEFAULT_PALETTE):]
+        out = bytearray((self.rows, self.cols, len(extra)))
+        for value in extra:
+            encoded = json.dumps(value).encode()
+            out.append(len(encoded))
+            out += encoded
+        out += struct.pack(f"<{self.rows}H", *self.masks)
+
+        # 점유된 칸의 색만 4비트씩 채워 넣음
+        nibbles = []
+        colors = self.colors
+        cols = self.cols
+        for y, mask in enumerate(self.masks):
+            base = y * cols
+            while mask:
+                low = mask & -mask
+                nibbles.append(colors[base + low.bit_length() - 1])
+                mask ^= low
+        if len(nibbles) % 2:
+            nibbles.append(0)
+        out += bytes(nibbles[i] | nibbles[i + 1] << 4 for i in range(0, len(nibbles), 2))
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data: bytes, offset: int = 0) -> tuple:
+        """(PackedBoard, 다음 오프셋) 반환"""
+        rows, cols, extra_count = data[offset], data[offset + 1], data[offset + 2]
+        offset += 3
+        board = cls(rows, cols)
+        for _ in range(extra_count):
+            length = data[offset]
+            board.palette.append(json.loads(data[offset + 1:offset + 1 + length]))
+            offset += 1 + length
+        board.masks = list(struct.unpack_from(f"<{rows}H", data, offset))
+        offset += rows * 2
+
+        occupied = sum(bin(mask).count("1") for mask in board.masks)
+        packed = data[offset:offset + (occupied + 1) // 2]
+        offset += (occupied + 1) // 2
+        colors = board.colors
+        i = 0
+        for y, mask in enumerate(board.masks):
+            base = y * cols
+            while mask:
+                low = mask & -mask
+                byte = packed[i >> 1]
+                colors[base + low.bit_length() - 1] = (byte >> 4) if i & 1 else (byte & 0x0F)
+                i += 1
+                mask ^= low
+        return board, offset
+
+
+def encode_update_grid(message: dict) -> bytes:
+    """update_grid 메시지(전체 grid)를 바이너리 프레임으로 인코딩"""
+    header = _UPDATE_HEADER.pack(
+        FRAME_UPDATE_GRID,
+        _clamp(message.get("seq"), MAX_SCORE),
+        _clamp(message.get("score", 0), MAX_SCORE),
+        _clamp(message.get("level", 1), MAX_STAT),
+        _clamp(message.get("lines", 0), MAX_STAT),
+        _clamp(message.get("combo", 0), MAX_STAT),
+    )
+    return header + PackedBoard.from_grid(message["grid"]).encode()
+
+
+def decode_update_grid(data: bytes) -> dict:
+    """바이너리 update_grid 프레임을 JSON update_grid 와 같은 dict 로 디코딩"""
+    frame_type, seq, score, level, lines, combo = _UPDATE_HEADER.unpack_from(data)
+    if frame_type != FRAME_UPDATE_GRID:
+        raise ValueError(f"unexpected frame type {frame_type}")
+    board, _ = PackedBoard.decode(data, _UPDATE_HEADER.size)
+    return {
+        "type": "update_grid",
+        "seq": seq or None,
+        "grid": board.to_grid(),
+        "score": score,
+        "level": level,
+        "lines": lines,
+        "combo": combo,
+    }
+
+
+def encode_game_state(seq: int, game_state: dict, packed_grids: dict) -> bytes:
+    """game_state_update 바이너리 프레임
+
+    플레이어마다 id, 스탯, 패킹된 보드를 넣고 나머지(players, targeting_info 등)는 JSON 꼬리로 붙인다.
+    packed_grids 는 player_id -> PackedBoard.encode() 결과.
+    """
+    game_states = game_state["game_states"]
+    out = bytearray(_STATE_HEADER.pack(FRAME_GAME_STATE, seq, len(game_states)))
+    for player_id, state in game_states.items():
+        encoded_id = player_id.encode()
+        out.append(len(encoded_id))
+        out += encoded_id
+        out += _PLAYER_STATS.pack(
+            _clamp(state["score"], MAX_SCORE), _clamp(state["level"], MAX_STAT), _clamp(state["lines"], MAX_STAT),
+            _clamp(state["combo"], MAX_STAT), int(state["game_over"])
+        )
+        out += packed_grids[player_id]
+    meta = json.dumps({k: v for k, v in game_state.items() if k != "game_states"}).encode()
+    out += struct.pack("<I", len(meta))
+    out += meta
+    return bytes(out)
+
+
+def decode_game_state(data: bytes) -> tuple:
+    """(seq, game_state dict) 반환 - encode_game_state 의 역변환"""
+    frame_type, seq, count = _STATE_HEADER.unpack_from(data)
+    if frame_type != FRAME_GAME_STATE:
+        raise ValueError(f"unexpected frame type {frame_type}")
+    offset = _STATE_HEADER.size
+    game_states = {}
+    for _ in range(count):
+        length = data[offset]
+        player_id = data[offset + 1:offset + 1 + length].decode()
+        offset += 1 + length
+        score, level, lines, combo, game_over = _PLAYER_STATS.unpack_from(data, offset)
+        offset += _PLAYER_STATS.size
+        board, offset = PackedBoard.decode(data, offset)
+        game_states[player_id] = {
+            "grid": board.to_grid(),
+            "score": score,
+            "level": level,
+            "lines": lines,
+            "combo": combo,
+            "game_over": bool(game_over),
+        }
+    (meta_length,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    game_state = json.loads(data[offset:offset + meta_length])
+    game_state["game_states"] = game_states
+    return seq, game_state
+
@@ -0,0 +1,344 @@
+"""AI 봇 플레이어 - 사람처럼 LobbyManager 로 방에 참가하고 같은 메시지로 플레이
+
+봇은 ConnectionManager 에 PlayerConnection 대신 등록되어 (enqueue) 서버가 보내는 메시지를 그대로 받고,
+router.dispatch 로 update_grid / attack / input / ready / game_over 를 보낸다.
+일반 방에서는 자기 TetrisGame 을 직접 진행하고, 서버 권한 모드 방에서는 서버 시뮬레이션의 게임을 보고 입력만 보낸다.
+
+배치 탐색은 현재 블록(과 hold 블록)의 회전 4방향 x 도달 가능한 모든 열을 하드 드롭해 보고
+El-Tetris 가중치(높이, 지운 줄, 줄/열 전환, 구멍, 우물)로 점수를 매긴다. 보드는 줄마다 비트마스크로 다룬다.
+난이도는 초당 놓는 블록 수(pps) 상한이다.
+"""
+import asyncio
+import json
+import os
+import random
+from typing import Awaitable, Callable, List, NamedTuple, Optional, Tuple
+
+import metrics
+from garbage import GARBAGE_CELL, AttackCounter
+from logger import get_logger
+from pieces import PIECES, shape_row_masks
+from simulation import ENGINES, INPUT_ACTIONS, SIM_ENGINE
+
+BOT_DEFAULT_PPS = float(os.environ.get("BOT_DEFAULT_PPS", "2"))
+BOT_MAX_PPS = float(os.environ.get("BOT_MAX_PPS", "10"))
+
+# El-Tetris 가중치: 착지 높이, 지운 줄 x 지운 블록 칸, 줄 전환, 열 전환, 구멍, 우물 깊이 합
+WEIGHTS = (-4.500158825082766, 3.4181268101392694, -3.2178882868487753,
+           -9.348695305445199, -7.899265427351652, -3.3855972247263626)
+
+
+# 회전 차이 -> 회전 입력 (시계 방향 두 번, 반시계 한 번)
+ROTATION_INPUTS = ((), ("rotate_cw",), ("rotate_cw", "rotate_cw"), ("rotate_ccw",))
+
+# 워커 탐색이 실패/타임아웃일 때 놓는 입력 (이벤트 루프에서 탐색하지 않고 그 자리에 바로 떨어뜨림)
+FALLBACK_ACTIONS = ["hard_drop"]
+
+# 서버가 보내는 메시지 중 봇이 읽는 것 (나머지는 디코딩하지 않고 버림)
+BOT_EVENT_TYPES = {"game_start", "game_end", "room_update", "receive_attack", "target_changed", "target_redirect"}
+
+# int.bit_count 는 3.10 부터
+_popcount = getattr(int, "bit_count", None) or (lambda value: bin(value).count("1"))
+
+logger = get_logger("bot")
+
+bot_pieces = metrics.REGISTRY.counter("tetris_bot_pieces_total", "Pieces placed by bot players")
+bot_plan_fallback = metrics.REGISTRY.counter(
+    "tetris_bot_plan_fallback_total", "Bot pieces hard-dropped in place because the search worker failed")
+
+
+class Placement(NamedTuple):
+    score: float
+    hold: bool
+    rotation: int
+    x: int
+    y: int
+
+
+def board_masks(game) -> List[int]:
+    """게임 보드의 줄마다 점유 비트마스크 (BitboardTetrisGame 은 그대로 사용)"""
+    masks = getattr(game, "masks", None)
+    if masks is not None:
+        return masks
+    return [shape_row_masks([row])[0] for row in game.grid]
+
+
+def evaluate(masks: List[int], rows: int, cols: int, piece_masks: tuple, x: int, y: int) -> float:
+    """블록을 (x, y) 에 놓은 보드의 점수 (masks 는 바꾸지 않음)"""
+    full = (1 << cols) - 1
+    board = list(masks)
+    cleared = eroded = 0
+    for i, mask in enumerate(piece_masks):
+        row = board[y + i] | (mask << x)
+        board[y + i] = row
+        if row == full:
+            cleared += 1
+            eroded += _popcount(mask << x)
+    if cleared:
+        board = [0] * cleared + [row for row in board if row != full]
+
+    # 양옆 벽을 채운 줄 (비트 0 과 cols+1 이 벽)
+    walls = 1 | (1 << (cols + 1))
+    wall_mask = (1 << (cols + 2)) - 1
+    row_transitions = column_transitions = holes = wells = 0
+    covered = 0
+    above = 0
+    runs: List[int] = []  # 깊이 k 이상 이어진 우물 칸 (k = 인덱스 + 1)
+    for row in board:
+        walled = (row << 1) | walls
+        row_transitions += _popcount((walled ^ (walled >> 1)) & (wall_mask >> 1))
+        column_transitions += _popcount(row ^ above)
+        holes += _popcount(covered & ~row)
+        covered |= row
+        above = row
+        well = ~walled & (walled << 1) & (walled >> 1) & (full << 1)
+        if well or runs:
+            runs = [well] + [run & well for run in runs]
+            while runs and not runs[-1]:
+                runs.pop()
+            wells += sum(_popcount(run) for run in runs)
+    column_transitions += _popcount(above ^ full)  # 바닥은 채워진 것으로
+
+    height = len(piece_masks)
+    landing = rows - y - (height - 1) / 2
+    w = WEIGHTS
+    return (w[0] * landing + w[1] * cleared * eroded + w[2] * row_transitions
+            + w[3] * column_transitions + w[4] * holes + w[5] * wells)
+
+
+def _fits(masks: List[int], rows: int, cols: int, rotation, x: int, y: int) -> bool:
+    if x < 0 or y < 0 or x + rotation.width > cols or y + rotation.height > rows:
+        return False
+    for i, mask in enumerate(rotation.row_masks):
+        if masks[y + i] & (mask << x):
+            return False
+    return True
+
+
+def search(masks: List[int], rows: int, cols: int, shape_index: int, x0: int, y0: int, r0: int,
+           hold: bool = False) -> Tuple[Optional[Placement], int]:
+    """(가장 좋은 배치, 평가한 배치 수)
+
+    도달 가능 = 현재 위치에서 (제자리 회전이 되는) 회전 후 같은 높이에서 좌우로 밀고 하드 드롭.
+    월킥이 필요한 배치는 건너뛰므로 실제 게임에 같은 입력을 넣으면 같은 곳에 떨어진다.
+    """
+    rotations = PIECES[shape_index]
+    best = None
+    evaluated = 0
+    seen = set()
+    for turn in range(4):
+        steps = [(r0 + 1) % 4, (r0 + 2) % 4] if turn == 2 else [(r0 + turn) % 4]
+        if not all(_fits(masks, rows, cols, rotations[r], x0, y0) for r in steps):
+            continue
+        r = (r0 + turn) % 4
+        rotation = rotations[r]
+        # 같은 높이에서 좌우로 갈 수 있는 열
+        left = x0
+        while _fits(masks, rows, cols, rotation, left - 1, y0):
+            left -= 1
+        right = x0
+        while _fits(masks, rows, cols, rotation, right + 1, y0):
+            right += 1
+        for x in range(left, right + 1):
+            y = y0
+            while _fits(masks, rows, cols, rotation, x, y + 1):
+                y += 1
+            key = (rotation.row_masks, x, y)  # O 블록 등 모양이 같은 회전은 한 번만
+            if key in seen:
+                continue
+            seen.add(key)
+            evaluated += 1
+            score = evaluate(masks, rows, cols, rotation.row_masks, x, y)
+            if best is None or score > best.score:
+                best = Placement(score, hold, r, x, y)
+    return best, evaluated
+
+
+def board_state(game) -> tuple:
+    """plan_state 에 넘길 탐색 입력 (워커 프로세스로 보낼 수 있게 숫자만 담은 튜플)"""
+    piece = game.current_piece
+    other = None  # hold 하면 나올 블록
+    if game.can_hold:
+        other = game.held_piece.shape_index if game.held_piece else game.next_piece.shape_index
+    return (list(board_masks(game)), game.rows, game.cols, piece.shape_index, piece.x, piece.y, piece.rotation,
+            other, game.spawn_x(other) if other is not None else 0)
+
+
+def plan_state(state: tuple) -> Tuple[Optional[Placement], List[str], int]:
+    """현재 블록과 hold 했을 때의 블록을 모두 탐색해서 (배치, 입력 목록, 평가한 배치 수)"""
+    masks, rows, cols, shape_index, x, y, rotation, other, other_x = state
+    best, evaluated = search(masks, rows, cols, shape_index, x, y, rotation)
+    if other is not None and other != shape_index:
+        held, count = search(masks, rows, cols, other, other_x, 0, 0, hold=True)
+        evaluated += count
+        if held and (best is None or held.score > best.score):
+            best = held
+    if best is None:
+        return None, ["hard_drop"], evaluated
+    actions = ["hold"] if best.hold else []
+    x0, r0 = (other_x, 0) if best.hold else (x, rotation)
+    actions.extend(ROTATION_INPUTS[(best.rotation - r0) % 4])
+    dx = best.x - x0
+    actions.extend(["right"] * dx if dx > 0 else ["left"] * -dx)
+    actions.append("hard_drop")
+    return best, actions, evaluated
+
+
+def plan(game) -> Tuple[Optional[Placement], List[str], int]:
+    return plan_state(board_state(game))
+
+
+class BotPlayer:
+    """방에 참가한 봇 하나 (PlayerConnection 과 같은 enqueue/stop 인터페이스)
+
+    dispatch(player_id, message) 는 클라이언트 메시지 처리 (router.dispatch),
+    room_lookup() 은 봇이 들어가 있는 Room, detach(player_id) 는 연결 목록에서 제거.
+    planner(state) 를 주면 배치 탐색을 그쪽(워커 프로세스 풀)에 맡기고, 실패하면 탐색 없이 FALLBACK_ACTIONS 로 놓는다
+    (이벤트 루프에서 직접 탐색하면 워커가 밀릴 때 모든 방의 틱이 함께 늦어짐). planner 가 없을 때만 직접 탐색.
+    """
+
+    def __init__(self, player_id: str, name: str, pps: float, dispatch: Callable, room_lookup: Callable,
+                 detach: Callable, planner: Optional[Callable[[tuple], Awaitable]] = None):
+        self.player_id = player_id
+        self.name = name
+        self.pps = min(max(pps, 0.1), BOT_MAX_PPS)
+        self.dispatch = dispatch
+        self.room_lookup = room_lookup
+        self.detach = detach
+        self.planner = planner
+        self.rng = random.Random()
+        self.game = None
+        self.target: Optional[str] = None
+        self.pending_garbage = 0
+        self.attack = AttackCounter()  # 콤보/B2B
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def enqueue(self, kind: Optional[str], payload):
+        """서버가 보내는 메시지 - 필요한 종류만 읽음"""
+        if self.closed or kind not in BOT_EVENT_TYPES or isinstance(payload, bytes):
+            return
+        message = json.loads(payload) if isinstance(payload, str) else payload
+        if kind == "game_start":
+            self.target = message.get("initial_target")
+            self._stop_task()
+            self.task = asyncio.create_task(self.play())
+        elif kind == "game_end":
+            self._stop_task()
+        elif kind == "room_update":
+            room = message["room"]
+            me = next((player for player in room["players"] if player["id"] == self.player_id), None)
+            if me and not me["ready"] and not room["game_active"]:
+                asyncio.create_task(self.dispatch(self.player_id, {"type": "ready", "ready": True}))
+        elif kind == "receive_attack":
+            self.pending_garbage += message["lines"]
+        elif kind in ("target_changed", "target_redirect"):
+            self.target = message.get("new_target")
+
+    def _stop_task(self):
+        if self.task and self.task is not asyncio.current_task():
+            self.task.cancel()
+        self.task = None
+
+    def stop(self):
+        self.closed = True
+        self._stop_task()
+        self.detach(self.player_id)
+
+    async def _plan(self, game) -> List[str]:
+        state = board_state(game)
+        if self.planner is None:
+            return plan_state(state)[1]
+        try:
+            return (await self.planner(state))[1]
+        except Exception as e:  # 타임아웃, 큐 가득 참, 워커 에러 (방이 끝나서 취소되면 그대로 전파)
+            logger.debug("⚠️ 봇 배치 탐색 워커 실패, 제자리 하드 드롭: %s - %r", self.player_id, e)
+            bot_plan_fallback.inc()
+            return FALLBACK_ACTIONS
+
+    async def play(self):
+        room = self.room_lookup()
+        if room is None:
+            return
+        if room.authoritative:
+            await self._play_authoritative(room)
+        else:
+            await self._play_client(room)
+
+    async def _play_client(self, room):
+        """일반 방 - 자기 TetrisGame 을 pps 속도로 진행하고 브라우저 클라이언트와 같은 메시지 전송"""
+        game = self.game = ENGINES[SIM_ENGINE](seed=self.rng.randrange(1 << 30))
+        self.pending_garbage = 0
+        self.attack = AttackCounter()
+        interval = 1.0 / self.pps
+        loop = asyncio.get_running_loop()
+        next_piece = loop.time()
+        while room.game_active and not game.game_over:
+            next_piece += interval
+            await asyncio.sleep(max(0.0, next_piece - loop.time()))
+            if not room.game_active or self.player_id not in room.players:
+                return
+            actions = await self._plan(game)
+            if not room.game_active:
+                return
+            for action in actions:
+                INPUT_ACTIONS[action](game)
+            bot_pieces.inc()
+            await self._after_lock(game)
+            await self.dispatch(self.player_id, {
+                "type": "update_grid",
+                # list 엔진의 grid 는 제자리에서 바뀌므로 사본 (방/전송 캐시가 grid 객체 id 로 변경을 판단)
+                "grid": [row[:] for row in game.grid],
+                "score": game.score,
+                "level": game.level,
+                "lines": game.lines_cleared,
+                "combo": self.attack.combo,
+            })
+        if game.game_over:
+            await self.dispatch(self.player_id, {"type": "game_over"})
+
+    async def _after_lock(self, game):
+        """지운 줄로 대기 쓰레기 상쇄 -> 남으면 공격, 남은 쓰레기는 보드 아래에 추가
+
+        공격 계산은 client/tetris.py clear_lines 와 같다 (모두 상쇄되면 콤보/B2B 는 그대로).
+        """
+        lines = game.last_lines_cleared
+        if lines:
+            cancelled = min(self.pending_garbage, lines)
+            self.pending_garbage -= cancelled
+            attack = self.attack.on_lock(lines - cancelled) if lines > cancelled else 0
+            if attack:
+                await self.dispatch(self.player_id, {"type": "attack", "lines": attack, "combo": self.attack.combo,
+                                                     "target_id": self.target})
+        else:
+            self.attack.on_lock(0)
+        if self.pending_garbage and not game.game_over:
+            count = min(self.pending_garbage, game.rows)
+            self.pending_garbage = 0
+            garbage = []
+            for _ in range(count):
+                row = [GARBAGE_CELL] * game.cols
+                row[self.rng.randrange(game.cols)] = 0
+                garbage.append(row)
+            game.grid = game.grid[count:] + garbage
+            piece = game.current_piece
+            if not game.is_valid_position(piece.shape, piece.x, piece.y):
+                game.game_over = True
+
+    async def _play_authoritative(self, room):
+        """서버 권한 모드 - 서버 시뮬레이션의 게임을 보고 다음 틱에 적용될 입력만 전송"""
+        interval = 1.0 / self.pps
+        loop = asyncio.get_running_loop()
+        next_piece = loop.time()
+        while room.game_active:
+            next_piece += interval
+            await asyncio.sleep(max(0.0, next_piece - loop.time()))
+            game = room.games.get(self.player_id)
+            if not room.game_active or game is None or game.game_over or room.clock is None:
+                return
+            actions = await self._plan(game)
+            if not room.game_active:
+                return
+            tick = room.clock.current_tick() + 1
+            bot_pieces.inc()
+            await self.dispatch(self.player_id, {"type": "input", "inputs": [[tick, action] for action in actions]})
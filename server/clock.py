@@ -0,0 +1,145 @@
+import asyncio
+import os
+import time
+from typing import Dict
+
+import metrics
+from connection import encode_message
+from logger import get_logger
+
+# 게임 틱 속도와 시계 보정 주기
+TICK_RATE = int(os.environ.get("TICK_RATE", "60"))
+CLOCK_SYNC_INTERVAL = float(os.environ.get("CLOCK_SYNC_INTERVAL", "1.0"))  # clock_sync 전송 주기(초)
+# 0 이면 레거시 클라이언트에게도 매 프레임 game_tick 을 보내지 않는다
+GAME_TICK_BROADCAST = os.environ.get("GAME_TICK_BROADCAST", "1") != "0"
+
+logger = get_logger("clock")
+
+
+class RoomClock:
+    """방 하나의 게임 시계 - 시작 시각과 틱 속도로 현재 틱을 계산"""
+
+    __slots__ = ("start_epoch", "tick_rate")
+
+    def __init__(self, tick_rate: int = TICK_RATE):
+        self.start_epoch = time.time()
+        self.tick_rate = tick_rate
+
+    def current_tick(self, now: float = None) -> int:
+        if now is None:
+            now = time.time()
+        return int((now - self.start_epoch) * self.tick_rate)
+
+    def handshake(self) -> dict:
+        """game_start 에 실어 보내는 시계 정보 - 클라이언트는 이걸로 틱을 직접 계산한다"""
+        return {
+            "start_epoch": self.start_epoch,
+            "tick_rate": self.tick_rate,
+            "server_time": time.time(),
+        }
+
+    def sync_message(self, client_time: float = None) -> dict:
+        now = time.time()
+        message = {
+            "type": "clock_sync",
+            "server_time": now,
+            "tick": self.current_tick(now),
+            "tick_rate": self.tick_rate,
+        }
+        if client_time is not None:
+            message["client_time"] = client_time  # 왕복 시간 계산용
+        return message
+
+
+class ClockScheduler:
+    """서버 전체에서 하나만 도는 타이머로 모든 방의 시계를 구동
+
+    - 시계를 직접 계산하는 클라이언트(clock_clients)에게는 CLOCK_SYNC_INTERVAL 마다 clock_sync 만 보낸다.
+    - 레거시 클라이언트, 서버 시뮬레이션, 전달할 쓰레기 큐가 있는 방이 있을 때만 TICK_RATE 로 깨어난다.
+    - on_tick(room, tick) 은 매 틱 방마다 호출된다 (서버 권한 모드 시뮬레이션).
+    """
+
+    def __init__(self, connection_manager, on_tick=None):
+        self.connection_manager = connection_manager
+        self.on_tick = on_tick
+        self.rooms: Dict[str, object] = {}  # room_id -> Room
+        self.task = None
+        self.wakeup = asyncio.Event()  # 새 방이 추가되면 긴 대기를 끊고 바로 깨어남
+        self.wakeups = 0
+
+    def add_room(self, room):
+        room.clock = RoomClock()
+        room.tick_count = 0
+        self.rooms[room.room_id] = room
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        else:
+            self.wakeup.set()
+
+    def remove_room(self, room):
+        self.rooms.pop(room.room_id, None)
+
+    def request_ticks(self):
+        """긴 대기 중이면 바로 깨워서 다음 틱부터 TICK_RATE 로 돌게 함 (쓰레기 큐가 생겼을 때)"""
+        self.wakeup.set()
+
+    def _needs_frame_ticks(self) -> bool:
+        for room in self.rooms.values():
+            if room.simulation is not None or room.garbage.incoming:
+                return True
+            if GAME_TICK_BROADCAST and len(room.clock_clients) < len(room.players):
+                return True
+        return False
+
+    def _tick_room(self, room, now: float, frame_ticks: bool, send_sync: bool):
+        tick = room.clock.current_tick(now)
+        try:
+            if self.on_tick:
+                self.on_tick(room, tick)
+            if frame_ticks and GAME_TICK_BROADCAST and tick != room.tick_count:
+                legacy = [pid for pid in room.players if pid not in room.clock_clients]
+                if legacy:
+                    start = time.perf_counter()
+                    self.connection_manager.send_encoded(legacy, "game_tick", encode_message({
+                        "type": "game_tick",
+                        "tick": tick,
+                        "timestamp": now
+                    }))
+                    metrics.broadcast_seconds.observe(time.perf_counter() - start, "game_tick")
+                    metrics.broadcast_fanout.observe(len(legacy), "game_tick")
+        finally:
+            room.tick_count = tick
+            if send_sync and room.clock_clients:
+                self.connection_manager.send_encoded(
+                    room.clock_clients, "clock_sync", encode_message(room.clock.sync_message())
+                )
+
+    async def _run(self):
+        last_sync = 0.0
+        try:
+            while self.rooms:
+                now = time.time()
+                send_sync = now - last_sync >= CLOCK_SYNC_INTERVAL
+                if send_sync:
+                    last_sync = now
+                frame_ticks = self._needs_frame_ticks()
+
+                for room in list(self.rooms.values()):
+                    try:
+                        self._tick_room(room, now, frame_ticks, send_sync)
+                    except Exception:
+                        # 방 하나의 에러 (시뮬레이션 버그, 리플레이 기록 I/O 등) 가 다른 방의 시계를 멈추지 않게
+                        logger.exception("❌ 방 틱 에러: %s", room.room_id)
+
+                self.wakeups += 1
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), 1 / TICK_RATE if frame_ticks else CLOCK_SYNC_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("❌ 시계 스케줄러 에러")
+        finally:
+            self.task = None
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Optional, Union
+
+from fastapi import WebSocket
+
+import metrics
+from logger import get_logger
+
+try:
+    import orjson  # 설치되어 있으면 더 빠른 JSON 인코더 사용
+except ImportError:
+    orjson = None
+
+# 연결별 송신 큐 설정
+OUTBOUND_QUEUE_LIMIT = int(os.environ.get("OUTBOUND_QUEUE_LIMIT", "256"))  # 밀려 있는 메시지 최대 수
+SLOW_CONSUMER_TIMEOUT = float(os.environ.get("SLOW_CONSUMER_TIMEOUT", "5"))  # 메시지 하나 전송 제한 시간(초)
+
+# 최신 것만 의미 있는 메시지 (큐에 남아 있으면 새 메시지로 교체)
+# base_seq 로 이어지는 델타 프레임 (game_state_delta, spectator_focus, spectator_thumbnails) 은 하나라도 버리면
+# 받는 쪽이 재동기화해야 하므로 넣지 않고 순서대로 모두 보낸다.
+LATEST_WINS_TYPES = {"game_state_update", "game_tick", "clock_sync"}
+
+logger = get_logger("connection")
+
+outbound_stats = {"queued": 0, "sent": 0, "coalesced": 0, "slow_consumers": 0, "encoded": 0}
+
+
+def encode_message(message: dict) -> str:
+    """메시지를 JSON 텍스트로 한 번만 인코딩 (Starlette send_json 과 같은 형식)"""
+    outbound_stats["encoded"] += 1
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class PlayerConnection:
+    """WebSocket 하나와 전용 송신 큐/writer 태스크
+
+    상태 스냅샷은 큐에 같은 종류가 남아 있으면 교체(latest-wins)하고,
+    receive_attack, game_end 같은 나머지 메시지는 순서대로 모두 전송한다.
+    큐가 OUTBOUND_QUEUE_LIMIT 를 넘거나 전송 하나가 SLOW_CONSUMER_TIMEOUT 을 넘으면 연결을 끊는다.
+    """
+
+    def __init__(self, client_id: str, websocket: WebSocket):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.queue: deque = deque()  # [kind, payload] 항목
+        self.pending_latest: dict = {}  # kind -> 큐에 남아 있는 latest-wins 항목
+        self.wakeup = asyncio.Event()
+        self.closed = False
+        self.writer_task = asyncio.create_task(self._writer())
+
+    def enqueue(self, kind: Optional[str], payload: Union[dict, str, bytes]):
+        """payload 는 dict(전송 시 인코딩), 미리 인코딩된 JSON 텍스트, 또는 바이너리 프레임"""
+        if self.closed:
+            return
+        outbound_stats["queued"] += 1
+        if kind in LATEST_WINS_TYPES:
+            entry = self.pending_latest.get(kind)
+            if entry is not None:
+                entry[1] = payload
+                outbound_stats["coalesced"] += 1
+                return
+            entry = [kind, payload]
+            self.pending_latest[kind] = entry
+        else:
+            entry = [kind, payload]
+
+        self.queue.append(entry)
+        if len(self.queue) > OUTBOUND_QUEUE_LIMIT:
+            logger.warning("🐢 느린 클라이언트 연결 종료: %s (대기 메시지 %d개)", self.client_id, len(self.queue))
+            metrics.send_failures.inc("queue_full")
+            self.close()
+            return
+        self.wakeup.set()
+
+    async def _writer(self):
+        try:
+            while not self.closed:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                while self.queue:
+                    entry = self.queue.popleft()
+                    kind, payload = entry
+                    if self.pending_latest.get(kind) is entry:
+                        del self.pending_latest[kind]
+                    try:
+                        if isinstance(payload, bytes):
+                            frame = "binary"
+                            send = self.websocket.send_bytes(payload)
+                        else:
+                            if not isinstance(payload, str):
+                                payload = encode_message(payload)
+                            frame = "text"
+                            send = self.websocket.send_text(payload)
+                        await asyncio.wait_for(send, SLOW_CONSUMER_TIMEOUT)
+                        outbound_stats["sent"] += 1
+                        metrics.outbound_bytes.inc(frame, amount=len(payload))
+                        if kind == "receive_attack":
+                            logger.debug("📤 메시지 전송 성공: %s - %s", self.client_id, kind)
+                    except asyncio.TimeoutError:
+                        logger.warning("🐢 느린 클라이언트 연결 종료: %s (전송 %s초 초과)", self.client_id, SLOW_CONSUMER_TIMEOUT)
+                        metrics.send_failures.inc("timeout")
+                        self.close()
+                        return
+                    except Exception as e:
+                        logger.warning("❌ 메시지 전송 실패: %s - %s", self.client_id, e)
+                        metrics.send_failures.inc("error")
+        except asyncio.CancelledError:
+            pass
+
+    def close(self):
+        """송신 중단 후 소켓 종료 - 수신 루프가 끊김을 감지해서 정리한다"""
+        if self.closed:
+            return
+        self.closed = True
+        outbound_stats["slow_consumers"] += 1
+        self.queue.clear()
+        self.pending_latest.clear()
+        self.writer_task.cancel()
+        asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=1013), SLOW_CONSUMER_TIMEOUT)
+        except Exception:
+            pass
+
+    def stop(self):
+        """정상 연결 종료 시 writer 태스크 정리"""
+        self.closed = True
+        self.queue.clear()
+        self.pending_latest.clear()
+        self.writer_task.cancel()
@@ -0,0 +1,97 @@
+"""샤드 모드용 공유 방 디렉터리 (여러 워커 프로세스가 같은 SQLite 파일을 사용)
+
+방은 만든 샤드(프로세스)에 고정되고, 각 샤드는 자기 방 목록을 주기적으로 디렉터리에 기록한다.
+각 샤드의 방 목록 캐시(room_list.py)는 디렉터리에서 다른 샤드의 방을 주기적으로 읽어 오고, 다른 샤드의 방에 들어가려는 클라이언트는
+shard_redirect 로 그 샤드의 포트를 받아 다시 연결한다.
+SHARD_COUNT 가 1 이면 디렉터리를 쓰지 않는다 (기존 단일 프로세스 동작).
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+SHARD_COUNT = int(os.environ.get("SHARD_COUNT", "1"))
+SHARD_ID = int(os.environ.get("SHARD_ID", "0"))
+SHARD_PORT = int(os.environ.get("SHARD_PORT", "8000"))  # 이 샤드가 듣는 포트 (redirect 대상)
+SHARD_DIRECTORY = os.environ.get(
+    "SHARD_DIRECTORY", os.path.join(tempfile.gettempdir(), "tetris-room-directory.sqlite3")
+)
+DIRECTORY_SYNC_INTERVAL = float(os.environ.get("DIRECTORY_SYNC_INTERVAL", "0.5"))  # 방 목록 기록 주기(초)
+SHARD_TTL = 5.0  # 이 시간 동안 heartbeat 가 없는 샤드의 방은 목록에서 제외
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (shard_id INTEGER PRIMARY KEY, port INTEGER, heartbeat REAL);
+CREATE TABLE IF NOT EXISTS rooms (
+    room_id TEXT PRIMARY KEY, shard_id INTEGER, info TEXT
+);
+CREATE INDEX IF NOT EXISTS rooms_shard ON rooms (shard_id);
+"""
+
+
+class RoomDirectory:
+    """room_id -> 소유 샤드, 그리고 모든 샤드의 방 요약
+
+    호출은 짧은 SQLite 트랜잭션 하나씩이다 (WAL 모드라 읽기는 쓰기를 기다리지 않음).
+    쓰기(publish/withdraw)와 읽기(lookup/list_rooms)는 연결과 lock 을 따로 써서,
+    쓰기 트랜잭션이 busy timeout 으로 기다리는 동안에도 읽기는 막히지 않는다.
+    """
+
+    def __init__(self, path: str, shard_id: int, port: int):
+        self.shard_id = shard_id
+        self.port = port
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self.read_lock = threading.Lock()
+        self.reader = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+
+    def publish(self, rooms: List[dict]):
+        """이 샤드의 방 목록 전체를 교체하고 heartbeat 갱신 (방 요약 목록, shard/port 포함)"""
+        rows = [(room["room_id"], self.shard_id, json.dumps(room, ensure_ascii=False)) for room in rooms]
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.execute("INSERT OR REPLACE INTO shards VALUES (?, ?, ?)",
+                                (self.shard_id, self.port, time.time()))
+                self.db.execute("DELETE FROM rooms WHERE shard_id = ?", (self.shard_id,))
+                self.db.executemany("INSERT OR REPLACE INTO rooms VALUES (?, ?, ?)", rows)
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def withdraw(self):
+        """샤드 종료 시 자기 방과 heartbeat 삭제"""
+        with self.lock:
+            self.db.execute("DELETE FROM rooms WHERE shard_id = ?", (self.shard_id,))
+            self.db.execute("DELETE FROM shards WHERE shard_id = ?", (self.shard_id,))
+
+    def lookup(self, room_id: str) -> Optional[Tuple[int, int]]:
+        """방을 가진 (살아 있는) 샤드의 (shard_id, port)"""
+        with self.read_lock:
+            row = self.reader.execute(
+                "SELECT s.shard_id, s.port FROM rooms r JOIN shards s ON r.shard_id = s.shard_id "
+                "WHERE r.room_id = ? AND s.heartbeat > ?", (room_id, time.time() - SHARD_TTL)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def list_rooms(self) -> List[dict]:
+        """살아 있는 모든 샤드의 방 요약"""
+        with self.read_lock:
+            rows = self.reader.execute(
+                "SELECT r.info FROM rooms r JOIN shards s ON r.shard_id = s.shard_id "
+                "WHERE s.heartbeat > ? ORDER BY r.room_id", (time.time() - SHARD_TTL,)
+            ).fetchall()
+        return [json.loads(info) for (info,) in rows]
+
+
+def open_directory() -> Optional[RoomDirectory]:
+    """샤드 모드면 공유 디렉터리, 아니면 None"""
+    if SHARD_COUNT <= 1:
+        return None
+    return RoomDirectory(SHARD_DIRECTORY, SHARD_ID, SHARD_PORT)
@@ -0,0 +1,127 @@
+"""보드 특징 추출 - 배치 후보 보드 여러 개를 NumPy 한 번에 계산
+
+    boards, placements = candidate_boards(masks, rows, cols, shape_index)
+    matrix = board_features(boards, cols)   # [보드, FEATURE_NAMES + 열 높이]
+
+특징 (열 높이 cols 개 뒤에 붙음):
+- aggregate_height, max_height: 열 높이 합 / 최대
+- holes: 위에 블록이 있는 빈 칸
+- bumpiness: 이웃한 열 높이 차 합
+- wells: 양옆이 막힌 빈 칸, 위에서부터 이어진 깊이만큼 가중 (1 + 2 + ... + 깊이, bot.evaluate 와 같은 정의)
+- row_transitions, column_transitions: 양옆 벽과 바닥을 채워진 것으로 본 칸 전환 수
+
+features_reference 는 TetrisGame.grid 를 파이썬 루프로 도는 같은 정의의 기준 구현 (bench.py features 가 비교).
+numpy 는 선택 의존성: 설치되어 있지 않으면 board_features 에서 RuntimeError.
+"""
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from bot import Placement, _fits
+from pieces import PIECES
+
+FEATURE_NAMES = ("aggregate_height", "max_height", "holes", "bumpiness", "wells",
+                 "row_transitions", "column_transitions")
+
+
+def feature_names(cols: int) -> Tuple[str, ...]:
+    """board_features 결과의 열 이름"""
+    return FEATURE_NAMES + tuple(f"height_{x}" for x in range(cols))
+
+
+def features_reference(grid: List[list]) -> List[int]:
+    """그리드 하나의 특징 (칸마다 파이썬 루프) - board_features 의 한 줄과 같은 값"""
+    rows, cols = len(grid), len(grid[0])
+    heights = []
+    holes = 0
+    for x in range(cols):
+        height = 0
+        for y in range(rows):
+            if grid[y][x]:
+                if not height:
+                    height = rows - y
+            elif height:
+                holes += 1
+        heights.append(height)
+    bumpiness = sum(abs(heights[x] - heights[x + 1]) for x in range(cols - 1))
+
+    def filled(x, y):
+        # 벽(x 범위 밖)과 바닥(y == rows)은 채워진 것으로
+        return x < 0 or x >= cols or y >= rows or (y >= 0 and grid[y][x] != 0)
+
+    row_transitions = sum(filled(x, y) != filled(x + 1, y) for y in range(rows) for x in range(-1, cols))
+    column_transitions = sum(filled(x, y) != filled(x, y + 1) for x in range(cols) for y in range(-1, rows))
+    wells = 0
+    for x in range(cols):
+        depth = 0
+        for y in range(rows):
+            if not filled(x, y) and filled(x - 1, y) and filled(x + 1, y):
+                depth += 1
+                wells += depth
+            else:
+                depth = 0
+    return [sum(heights), max(heights), holes, bumpiness, wells, row_transitions, column_transitions] + heights
+
+
+def board_features(masks, cols: int):
+    """masks[보드, 줄] 비트마스크 (비트 x = x 번째 열) -> 특징 행렬 [보드, len(feature_names(cols))] int64"""
+    if np is None:
+        raise RuntimeError("board_features requires numpy (pip install numpy)")
+    masks = np.asarray(masks, dtype=np.int64)
+    count, rows = masks.shape
+    filled = ((masks[:, :, None] >> np.arange(cols)) & 1).astype(bool)  # [보드, y, x]
+
+    occupied = filled.any(axis=1)
+    heights = np.where(occupied, rows - filled.argmax(axis=1), 0)
+    covered = np.logical_or.accumulate(filled, axis=1)
+    holes = (covered & ~filled).sum(axis=(1, 2))
+    bumpiness = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+
+    # 벽/바닥을 채운 판 [보드, y + 1, x + 1] (맨 위 줄은 비움)
+    walled = np.ones((count, rows + 2, cols + 2), dtype=bool)
+    walled[:, 0, 1:-1] = False
+    walled[:, 1:-1, 1:-1] = filled
+    row_transitions = (walled[:, 1:-1, 1:] != walled[:, 1:-1, :-1]).sum(axis=(1, 2))
+    column_transitions = (walled[:, 1:, 1:-1] != walled[:, :-1, 1:-1]).sum(axis=(1, 2))
+
+    well = ~filled & walled[:, 1:-1, :-2] & walled[:, 1:-1, 2:]
+    depth = np.zeros((count, cols), dtype=np.int64)
+    wells = np.zeros(count, dtype=np.int64)
+    for y in range(rows):
+        depth = (depth + 1) * well[:, y]
+        wells += depth.sum(axis=1)
+
+    return np.column_stack((heights.sum(axis=1), heights.max(axis=1), holes, bumpiness, wells,
+                            row_transitions, column_transitions, heights)).astype(np.int64)
+
+
+def candidate_boards(masks: List[int], rows: int, cols: int, shape_index: int) -> Tuple[list, list]:
+    """블록을 회전 x 열마다 맨 위에서 하드 드롭하고 줄을 지운 보드들 ([줄 마스크 목록], [Placement])
+
+    Placement.score 는 지운 줄 수. 모양이 같은 회전(O 블록 등)은 한 번만 넣는다.
+    """
+    full = (1 << cols) - 1
+    boards = []
+    placements = []
+    seen = set()
+    for r, rotation in enumerate(PIECES[shape_index]):
+        if rotation.row_masks in seen:
+            continue
+        seen.add(rotation.row_masks)
+        for x in range(cols - rotation.width + 1):
+            if not _fits(masks, rows, cols, rotation, x, 0):
+                continue
+            y = 0
+            while _fits(masks, rows, cols, rotation, x, y + 1):
+                y += 1
+            board = list(masks)
+            for i, mask in enumerate(rotation.row_masks):
+                board[y + i] |= mask << x
+            kept = [row for row in board if row != full]
+            cleared = rows - len(kept)
+            boards.append([0] * cleared + kept)
+            placements.append(Placement(cleared, False, r, x, y))
+    return boards, placements
@@ -1,70 +1,94 @@
 import random
+from board import PackedBoard
+from pieces import COLORS, PIECES, SPAWN_SHAPES, Piece, kick_offsets
+
+# 블록 모양과 색 (모든 게임 인스턴스가 공유)
+SHAPES = SPAWN_SHAPES
+
+LINE_SCORES = {1: 100, 2: 300, 3: 500, 4: 800}
+
+_MASK64 = (1 << 64) - 1
+
+
+class BagRandom:
+    """가방 섞기 전용 SplitMix64 난수 (random.Random 은 게임마다 Mersenne Twister 상태 2.5KB)"""
+
+    __slots__ = ("state",)
+
+    def __init__(self, seed=None):
+        if seed is None:
+            self.state = random.getrandbits(64)
+        elif isinstance(seed, int):
+            self.state = seed & _MASK64
+        else:
+            self.state = random.Random(seed).getrandbits(64)
+
+    def next64(self) -> int:
+        self.state = z = (self.state + 0x9E3779B97F4A7C15) & _MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return z ^ (z >> 31)
+
+    def shuffle(self, items: list):
+        """Fisher-Yates (64비트 난수의 나머지 - 7개 정도면 치우침은 무시할 만함)"""
+        for i in range(len(items) - 1, 0, -1):
+            j = self.next64() % (i + 1)
+            items[i], items[j] = items[j], items[i]
+
 
 class TetrisGame:
-    def __init__(self, rows=20, cols=10):
+    # 방마다 플레이어 수만큼 만들어지므로 인스턴스 dict 없이 슬롯만 사용
+    __slots__ = (
+        "rng", "rows", "cols", "grid", "current_piece", "next_piece", "game_over", "score",
+        "lines_cleared", "level", "held_piece", "can_hold", "last_lines_cleared", "bag",
+    )
+
+    shapes = SHAPES
+    colors = COLORS
+
+    def __init__(self, rows=20, cols=10, seed=None):
+        # seed 가 같으면 블록 순서가 같음 (서버 시뮬레이션은 방마다 같은 seed 사용)
+        self.rng = BagRandom(seed)
         self.rows = rows
         self.cols = cols
-        self.grid = [[0 for _ in range(cols)] for _ in range(rows)]
-        self.current_piece = None
-        self.next_piece = None
+        self.grid = [[0] * cols for _ in range(rows)]  # [0] * cols 는 초과 할당 없이 정확한 크기
+        self.current_piece = Piece(0)
+        self.next_piece = Piece(0)
         self.game_over = False
         self.score = 0
         self.lines_cleared = 0
         self.level = 1
         self.held_piece = None
         self.can_hold = True
+        self.last_lines_cleared = 0  # 마지막 merge 에서 지운 줄 수
 
-        self.shapes = [
-            [[1, 1, 1, 1]],  # I
-            [[1, 1], [1, 1]],  # O
-            [[0, 1, 0], [1, 1, 1]],  # T
-            [[1, 1, 1], [1, 0, 0]],  # L
-            [[1, 1, 1], [0, 0, 1]],  # J
-            [[0, 1, 1], [1, 1, 0]],  # S
-            [[1, 1, 0], [0, 1, 1]],  # Z
-        ]
-
-        self.colors = [
-            '#00ffff', '#ffff00', '#ff00ff', '#ff9900', '#0000ff', '#00ff00', '#ff0000'
-        ]
-
-        self.bag = []
+        self.bag = []  # 뒤에서부터 꺼냄 (bag[-1] 이 다음 블록)
         self.fill_bag()
         self.spawn_piece()
 
     def fill_bag(self):
         pieces = list(range(len(self.shapes)))
-        random.shuffle(pieces)
-        self.bag.extend(pieces)
+        self.rng.shuffle(pieces)
+        self.bag[:0] = pieces[::-1]
+
+    def spawn_x(self, shape_index):
+        return self.cols // 2 - len(self.shapes[shape_index][0]) // 2
 
     def spawn_piece(self):
         if not self.bag:
             self.fill_bag()
         
-        shape_index = self.bag.pop(0)
-        shape = self.shapes[shape_index]
-        
-        self.current_piece = {
-            'shape': shape,
-            'color': self.colors[shape_index],
-            'shape_index': shape_index,
-            'x': self.cols // 2 - len(shape[0]) // 2,
-            'y': 0,
-            'rotation': 0
-        }
-
-        if not self.is_valid_position(self.current_piece['shape'], self.current_piece['x'], self.current_piece['y']):
+        shape_index = self.bag.pop()
+        piece = self.current_piece
+        piece.reset(shape_index, self.spawn_x(shape_index))
+
+        if not self.is_valid_position(piece.shape, piece.x, piece.y):
             self.game_over = True
 
         if not self.bag:
             self.fill_bag()
         
-        next_shape_index = self.bag[0]
-        self.next_piece = {
-            'shape': self.shapes[next_shape_index],
-            'color': self.colors[next_shape_index],
-            'shape_index': next_shape_index
-        }
+        self.next_piece.reset(self.bag[-1])
 
     def is_valid_position(self, shape, x, y):
         for row_idx, row in enumerate(shape):
@@ -74,33 +98,41 @@ class TetrisGame:
                     new_y = y + row_idx
                     if not (0 <= new_x < self.cols and 0 <= new_y < self.rows and self.grid[new_y][new_x] == 0):
                         return False
+        return True
+
     def move_left(self):
-        if self.is_valid_position(self.current_piece['shape'], self.current_piece['x'] - 1, self.current_piece['y']):
-            self.current_piece['x'] -= 1
+        piece = self.current_piece
+        if self.is_valid_position(piece.shape, piece.x - 1, piece.y):
+            piece.x -= 1
 
     def move_right(self):
-        if self.is_valid_position(self.current_piece['shape'], self.current_piece['x'] + 1, self.current_piece['y']):
-            self.current_piece['x'] += 1
+        piece = self.current_piece
+        if self.is_valid_position(piece.shape, piece.x + 1, piece.y):
+            piece.x += 1
 
     def move_down(self):
-        if self.is_valid_position(self.current_piece['shape'], self.current_piece['x'], self.current_piece['y'] + 1):
-            self.current_piece['y'] += 1
+        piece = self.current_piece
+        if self.is_valid_position(piece.shape, piece.x, piece.y + 1):
+            piece.y += 1
             return True
         else:
             self.merge()
             return False
 
     def hard_drop(self):
-        while self.is_valid_position(self.current_piece['shape'], self.current_piece['x'], self.current_piece['y'] + 1):
-            self.current_piece['y'] += 1
+        piece = self.current_piece
+        while self.is_valid_position(piece.shape, piece.x, piece.y + 1):
+            piece.y += 1
+        self.merge()
+
     def merge(self):
-        shape = self.current_piece['shape']
-        x, y = self.current_piece['x'], self.current_piece['y']
-        for row_idx, row in enumerate(shape):
-            for col_idx, cell in enumerate(row):
-                if cell:
-                    self.grid[y + row_idx][x + col_idx] = self.current_piece['shape_index'] + 1
+        piece = self.current_piece
+        x, y = piece.x, piece.y
+        for dx, dy in PIECES[piece.shape_index][piece.rotation].cells:
+            self.grid[y + dy][x + dx] = piece.shape_index + 1
         self.clear_lines()
+        self.can_hold = True
+        self.spawn_piece()
 
     def clear_lines(self):
         lines_cleared = 0
@@ -109,81 +141,57 @@ class TetrisGame:
             if all(cell != 0 for cell in self.grid[y]):
                 lines_cleared += 1
                 del self.grid[y]
-                self.grid.insert(0, [0 for _ in range(self.cols)])
+                self.grid.insert(0, [0] * self.cols)
             else:
                 y -= 1
+        self.add_cleared_lines(lines_cleared)
+
+    def add_cleared_lines(self, lines_cleared):
+        self.last_lines_cleared = lines_cleared
         
         # 점수 계산 (간단한 버전, 추후 T-Spin, B2B 등 추가)
         if lines_cleared > 0:
             self.lines_cleared += lines_cleared
-            base_score = {1: 100, 2: 300, 3: 500, 4: 800}
-            self.score += base_score.get(lines_cleared, 0) * self.level
+            self.score += LINE_SCORES.get(lines_cleared, 0) * self.level
+            self.level = self.lines_cleared // 10 + 1
 
     def rotate(self, clockwise=True):
-        shape = self.current_piece['shape']
-        rotated_shape = self.get_rotated_shape(shape, clockwise)
-        
-        if self.is_valid_position(rotated_shape, self.current_piece['x'], self.current_piece['y']):
-            self.current_piece['shape'] = rotated_shape
-            self.current_piece['rotation'] = (self.current_piece['rotation'] + (1 if clockwise else -1) + 4) % 4
-            return
-
-        # Wall Kick
-        kicks = self.get_wall_kick_offsets(self.current_piece['rotation'], (self.current_piece['rotation'] + (1 if clockwise else -1) + 4) % 4)
-        for dx, dy in kicks:
-            if self.is_valid_position(rotated_shape, self.current_piece['x'] + dx, self.current_piece['y'] + dy):
-                self.current_piece['x'] += dx
-                self.current_piece['y'] += dy
-                self.current_piece['shape'] = rotated_shape
-                self.current_piece['rotation'] = (self.current_piece['rotation'] + (1 if clockwise else -1) + 4) % 4
+        # 회전 모양과 월킥은 pieces 테이블에서 찾기만 함 (첫 킥이 (0, 0) = 제자리 회전)
+        piece = self.current_piece
+        from_rot = piece.rotation
+        to_rot = (from_rot + (1 if clockwise else -1)) % 4
+        shape = PIECES[piece.shape_index][to_rot].shape
+        for dx, dy in self.get_wall_kick_offsets(from_rot, to_rot):
+            if self.is_valid_position(shape, piece.x + dx, piece.y + dy):
+                piece.x += dx
+                piece.y += dy
+                piece.shape = shape
+                piece.rotation = to_rot
                 return
 
-    def get_rotated_shape(self, shape, clockwise):
-        # 로테이션 로직 (간단한 버전)
-        if clockwise:
-            return [list(row) for row in zip(*shape[::-1])]
-        else:
-            return [list(row) for row in zip(*shape)][::-1]
-
-    def get_wall_kick_offsets(self, from_rot, to_rot):
-        # SRS Wall Kick 데이터 (J, L, S, T, Z 블록)
-        jlstz_kicks = {
-            (0, 1): [(0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)],
-            (1, 0): [(0, 0), (1, 0), (1, -1), (0, 2), (1, 2)],
-            (1, 2): [(0, 0), (1, 0), (1, -1), (0, 2), (1, 2)],
-            (2, 1): [(0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)],
-            (2, 3): [(0, 0), (1, 0), (1, 1), (0, -2), (1, -2)],
-            (3, 2): [(0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)],
-            (3, 0): [(0, 0), (-1, 0), (-1, -1), (0, 2), [-1, 2]],
-            (0, 3): [(0, 0), (1, 0), (1, 1), (0, -2), (1, -2)],
-        }
-        return jlstz_kicks.get((from_rot, to_rot), [(0, 0)])
+    def get_wall_kick_offsets(self, from_rot, to_rot, shape_index=None):
+        # SRS Wall Kick 데이터 (I 블록 전용 테이블, O 블록은 킥 없음)
+        if shape_index is None:
+            shape_index = self.current_piece.shape_index
+        return kick_offsets(shape_index, from_rot, to_rot)
 
     def hold_piece(self):
-        if not hasattr(self, 'can_hold') or not self.can_hold:
+        if not self.can_hold:
             return
 
-        if not hasattr(self, 'held_piece') or self.held_piece is None:
-            self.held_piece = {
-                'shape_index': self.current_piece['shape_index'],
-                'shape': self.shapes[self.current_piece['shape_index']],
-                'color': self.colors[self.current_piece['shape_index']]
-            }
+        # 보관 블록과 현재 블록 객체를 맞바꾸고 회전 0 으로 되돌림
+        current = self.current_piece
+        if self.held_piece is None:
+            self.held_piece = Piece(current.shape_index)
             self.spawn_piece()
         else:
             held = self.held_piece
-            self.held_piece = {
-                'shape_index': self.current_piece['shape_index'],
-                'shape': self.shapes[self.current_piece['shape_index']],
-                'color': self.colors[self.current_piece['shape_index']]
-            }
-            self.current_piece = {
-                'shape': self.shapes[held['shape_index']],
-                'color': self.colors[held['shape_index']],
-                'shape_index': held['shape_index'],
-                'x': self.cols // 2 - len(self.shapes[held['shape_index']][0]) // 2,
-                'y': 0,
-                'rotation': 0
-            }
+            held_index = held.shape_index
+            held.reset(current.shape_index)
+            current.reset(held_index, self.spawn_x(held_index))
         
         self.can_hold = False
+
+    def to_packed_board(self) -> PackedBoard:
+        """현재 그리드를 비트 패킹된 PackedBoard 로 변환"""
+        return PackedBoard.from_grid(self.grid)
@@ -0,0 +1,117 @@
+"""서버 쪽 쓰레기 줄 큐 - 공격을 틱 단위로 모아 상쇄한 뒤 대상마다 한 번에 전달
+
+공격은 바로 전달하지 않고 대상의 큐에 쌓는다. 대상이 같은 틱 안에 공격하면 그 줄 수만큼
+자기 큐를 먼저 상쇄하고 남은 줄만 내보낸다 (이미 전달된 쓰레기는 클라이언트의 pending_garbage 가 상쇄).
+큐는 처음 쌓인 틱이 지나면 ClockScheduler 틱에서 receive_attack 한 번으로 전달된다.
+
+AttackCounter 는 client/tetris.py clear_lines 의 공격 표 (서버 권한 모드에서 서버가 직접 공격을 계산할 때).
+"""
+from typing import Dict, List, Tuple
+
+import metrics
+
+# 지운 줄 수 -> 기본 공격 줄 수 (client/tetris.py 와 같은 표, 콤보/B2B 보너스는 따로)
+ATTACK_LINES = (0, 0, 1, 2, 4)
+MAX_COMBO_BONUS = 10
+MAX_B2B_BONUS = 3
+GARBAGE_CELL = 8  # 클라이언트는 색 인덱스 밖의 숫자를 회색으로 그림
+
+garbage_lines = metrics.REGISTRY.counter(
+    "tetris_garbage_lines_total", "Garbage lines by outcome (queued, cancelled, delivered, dropped)", ("outcome",))
+
+
+class AttackCounter:
+    """플레이어 한 명의 콤보/B2B 상태 - 블록이 놓일 때마다 on_lock(지운 줄 수) 로 공격 줄 수 계산"""
+
+    __slots__ = ("combo", "back_to_back", "last_clear_was_difficult")
+
+    def __init__(self):
+        self.combo = 0
+        self.back_to_back = 0
+        self.last_clear_was_difficult = False
+
+    def on_lock(self, lines: int) -> int:
+        if lines <= 0:
+            self.combo = 0  # 줄을 못 지우면 콤보 초기화
+            return 0
+        self.combo += 1
+        attack = ATTACK_LINES[min(lines, 4)]
+        if lines >= 4:  # 테트리스 연속이면 B2B 보너스
+            if self.last_clear_was_difficult:
+                self.back_to_back += 1
+                attack += 1
+            self.last_clear_was_difficult = True
+        else:
+            self.last_clear_was_difficult = False
+        if self.combo > 1:
+            attack += min(self.combo - 1, MAX_COMBO_BONUS)
+        if self.back_to_back > 1:
+            attack += min(self.back_to_back // 2, MAX_B2B_BONUS)
+        return attack
+
+
+class _Incoming:
+    """대상 한 명에게 쌓인, 아직 전달하지 않은 쓰레기"""
+
+    __slots__ = ("lines", "sources", "combo", "first_tick")
+
+    def __init__(self, tick: int):
+        self.lines = 0
+        self.sources: Dict[str, int] = {}  # attacker_id -> 줄 수 (도착 순서)
+        self.combo = 0
+        self.first_tick = tick
+
+
+class GarbageQueue:
+    """방 하나의 플레이어별 대기 쓰레기 (target_id -> _Incoming)"""
+
+    def __init__(self):
+        self.incoming: Dict[str, _Incoming] = {}
+
+    def reset(self):
+        self.incoming.clear()
+
+    def remove(self, player_id: str):
+        """나간/죽은 플레이어에게 쌓인 쓰레기 버림"""
+        entry = self.incoming.pop(player_id, None)
+        if entry is not None:
+            garbage_lines.inc("dropped", amount=entry.lines)
+
+    def cancel(self, player_id: str, lines: int) -> int:
+        """player_id 의 공격 lines 로 자기 대기 쓰레기를 상쇄, 남은 공격 줄 수 반환"""
+        entry = self.incoming.get(player_id)
+        if entry is None or lines <= 0:
+            return lines
+        cancelled = min(entry.lines, lines)
+        garbage_lines.inc("cancelled", amount=cancelled)
+        entry.lines -= cancelled
+        # 먼저 도착한 공격부터 상쇄
+        remaining = cancelled
+        for attacker_id in list(entry.sources):
+            used = min(entry.sources[attacker_id], remaining)
+            entry.sources[attacker_id] -= used
+            remaining -= used
+            if entry.sources[attacker_id] == 0:
+                del entry.sources[attacker_id]
+            if remaining == 0:
+                break
+        if entry.lines == 0:
+            del self.incoming[player_id]
+        return lines - cancelled
+
+    def add(self, attacker_id: str, target_id: str, lines: int, combo: int, tick: int):
+        entry = self.incoming.get(target_id)
+        if entry is None:
+            entry = self.incoming[target_id] = _Incoming(tick)
+        entry.lines += lines
+        entry.sources[attacker_id] = entry.sources.get(attacker_id, 0) + lines
+        entry.combo = max(entry.combo, combo)
+        garbage_lines.inc("queued", amount=lines)
+
+    def flush(self, tick: int) -> List[Tuple[str, _Incoming]]:
+        """tick 이전부터 쌓인 큐를 꺼냄 (같은 틱에 들어온 공격은 다음 틱까지 모음)"""
+        ready = [target_id for target_id, entry in self.incoming.items() if entry.first_tick < tick]
+        batches = [(target_id, self.incoming.pop(target_id)) for target_id in ready]
+        for _, entry in batches:
+            garbage_lines.inc("delivered", amount=entry.lines)
+        return batches
@@ -0,0 +1,117 @@
+import os
+from typing import Dict, List, Optional
+
+# 키프레임(전체 그리드) 전송 주기 - 스냅샷 N번마다 한 번
+GRID_KEYFRAME_INTERVAL = int(os.environ.get("GRID_KEYFRAME_INTERVAL", "50"))
+
+
+def diff_rows(old: Optional[list], new: list) -> List[list]:
+    """두 그리드를 줄 단위로 비교해서 바뀐 줄 목록 [[y, row], ...] 반환"""
+    if old is None or len(old) != len(new):
+        return [[y, row] for y, row in enumerate(new)]
+    return [[y, row] for y, (old_row, row) in enumerate(zip(old, new)) if old_row != row]
+
+
+def apply_rows(grid: list, rows: List[list]) -> Optional[list]:
+    """바뀐 줄 목록을 적용한 새 그리드 반환 (범위를 벗어나면 None)
+
+    줄 객체는 제자리에서 수정하지 않고 교체만 하므로 얕은 복사로 충분하다.
+    """
+    new_grid = list(grid)
+    for y, row in rows:
+        if not (isinstance(y, int) and 0 <= y < len(new_grid)):
+            return None
+        new_grid[y] = row
+    return new_grid
+
+
+class RoomGridSync:
+    """방 단위 그리드 동기화 상태
+
+    - 클라이언트 -> 서버: update_grid 에 seq 와 (grid | rows + base_seq) 를 실어 보낸다.
+      base_seq 가 서버에 저장된 seq 와 다르면 grid_resync 로 전체 그리드를 다시 요청한다.
+    - 서버 -> 클라이언트: delta 모드 구독자에게는 직전 스냅샷 대비 바뀐 줄만 보낸다.
+      GRID_KEYFRAME_INTERVAL 마다 키프레임을 보내고, resync_request 를 받으면 개별 키프레임을 보낸다.
+    """
+
+    def __init__(self):
+        self.grid_seqs: Dict[str, int] = {}  # player_id -> 마지막으로 받은 클라이언트 seq
+        self.sent_grids: Dict[str, list] = {}  # 마지막 스냅샷에 반영된 그리드
+        self.snapshot_seq = 0
+        self.delta_clients: set = set()  # delta 모드로 받는 플레이어
+        self.binary_clients: set = set()  # PackedBoard 바이너리 프레임으로 받는 플레이어
+
+    def reset(self):
+        self.grid_seqs.clear()
+        self.sent_grids.clear()
+        self.snapshot_seq = 0
+
+    def remove_player(self, player_id: str):
+        self.grid_seqs.pop(player_id, None)
+        self.sent_grids.pop(player_id, None)
+        self.delta_clients.discard(player_id)
+        self.binary_clients.discard(player_id)
+
+    def set_mode(self, player_id: str, delta: bool, binary: bool):
+        (self.delta_clients.add if delta else self.delta_clients.discard)(player_id)
+        (self.binary_clients.add if binary else self.binary_clients.discard)(player_id)
+
+    def receive(self, grids: Dict[str, list], player_id: str, message) -> bool:
+        """update_grid 메시지(UpdateGridMessage)를 grids 에 반영, 기준 seq 가 맞지 않으면 False (재동기화 필요)"""
+        seq = message.seq
+        if message.grid is not None or message.rows is None:
+            grids[player_id] = message.grid if message.grid is not None else []
+            if seq is not None:
+                self.grid_seqs[player_id] = seq
+            return True
+
+        current = grids.get(player_id)
+        if current is None or self.grid_seqs.get(player_id) != message.base_seq:
+            return False
+        new_grid = apply_rows(current, message.rows)
+        if new_grid is None:
+            return False
+        grids[player_id] = new_grid
+        self.grid_seqs[player_id] = seq
+        return True
+
+    def build_delta(self, grids: Dict[str, list], full_state: dict) -> dict:
+        """전체 게임 상태에서 직전 스냅샷 대비 delta 메시지 생성 (sent_grids 갱신)"""
+        base_seq = self.snapshot_seq
+        self.snapshot_seq += 1
+        keyframe = self.snapshot_seq % GRID_KEYFRAME_INTERVAL == 1
+
+        game_states = {}
+        for player_id, state in full_state["game_states"].items():
+            grid = grids[player_id]
+            delta_state = {k: v for k, v in state.items() if k != "grid"}
+            if keyframe:
+                delta_state["grid"] = grid
+            else:
+                delta_state["rows"] = diff_rows(self.sent_grids.get(player_id), grid)
+            self.sent_grids[player_id] = grid
+            game_states[player_id] = delta_state
+
+        return {
+            "type": "game_state_update",
+            "delta": True,
+            "keyframe": keyframe,
+            "seq": self.snapshot_seq,
+            "base_seq": base_seq,
+            "game_state": dict(full_state, game_states=game_states)
+        }
+
+    def build_keyframe(self, full_state: dict) -> dict:
+        """마지막 스냅샷(snapshot_seq) 기준의 키프레임 - resync_request 응답용"""
+        game_states = {}
+        for player_id, state in full_state["game_states"].items():
+            if player_id in self.sent_grids:
+                game_states[player_id] = dict(state, grid=self.sent_grids[player_id])
+        return {
+            "type": "game_state_update",
+            "delta": True,
+            "keyframe": True,
+            "seq": self.snapshot_seq,
+            "base_seq": None,
+            "game_state": dict(full_state, game_states=game_states)
+        }
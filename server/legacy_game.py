@@ -0,0 +1,190 @@
+"""슬롯/공유 테이블 도입 전의 TetrisGame (dict 블록, 인스턴스마다 shapes/colors, list.pop(0) 가방, 슬롯 없음)
+
+게임 로직은 game.TetrisGame 과 같다. bench.py memory 가 게임당 메모리 전/후 비교에만 사용한다.
+"""
+import random
+from board import PackedBoard
+from pieces import PIECES, SPAWN_SHAPES, kick_offsets
+
+# 블록 모양과 색 (모든 게임 인스턴스가 공유)
+SHAPES = SPAWN_SHAPES
+
+COLORS = [
+    '#00ffff', '#ffff00', '#ff00ff', '#ff9900', '#0000ff', '#00ff00', '#ff0000'
+]
+
+LINE_SCORES = {1: 100, 2: 300, 3: 500, 4: 800}
+
+class LegacyTetrisGame:
+    def __init__(self, rows=20, cols=10, seed=None):
+        # seed 가 같으면 블록 순서가 같음 (서버 시뮬레이션은 방마다 같은 seed 사용)
+        self.rng = random.Random(seed)
+        self.rows = rows
+        self.cols = cols
+        self.grid = [[0 for _ in range(cols)] for _ in range(rows)]
+        self.current_piece = None
+        self.next_piece = None
+        self.game_over = False
+        self.score = 0
+        self.lines_cleared = 0
+        self.level = 1
+        self.held_piece = None
+        self.can_hold = True
+        self.last_lines_cleared = 0  # 마지막 merge 에서 지운 줄 수
+
+        self.shapes = SHAPES
+        self.colors = COLORS
+
+        self.bag = []
+        self.fill_bag()
+        self.spawn_piece()
+
+    def fill_bag(self):
+        pieces = list(range(len(self.shapes)))
+        self.rng.shuffle(pieces)
+        self.bag.extend(pieces)
+
+    def spawn_piece(self):
+        if not self.bag:
+            self.fill_bag()
+        
+        shape_index = self.bag.pop(0)
+        shape = self.shapes[shape_index]
+        
+        self.current_piece = {
+            'shape': shape,
+            'color': self.colors[shape_index],
+            'shape_index': shape_index,
+            'x': self.cols // 2 - len(shape[0]) // 2,
+            'y': 0,
+            'rotation': 0
+        }
+
+        if not self.is_valid_position(self.current_piece['shape'], self.current_piece['x'], self.current_piece['y']):
+            self.game_over = True
+
+        if not self.bag:
+            self.fill_bag()
+        
+        next_shape_index = self.bag[0]
+        self.next_piece = {
+            'shape': self.shapes[next_shape_index],
+            'color': self.colors[next_shape_index],
+            'shape_index': next_shape_index
+        }
+
+    def is_valid_position(self, shape, x, y):
+        for row_idx, row in enumerate(shape):
+            for col_idx, cell in enumerate(row):
+                if cell:
+                    new_x = x + col_idx
+                    new_y = y + row_idx
+                    if not (0 <= new_x < self.cols and 0 <= new_y < self.rows and self.grid[new_y][new_x] == 0):
+                        return False
+        return True
+
+    def move_left(self):
+        if self.is_valid_position(self.current_piece['shape'], self.current_piece['x'] - 1, self.current_piece['y']):
+            self.current_piece['x'] -= 1
+
+    def move_right(self):
+        if self.is_valid_position(self.current_piece['shape'], self.current_piece['x'] + 1, self.current_piece['y']):
+            self.current_piece['x'] += 1
+
+    def move_down(self):
+        if self.is_valid_position(self.current_piece['shape'], self.current_piece['x'], self.current_piece['y'] + 1):
+            self.current_piece['y'] += 1
+            return True
+        else:
+            self.merge()
+            return False
+
+    def hard_drop(self):
+        while self.is_valid_position(self.current_piece['shape'], self.current_piece['x'], self.current_piece['y'] + 1):
+            self.current_piece['y'] += 1
+        self.merge()
+
+    def merge(self):
+        shape = self.current_piece['shape']
+        x, y = self.current_piece['x'], self.current_piece['y']
+        for row_idx, row in enumerate(shape):
+            for col_idx, cell in enumerate(row):
+                if cell:
+                    self.grid[y + row_idx][x + col_idx] = self.current_piece['shape_index'] + 1
+        self.clear_lines()
+        self.can_hold = True
+        self.spawn_piece()
+
+    def clear_lines(self):
+        lines_cleared = 0
+        y = self.rows - 1
+        while y >= 0:
+            if all(cell != 0 for cell in self.grid[y]):
+                lines_cleared += 1
+                del self.grid[y]
+                self.grid.insert(0, [0 for _ in range(self.cols)])
+            else:
+                y -= 1
+        self.add_cleared_lines(lines_cleared)
+
+    def add_cleared_lines(self, lines_cleared):
+        self.last_lines_cleared = lines_cleared
+        
+        # 점수 계산 (간단한 버전, 추후 T-Spin, B2B 등 추가)
+        if lines_cleared > 0:
+            self.lines_cleared += lines_cleared
+            self.score += LINE_SCORES.get(lines_cleared, 0) * self.level
+            self.level = self.lines_cleared // 10 + 1
+
+    def rotate(self, clockwise=True):
+        # 회전 모양과 월킥은 pieces 테이블에서 찾기만 함 (첫 킥이 (0, 0) = 제자리 회전)
+        piece = self.current_piece
+        from_rot = piece['rotation']
+        to_rot = (from_rot + (1 if clockwise else -1)) % 4
+        shape = PIECES[piece['shape_index']][to_rot].shape
+        for dx, dy in self.get_wall_kick_offsets(from_rot, to_rot):
+            if self.is_valid_position(shape, piece['x'] + dx, piece['y'] + dy):
+                piece['x'] += dx
+                piece['y'] += dy
+                piece['shape'] = shape
+                piece['rotation'] = to_rot
+                return
+
+    def get_wall_kick_offsets(self, from_rot, to_rot, shape_index=None):
+        # SRS Wall Kick 데이터 (I 블록 전용 테이블, O 블록은 킥 없음)
+        if shape_index is None:
+            shape_index = self.current_piece['shape_index']
+        return kick_offsets(shape_index, from_rot, to_rot)
+
+    def hold_piece(self):
+        if not hasattr(self, 'can_hold') or not self.can_hold:
+            return
+
+        if not hasattr(self, 'held_piece') or self.held_piece is None:
+            self.held_piece = {
+                'shape_index': self.current_piece['shape_index'],
+                'shape': self.shapes[self.current_piece['shape_index']],
+                'color': self.colors[self.current_piece['shape_index']]
+            }
+            self.spawn_piece()
+        else:
+            held = self.held_piece
+            self.held_piece = {
+                'shape_index': self.current_piece['shape_index'],
+                'shape': self.shapes[self.current_piece['shape_index']],
+                'color': self.colors[self.current_piece['shape_index']]
+            }
+            self.current_piece = {
+                'shape': self.shapes[held['shape_index']],
+                'color': self.colors[held['shape_index']],
+                'shape_index': held['shape_index'],
+                'x': self.cols // 2 - len(self.shapes[held['shape_index']][0]) // 2,
+                'y': 0,
+                'rotation': 0
+            }
+        
+        self.can_hold = False
+
+    def to_packed_board(self) -> PackedBoard:
+        """현재 그리드를 비트 패킹된 PackedBoard 로 변환"""
+        return PackedBoard.from_grid(self.grid)
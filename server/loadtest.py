@@ -0,0 +1,367 @@
+"""WebSocket 부하/장시간(soak) 테스트 - 가상 플레이어로 서버 하나가 감당하는 방/플레이어 수 측정
+
+    cd server
+    python loadtest.py --spawn-server --rooms 20 --players 8 --seconds 60
+    python loadtest.py --url ws://127.0.0.1:8000 --pid 12345 --rooms 50 --players 16 --seconds 3600 --csv soak.csv
+
+방마다 플레이어 하나가 create_room, 나머지가 join_room + ready 후 방장이 start_game 한다.
+게임 중에는 브라우저 클라이언트(lobby.js)처럼 sync_mode(delta + clock) 를 보내고 100ms 주기로 update_grid 를,
+가끔 attack / item_attack 을 보낸다 (--sync full --no-clock 이면 레거시 클라이언트와 같은 트래픽).
+
+지연 시간은 update_grid 의 score 를 보낸 순번으로 써서, 같은 방 다른 플레이어의 game_state_update 에
+그 score 가 처음 보일 때까지의 시간(서버 수신 + 브로드캐스트 주기 + 전송)이다.
+서버 CPU/메모리는 /proc/<pid> 에서 읽으므로 Linux 에서 --spawn-server 나 --pid 를 줄 때만 나온다.
+부하 생성기도 JSON 을 디코딩하므로 "client lag" (이 프로세스의 이벤트 루프 지연) 가 커지면 측정값을 믿지 말고
+프로세스를 나눠서 (--room-offset) 여러 개 실행한다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import websockets
+
+UPDATE_INTERVAL = 0.1  # 클라이언트 update_grid 주기 (lobby.js syncInterval)
+COLS, ROWS = 10, 20
+COLORS = ["cyan", "blue", "orange", "yellow", "green", "purple", "red"]
+ITEM_TYPES = ["random", "destroy", "item_to_clear", "redirect_target"]  # 서버를 거치는 공격 아이템
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class ProcessSampler:
+    """/proc/<pid> 로 서버 프로세스의 CPU 사용률(직전 샘플 이후)과 RSS 측정 (Linux 전용)"""
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self.last = self._cpu_seconds()
+
+    def _cpu_seconds(self) -> Optional[tuple]:
+        if self.pid is None:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            return None
+        # utime, stime 은 ")" 뒤 12, 13 번째 필드
+        return time.monotonic(), (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def _rss_mb(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+
+    def sample(self) -> tuple:
+        """(CPU %, RSS MB) - 측정할 수 없으면 None"""
+        now = self._cpu_seconds()
+        if now is None or self.last is None:
+            return None, None
+        (wall0, cpu0), (wall1, cpu1) = self.last, now
+        self.last = now
+        cpu = 100 * (cpu1 - cpu0) / (wall1 - wall0) if wall1 > wall0 else 0.0
+        return cpu, self._rss_mb()
+
+
+class Stats:
+    """모든 봇이 공유하는 카운터 (report 마다 구간 값은 초기화)"""
+
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.bytes_received = 0
+        self.latencies: List[float] = []
+        self.all_latencies: List[float] = []
+        self.connected = 0
+        self.playing = 0
+        self.errors = 0
+        self.disconnects = 0
+        self.kinds: Dict[str, int] = {}
+
+    def take_interval(self) -> tuple:
+        interval = (self.sent, self.received, self.bytes_received, sorted(self.latencies))
+        self.all_latencies.extend(self.latencies)
+        self.sent = self.received = self.bytes_received = 0
+        self.latencies = []
+        return interval
+
+
+class RoomPlan:
+    """방 하나 - 방장이 만든 room_id 와 참가 완료를 다른 봇에게 알림"""
+
+    def __init__(self, index: int, players: int):
+        self.index = index
+        self.players = players
+        self.room_id: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.joined = 0
+        self.all_joined = asyncio.Event()
+        self.sent_at: Dict[str, Dict[int, float]] = {}  # player_id -> score(순번) -> 보낸 시각
+
+
+class Bot:
+    def __init__(self, args, stats: Stats, plan: RoomPlan, slot: int, run_id: str):
+        self.args = args
+        self.stats = stats
+        self.plan = plan
+        self.slot = slot
+        self.player_id = f"load{run_id}_{plan.index}_{slot}"
+        self.rng = random.Random(f"{run_id}:{plan.index}:{slot}")
+        self.grid = [[0] * COLS for _ in range(ROWS)]
+        self.seq = 0
+        self.seen: Dict[str, int] = {}  # 다른 플레이어별 마지막으로 본 score
+        self.target: Optional[str] = None
+        self.started = asyncio.Event()
+        self.ws = None
+
+    async def send(self, **message):
+        await self.ws.send(json.dumps(message))
+        self.stats.sent += 1
+
+    async def run(self, deadline: float):
+        stats = self.stats
+        try:
+            async with websockets.connect(f"{self.args.url}/ws/{self.player_id}", max_size=None) as ws:
+                self.ws = ws
+                stats.connected += 1
+                reader = asyncio.create_task(self.read())
+                try:
+                    await self.enter_room()
+                    await asyncio.wait_for(self.started.wait(), 30)
+                    stats.playing += 1
+                    await self.play(deadline)
+                    stats.playing -= 1
+                finally:
+                    reader.cancel()
+                    stats.connected -= 1
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+            stats.errors += 1
+            if self.args.verbose:
+                print(f"{self.player_id}: {e!r}", file=sys.stderr)
+
+    async def enter_room(self):
+        plan = self.plan
+        if self.slot == 0:
+            await self.send(type="create_room", room_name=f"load {plan.index}", player_name=self.player_id,
+                            max_players=plan.players, item_mode=self.args.items)
+            await self.plan.all_joined.wait()
+            await asyncio.sleep(0.2)  # 마지막 ready 처리 대기
+            await self.send(type="start_game")
+        else:
+            room_id = await plan.room_id
+            await self.send(type="join_room", room_id=room_id, player_name=self.player_id)
+
+    async def read(self):
+        stats = self.stats
+        plan = self.plan
+        try:
+            async for raw in self.ws:
+                stats.received += 1
+                stats.bytes_received += len(raw)
+                if isinstance(raw, bytes):
+                    continue
+                message = json.loads(raw)
+                kind = message.get("type")
+                stats.kinds[kind] = stats.kinds.get(kind, 0) + 1
+                if kind == "game_state_update":
+                    self.measure(message["game_state"]["game_states"])
+                elif kind == "room_joined":
+                    if self.slot == 0:
+                        plan.room_id.set_result(message["room"]["room_id"])
+                    else:
+                        await self.send(type="ready", ready=True)
+                    plan.joined += 1
+                    if plan.joined == plan.players:
+                        plan.all_joined.set()
+                elif kind == "game_start":
+                    self.target = message.get("initial_target")
+                    await self.send(type="sync_mode", delta=self.args.sync == "delta", clock=self.args.clock)
+                    self.started.set()
+                elif kind == "target_changed":
+                    self.target = message.get("new_target")
+        except websockets.exceptions.ConnectionClosed:
+            stats.disconnects += 1
+
+    def measure(self, game_states: dict):
+        now = time.perf_counter()
+        for player_id, state in game_states.items():
+            score = state["score"]
+            if player_id == self.player_id or score <= self.seen.get(player_id, 0):
+                continue
+            self.seen[player_id] = score
+            sent = self.plan.sent_at.get(player_id, {}).get(score)
+            if sent is not None:
+                self.stats.latencies.append(now - sent)
+
+    def place_piece(self):
+        """블록 하나를 놓은 것처럼 그리드를 조금 바꿈 (가득 찬 줄이 생기면 지움)"""
+        rng = self.rng
+        y = rng.randrange(ROWS // 2, ROWS)
+        color = rng.choice(COLORS)
+        for x in rng.sample(range(COLS), 4):
+            self.grid[y][x] = color
+        if all(self.grid[y]):
+            del self.grid[y]
+            self.grid.insert(0, [0] * COLS)
+
+    async def play(self, deadline: float):
+        args = self.args
+        rng = self.rng
+        sent_at = self.plan.sent_at.setdefault(self.player_id, {})
+        next_update = time.perf_counter()
+        while time.perf_counter() < deadline:
+            self.seq += 1
+            self.place_piece()
+            sent_at[self.seq] = time.perf_counter()
+            sent_at.pop(self.seq - 100, None)
+            await self.send(type="update_grid", grid=self.grid, score=self.seq, level=1, lines=0, combo=0)
+            if rng.random() < args.attack_rate * UPDATE_INTERVAL:
+                await self.send(type="attack", lines=rng.randint(1, 4), combo=0, target_id=self.target)
+            if args.items and rng.random() < args.item_rate * UPDATE_INTERVAL:
+                await self.send(type="item_attack", target_id=self.target, item_type=rng.choice(ITEM_TYPES))
+            # 밀리면 따라잡지 않고 다음 주기로 (브라우저 setInterval 과 같게)
+            next_update = max(next_update + UPDATE_INTERVAL, time.perf_counter())
+            await asyncio.sleep(next_update - time.perf_counter())
+
+
+def spawn_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=Path(__file__).parent, env=dict(os.environ, LOG_LEVEL="WARNING", REPLAY_DIR=""))
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api", timeout=1)
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise SystemExit("server exited during startup")
+            time.sleep(0.1)
+    server.terminate()
+    raise SystemExit("server did not start")
+
+
+async def monitor_lag(lags: List[float]):
+    """부하 생성기 자신의 이벤트 루프 지연 (구간 최대값)"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(0.1)
+        lags.append(time.perf_counter() - start - 0.1)
+
+
+def format_optional(value, fmt: str) -> str:
+    return "n/a" if value is None else format(value, fmt)
+
+
+async def run(args, pid: Optional[int]):
+    stats = Stats()
+    sampler = ProcessSampler(pid)
+    run_id = f"{os.getpid() % 10000}"
+    plans = [RoomPlan(args.room_offset + index, args.players) for index in range(args.rooms)]
+    start = time.perf_counter()
+    deadline = start + args.ramp + args.seconds
+    bots = []
+    for plan in plans:
+        bots.extend(Bot(args, stats, plan, slot, run_id) for slot in range(args.players))
+    lags: List[float] = []
+    lag_task = asyncio.create_task(monitor_lag(lags))
+    csv = open(args.csv, "w") if args.csv else None
+    columns = "elapsed,connected,playing,sent_per_s,recv_per_s,recv_kb_per_s,p50_ms,p95_ms,p99_ms,cpu_pct,rss_mb,client_lag_ms"
+    if csv:
+        csv.write(columns + "\n")
+    print(f"{args.rooms} rooms x {args.players} players -> {args.url} "
+          f"(ramp {args.ramp:.0f}s, run {args.seconds:.0f}s)")
+    print(" elapsed  conn  play   sent/s   recv/s   recv KB/s   p50 ms   p95 ms   p99 ms   cpu %   rss MB  client lag ms")
+
+    async def start_bots():
+        # ramp 동안 방 단위로 나눠서 접속 (모두 한 번에 접속하면 접속 자체가 측정을 가림)
+        delay = args.ramp / max(1, len(plans))
+        tasks = []
+        for index, plan in enumerate(plans):
+            tasks.extend(asyncio.create_task(bot.run(deadline)) for bot in bots[index * args.players:(index + 1) * args.players])
+            await asyncio.sleep(delay)
+        await asyncio.gather(*tasks)
+
+    runner = asyncio.create_task(start_bots())
+    last = time.perf_counter()
+    while not runner.done():
+        await asyncio.wait({runner}, timeout=args.interval)
+        now = time.perf_counter()
+        elapsed, last = now - last, now
+        sent, received, received_bytes, latencies = stats.take_interval()
+        cpu, rss = sampler.sample()
+        lag = max(lags, default=0.0)
+        lags.clear()
+        row = (now - start, stats.connected, stats.playing, sent / elapsed, received / elapsed,
+               received_bytes / elapsed / 1024, percentile(latencies, 0.5) * 1000, percentile(latencies, 0.95) * 1000,
+               percentile(latencies, 0.99) * 1000, cpu, rss, lag * 1000)
+        print(f"{row[0]:>7.0f}s {row[1]:>5} {row[2]:>5} {row[3]:>8.0f} {row[4]:>8.0f} {row[5]:>11.1f} "
+              f"{row[6]:>8.1f} {row[7]:>8.1f} {row[8]:>8.1f} {format_optional(cpu, '>7.1f')} "
+              f"{format_optional(rss, '>8.1f')} {row[11]:>14.1f}")
+        if csv:
+            csv.write(",".join("" if value is None else f"{value:.3f}" for value in row) + "\n")
+            csv.flush()
+    lag_task.cancel()
+    if csv:
+        csv.close()
+
+    latencies = sorted(stats.all_latencies)
+    print()
+    print(f"latency samples: {len(latencies)}  p50 {percentile(latencies, 0.5) * 1000:.1f} ms  "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms  p99 {percentile(latencies, 0.99) * 1000:.1f} ms  "
+          f"max {(latencies[-1] if latencies else 0) * 1000:.1f} ms")
+    print(f"connection errors: {stats.errors}  unexpected disconnects: {stats.disconnects}")
+    print("received by type: " + ", ".join(f"{kind}={count}" for kind, count in sorted(stats.kinds.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tetris WebSocket load/soak test")
+    parser.add_argument("--url", default=None, help="server base URL (default ws://127.0.0.1:PORT)")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--spawn-server", action="store_true", help="start a local uvicorn server for the run")
+    parser.add_argument("--pid", type=int, default=None, help="server PID for CPU/memory sampling")
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--players", type=int, default=8, help="players per room")
+    parser.add_argument("--room-offset", type=int, default=0, help="first room index (when running several generators)")
+    parser.add_argument("--seconds", type=float, default=30, help="play time after ramp-up")
+    parser.add_argument("--ramp", type=float, default=5, help="seconds to spread connections over")
+    parser.add_argument("--interval", type=float, default=5, help="report interval in seconds")
+    parser.add_argument("--sync", choices=("delta", "full"), default="delta", help="game_state_update format")
+    parser.add_argument("--no-clock", dest="clock", action="store_false", help="receive game_tick every frame")
+    parser.add_argument("--attack-rate", type=float, default=0.2, help="attacks per player per second")
+    parser.add_argument("--items", action="store_true", help="item-mode rooms with item_attack traffic")
+    parser.add_argument("--item-rate", type=float, default=0.1, help="item attacks per player per second")
+    parser.add_argument("--csv", default=None, help="write the periodic report to a CSV file")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    args.url = (args.url or f"ws://127.0.0.1:{args.port}").rstrip("/")
+
+    server = spawn_server(args.port) if args.spawn_server else None
+    try:
+        asyncio.run(run(args, server.pid if server else args.pid))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# 로그 설정 (서버 시작 시 환경 변수로 결정)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()  # DEBUG 면 공격/전송/타겟 선택까지 기록
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "1.0"))  # DEBUG 메시지 중 남길 비율 (0~1)
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")  # text 또는 json
+
+ROOT_LOGGER = "tetris"
+
+# LogRecord 기본 속성 (json 출력에서 extra 필드만 골라내기 위함)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """tetris.<name> 로거 - 핫 패스에서는 %s 인자를 쓰고, 인자 계산이 비싸면 isEnabledFor 로 감쌀 것"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class SamplingFilter(logging.Filter):
+    """DEBUG 메시지를 rate 비율만 통과 (INFO 이상은 항상 통과)"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄에 JSON 객체 하나 - extra={...} 로 넘긴 필드도 함께 출력"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: str = LOG_LEVEL, sample_rate: float = LOG_SAMPLE_RATE, fmt: str = LOG_FORMAT):
+    """tetris.* 로거 설정 - 이벤트 루프는 큐에 넣기만 하고 출력은 별도 스레드(QueueListener)가 담당
+
+    여러 번 호출해도 리스너는 하나만 유지된다.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    if fmt == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+    root.propagate = False  # uvicorn 루트 로거 설정과 중복 출력 방지
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    return _listener
+
+
+@atexit.register
+def _stop_listener():
+    # 종료 시 큐에 남은 로그를 모두 출력
+    if _listener is not None:
+        _listener.stop()
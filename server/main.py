@@ -1,18 +1,54 @@
 import asyncio
 import json
+import logging
+import os
 import random
+import time
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from typing import Dict, List, Optional
 import uvicorn
 from datetime import datetime
 from pathlib import Path
 from game import TetrisGame
+from board import PackedBoard, decode_update_grid, encode_game_state
+from grid_sync import RoomGridSync
+from connection import PlayerConnection, encode_message, outbound_stats
+from clock import TICK_RATE, ClockScheduler
+from simulation import RoomSimulation
+from targeting import TargetIndex
+from logger import get_logger, setup_logging
+import metrics
+from messages import (AddBotMessage, AttackMessage, ClientMessage, ClockSyncRequestMessage, CreateRoomMessage, GridSwapMessage,
+                      InputMessage, ItemAttackMessage, JoinRoomMessage, ListRoomsMessage, ReadyMessage,
+                      RemoveBotMessage, SpectateFocusMessage, SpectateRoomMessage, SyncModeMessage,
+                      UpdateGridMessage)
+from router import MessageRouter, messages_rejected
+from directory import DIRECTORY_SYNC_INTERVAL, SHARD_ID, RoomDirectory, open_directory
+from room_list import ROOM_LIST_PUSH_INTERVAL, RoomFilter, RoomListing
+from garbage import GarbageQueue
+from replay import REPLAY_DIR, ReplayRecorder, load_summary, open_recorder
+from bot import BOT_DEFAULT_PPS, BOT_MAX_PPS, BotPlayer, plan_state
+from workers import WORKER_PROCESSES, JobGroup, JobTimeout, QueueFull, worker_pool
+from spectators import (MAX_SPECTATORS, SPECTATOR_EVENT_TYPES, SPECTATOR_FOCUS_HZ, SPECTATOR_THUMBNAIL_HZ,
+                        SpectatorFeed)
+
+setup_logging()  # LOG_LEVEL / LOG_SAMPLE_RATE / LOG_FORMAT
+logger = get_logger("main")
 
 app = FastAPI()
 
+# 게임 상태 브로드캐스트 주기 (update_grid 를 모아서 초당 최대 N번만 전송)
+STATE_BROADCAST_HZ = float(os.environ.get("STATE_BROADCAST_HZ", "15"))
+STATE_BROADCAST_INTERVAL = 1.0 / STATE_BROADCAST_HZ
+
+REPLAY_LOAD_TIMEOUT = 30.0  # /api/replays/{name} 재생 제한 시간(초)
+
+# 브로드캐스트 통계 (받은 update_grid 수 vs 실제 전송한 스냅샷 수)
+broadcast_stats = {"updates_received": 0, "snapshots_sent": 0}
+
 # CORS middleware to allow frontend connections
 app.add_middleware(
     CORSMiddleware,
@@ -24,12 +60,15 @@ app.add_middleware(
 
 # Room/Lobby system
 class Room:
-    def __init__(self, room_id: str, room_name: str, host_id: str, max_players: int = 16, item_mode: bool = False):
+    def __init__(self, room_id: str, room_name: str, host_id: str, max_players: int = 16, item_mode: bool = False,
+                 authoritative: bool = False):
         self.room_id = room_id
         self.room_name = room_name
         self.host_id = host_id
         self.max_players = max_players
         self.item_mode = item_mode  # 아이템 모드
+        self.authoritative = authoritative  # 서버 권한 모드 (클라이언트는 입력만 전송)
+        self.simulation: Optional[RoomSimulation] = None
         self.players: Dict[str, Dict] = {}
         self.games: Dict[str, TetrisGame] = {}
         self.game_active = False
@@ -40,29 +79,70 @@ class Room:
         self.levels: Dict[str, int] = {}
         self.lines: Dict[str, int] = {}
         self.combos: Dict[str, int] = {}
-        self.current_targets: Dict[str, Optional[str]] = {}  # player_id -> target_id
-        self.game_tick_task = None  # 서버 게임 틱 태스크
+        self.pieces: Dict[str, dict] = {}  # 서버 권한 모드: 현재/다음/홀드 블록
+        self.targeting = TargetIndex()  # 살아 있는 플레이어 + 타겟/역방향 인덱스
+        self.garbage = GarbageQueue()  # 플레이어별 아직 전달하지 않은 쓰레기 줄 (틱마다 모아서 전달)
+        self.clock = None  # RoomClock (게임 중일 때만, ClockScheduler 가 구동)
+        self.clock_clients: set = set()  # 틱을 직접 계산하는 클라이언트 (game_tick 미전송)
         self.tick_count = 0
+        # 게임 상태 브로드캐스트 (update_grid 마다 보내지 않고 dirty 표시 후 모아서 전송)
+        self.state_broadcast_task = None
+        self.state_dirty = asyncio.Event()
+        self.updates_received = 0
+        self.snapshots_sent = 0
+        self.grid_sync = RoomGridSync()  # 줄 단위 delta 동기화
+        self.packed_grids: Dict[str, tuple] = {}  # player_id -> (grid, PackedBoard 인코딩) 캐시
+        # get_game_state() 결과와 인코딩된 game_state_update 캐시 (상태가 바뀌면 invalidate_state)
+        self._game_state_cache: Optional[dict] = None
+        self._game_state_text: Optional[str] = None
+        self.listing: Optional[RoomListing] = None  # 로비 방 목록 캐시 (LobbyManager 가 연결)
+        self.recorder: Optional[ReplayRecorder] = None  # 게임 중 리플레이 기록 (REPLAY_DIR)
+        self.spectators = SpectatorFeed()  # 관전자 (max_players 에 포함되지 않음)
+        self.jobs = JobGroup()  # 이 방의 게임 동안 워커 풀에 맡긴 작업 (게임이 끝나면 취소)
 
-    def add_player(self, player_id: str, name: str) -> bool:
+    def add_player(self, player_id: str, name: str, bot: bool = False) -> bool:
         if len(self.players) >= self.max_players:
             return False
         self.players[player_id] = {"name": name, "ready": False}
+        if bot:
+            self.players[player_id]["bot"] = True
+        self.invalidate_state()
+        self.update_listing()
         return True
 
-    def remove_player(self, player_id: str):
+    def remove_player(self, player_id: str) -> Dict[str, Optional[str]]:
+        """나간 플레이어를 노리던 공격자 -> 새 타겟 (호출자가 target_changed 로 알림)"""
+        reassigned = {}
         if player_id in self.players:
             del self.players[player_id]
             if player_id in self.games:
                 del self.games[player_id]
+            if self.simulation:
+                self.simulation.remove_player(player_id)
+            self.grid_sync.remove_player(player_id)
+            self.packed_grids.pop(player_id, None)
+            self.clock_clients.discard(player_id)
+            self.garbage.remove(player_id)
+            if self.recorder:
+                self.recorder.record_leave(self.replay_tick(), player_id)
+            # 나간 플레이어를 노리던 공격자만 다시 할당
+            for attacker_id in self.targeting.remove(player_id):
+                if attacker_id in self.players:
+                    reassigned[attacker_id] = self.get_best_target_for_player(attacker_id)
+                    self.targeting.set_target(attacker_id, reassigned[attacker_id])
+            self.invalidate_state()
             
             # Transfer host if host left
             if player_id == self.host_id and len(self.players) > 0:
-                self.host_id = next(iter(self.players))
+                self.host_id = next((pid for pid, data in self.players.items() if not data.get("bot")),
+                                    next(iter(self.players)))
+            self.update_listing()
+        return reassigned
 
     def set_ready(self, player_id: str, ready: bool):
         if player_id in self.players:
             self.players[player_id]["ready"] = ready
+            self.invalidate_state()
 
     def all_players_ready(self) -> bool:
         """방장을 제외한 모든 플레이어가 준비되었는지 확인"""
@@ -77,17 +157,42 @@ class Room:
     def start_game(self):
         self.game_active = True
         self.tick_count = 0
+        simulation = RoomSimulation(self.players, TICK_RATE) if self.authoritative else None
+        self.recorder = open_recorder(self.room_id, {
+            "room_id": self.room_id,
+            "room_name": self.room_name,
+            "item_mode": self.item_mode,
+            "authoritative": self.authoritative,
+            "seed": simulation.seed if simulation else None,
+            "tick_rate": TICK_RATE,
+            "cols": 10,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "names": {pid: data["name"] for pid, data in self.players.items()},
+        }, list(self.players))
+        if self.authoritative:
+            # 모든 플레이어가 같은 seed (같은 블록 순서) 로 시작
+            self.simulation = simulation
+            self.games = {pid: sim.game for pid, sim in self.simulation.players.items()}
+            self.apply_simulation_changes()
         for player_id in self.players:
-            self.games[player_id] = TetrisGame()
+            if not self.authoritative:
+                self.games[player_id] = TetrisGame()
             self.players[player_id]["ready"] = False
             self.players[player_id]["game_over"] = False
         
         # 각 플레이어에게 최적의 타겟 할당 (중복 없이)
-        self.current_targets.clear()
+        self.targeting.reset(self.players)
+        self.garbage.reset()
         for player_id in self.players:
             best_target = self.get_best_target_for_player(player_id)
-            self.current_targets[player_id] = best_target
-            print(f"🎯 타겟 할당: {self.players[player_id]['name']} -> {self.players.get(best_target, {}).get('name', 'None') if best_target else 'None'}")
+            self.targeting.set_target(player_id, best_target)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🎯 타겟 할당: %s -> %s", self.players[player_id]['name'],
+                             self.players.get(best_target, {}).get('name', 'None') if best_target else 'None')
+        self.record_targets()
+        self.spectators.reset()
+        self.invalidate_state()
+        self.update_listing()
 
     def get_room_info(self) -> dict:
         return {
@@ -98,68 +203,167 @@ class Room:
             "max_players": self.max_players,
             "game_active": self.game_active,
             "item_mode": self.item_mode,
-            "players": [{"id": pid, "name": data["name"], "ready": data["ready"]} 
+            "authoritative": self.authoritative,
+            "players": [{"id": pid, "name": data["name"], "ready": data["ready"], "bot": data.get("bot", False)}
                        for pid, data in self.players.items()]
         }
+
+    def get_list_entry(self) -> dict:
+        """로비 방 목록용 요약 (플레이어 목록 제외 - 준비 상태가 바뀌어도 목록은 그대로)"""
+        return {
+            "room_id": self.room_id,
+            "room_name": self.room_name,
+            "host_id": self.host_id,
+            "player_count": len(self.players),
+            "max_players": self.max_players,
+            "game_active": self.game_active,
+            "item_mode": self.item_mode,
+            "authoritative": self.authoritative,
+        }
+
+    def update_listing(self):
+        """방 생성/참가/퇴장/게임 시작/종료 시 로비 목록 캐시 갱신"""
+        if self.listing is not None:
+            self.listing.update_room(self)
     
+    @property
+    def current_targets(self) -> Dict[str, Optional[str]]:
+        """player_id -> target_id (읽기 전용, 변경은 targeting.set_target)"""
+        return self.targeting.targets
+
     def get_alive_players(self) -> list:
         """게임 중 살아있는 플레이어 목록 반환"""
-        return [pid for pid, data in self.players.items() if not data.get("game_over", False)]
+        alive = self.targeting.alive
+        return [pid for pid in self.players if pid in alive]
     
     def get_target_count(self, target_id: str) -> int:
         """특정 플레이어를 타겟으로 하는 플레이어 수 반환"""
-        return sum(1 for tid in self.current_targets.values() if tid == target_id)
+        return self.targeting.count(target_id)
     
     def get_best_target_for_player(self, player_id: str) -> Optional[str]:
-        """플레이어에게 최적의 타겟 반환 (타겟팅 제한 고려)"""
-        alive_players = self.get_alive_players()
-        # 자신 제외
-        possible_targets = [pid for pid in alive_players if pid != player_id]
-        
-        print(f"🔍 타겟 선택: {self.players[player_id]['name']} - 가능한 대상: {len(possible_targets)}명")
-        
-        if not possible_targets:
-            print(f"  ❌ 타겟 없음")
-            return None
-        
-        # 각 타겟이 받고 있는 타겟팅 수 계산
-        target_counts = {pid: self.get_target_count(pid) for pid in possible_targets}
-        print(f"  📊 타겟팅 수: {[(self.players[pid]['name'], target_counts[pid]) for pid in possible_targets]}")
-        
-        # 타겟팅을 2명 미만으로 받고 있는 플레이어만 필터링
-        available_targets = [pid for pid in possible_targets if target_counts[pid] < 2]
-        
-        if not available_targets:
-            # 모든 플레이어가 2명 이상에게 타겟팅 받고 있다면, 가장 적게 받는 사람 선택
-            min_count = min(target_counts.values())
-            available_targets = [pid for pid in possible_targets if target_counts[pid] == min_count]
-        
-        # 랜덤하게 선택
-        import random
-        selected = random.choice(available_targets) if available_targets else None
-        if selected:
-            print(f"  ✅ 선택됨: {self.players[selected]['name']}")
+        """플레이어에게 최적의 타겟 반환 (타겟팅 제한 고려, 살아 있는 인원과 무관하게 O(1))"""
+        selected = self.targeting.best_target(player_id)
+        if logger.isEnabledFor(logging.DEBUG):
+            if selected:
+                logger.debug("🔍 타겟 선택: %s -> %s (타겟팅 수 %d)", self.players[player_id]['name'],
+                             self.players[selected]['name'], self.targeting.count(selected))
+            else:
+                logger.debug("🔍 타겟 선택: %s - ❌ 타겟 없음", self.players[player_id]['name'])
         return selected
     
-    def reset_game(self):
-        """게임 종료 후 방 상태 초기화"""
+    def replay_tick(self) -> int:
+        return self.clock.current_tick() if self.clock else 0
+
+    def record_targets(self):
+        """현재 타겟을 리플레이에 기록 (바뀐 것만 기록됨)"""
+        if self.recorder:
+            tick = self.replay_tick()
+            for player_id, target_id in self.targeting.targets.items():
+                self.recorder.record_target(tick, player_id, target_id)
+
+    def reset_game(self, result: Optional[dict] = None):
+        """게임 종료 후 방 상태 초기화 (result 는 리플레이에 남길 game_end 내용)"""
+        if self.recorder:
+            self.recorder.close(self.replay_tick(), result)
+            self.recorder = None
         self.game_active = False
         self.tick_count = 0
-        if self.game_tick_task:
-            self.game_tick_task.cancel()
-            self.game_tick_task = None
+        self.jobs.cancel_all()
+        clock_scheduler.remove_room(self)
+        self.clock = None
+        if self.state_broadcast_task:
+            self.state_broadcast_task.cancel()
+            self.state_broadcast_task = None
+        self.state_dirty.clear()
+        self.simulation = None
+        self.pieces.clear()
+        self.grid_sync.reset()
+        self.packed_grids.clear()
         self.games.clear()
         self.grids.clear()
         self.scores.clear()
         self.levels.clear()
         self.lines.clear()
         self.combos.clear()
-        self.current_targets.clear()
+        self.targeting.reset()
+        self.garbage.reset()
         for player_id in self.players:
+            self.spectators.remove(player_id)  # 죽은 뒤 관전하던 플레이어는 다시 방 화면으로
             self.players[player_id]["ready"] = False
             self.players[player_id]["game_over"] = False
+        self.invalidate_state()
+        self.update_listing()
+
+    def invalidate_state(self):
+        """get_game_state() 캐시 무효화 - 방/플레이어/타겟 상태를 바꾼 뒤 호출"""
+        self._game_state_cache = None
+        self._game_state_text = None
+
+    def apply_simulation_changes(self):
+        """서버 시뮬레이션에서 바뀐 보드를 브로드캐스트용 상태에 반영"""
+        changes = self.simulation.collect_changes()
+        recorder = self.recorder
+        tick = self.replay_tick()
+        for player_id, state in changes.items():
+            if recorder:
+                recorder.record_grid(tick, player_id, state["grid"])
+                recorder.record_stats(tick, player_id, state["score"], state["level"], state["lines"], 0)
+            self.grids[player_id] = state["grid"]
+            self.scores[player_id] = state["score"]
+            self.levels[player_id] = state["level"]
+            self.lines[player_id] = state["lines"]
+            self.pieces[player_id] = {"piece": state["piece"], "next": state["next"], "hold": state["hold"]}
+        if changes:
+            self.mark_state_dirty()
+
+    def mark_state_dirty(self):
+        """게임 상태 변경 표시 (다음 브로드캐스트 주기에 전송)"""
+        self.invalidate_state()
+        self.updates_received += 1
+        broadcast_stats["updates_received"] += 1
+        self.state_dirty.set()
+
+    def get_packed_grid(self, player_id: str) -> bytes:
+        """플레이어 그리드의 PackedBoard 인코딩 (그리드가 바뀔 때만 다시 인코딩)"""
+        grid = self.grids[player_id]
+        cached = self.packed_grids.get(player_id)
+        if cached is None or cached[0] is not grid:
+            cached = (grid, PackedBoard.from_grid(grid).encode())
+            self.packed_grids[player_id] = cached
+        return cached[1]
+
+    def get_state_update_messages(self) -> tuple:
+        """(전체 상태 텍스트, delta 텍스트, 바이너리 프레임) 반환 - 구독자가 없는 형식은 None
+
+        모두 한 번만 인코딩해서 수신자 전원에게 같은 텍스트/바이트를 보낸다.
+        """
+        full_state = self.get_game_state()
+        if self._game_state_text is None:
+            self._game_state_text = encode_message({"type": "game_state_update", "game_state": full_state})
+        full_text = self._game_state_text
+        delta_text = None
+        if self.grid_sync.delta_clients:
+            delta_text = encode_message(self.grid_sync.build_delta(self.grids, full_state))
+        binary_frame = None
+        if self.grid_sync.binary_clients:
+            try:
+                packed = {pid: self.get_packed_grid(pid) for pid in full_state["game_states"]}
+                binary_frame = encode_game_state(self.snapshots_sent, full_state, packed)
+            except ValueError as e:  # 16열/16색을 넘는 보드 - 바이너리 구독자도 JSON 으로 받음
+                logger.warning("⚠️ 바이너리 상태 프레임 인코딩 실패: %s - %s", self.room_id, e)
+        return full_text, delta_text, binary_frame
+
+    def get_broadcast_stats(self) -> dict:
+        return {
+            "room_id": self.room_id,
+            "updates_received": self.updates_received,
+            "snapshots_sent": self.snapshots_sent,
+        }
 
     def get_game_state(self) -> dict:
+        """게임 상태 (invalidate_state 전까지 캐시된 dict 를 반환하므로 수정하지 말 것)"""
+        if self._game_state_cache is not None:
+            return self._game_state_cache
         game_states = {}
         # 클라이언트가 보낸 게임 상태 사용
         for player_id in self.players:
@@ -172,25 +376,37 @@ class Room:
                     'combo': self.combos.get(player_id, 0),
                     'game_over': self.players[player_id].get("game_over", False)
                 }
-        return {
+                if player_id in self.pieces:
+                    game_states[player_id].update(self.pieces[player_id])
+        self._game_state_cache = {
             "players": [{"id": pid, "name": data["name"], "score": self.scores.get(pid, 0), "ready": data["ready"]} 
                        for pid, data in self.players.items()],
             "game_active": self.game_active,
             "game_states": game_states,
-            "targeting_info": self.current_targets  # 타겟팅 정보 추가
+            "targeting_info": dict(self.current_targets)  # 타겟팅 정보 추가
         }
+        return self._game_state_cache
 
 class LobbyManager:
-    def __init__(self):
+    def __init__(self, directory: Optional[RoomDirectory] = None):
         self.rooms: Dict[str, Room] = {}
         self.player_rooms: Dict[str, str] = {}  # player_id -> room_id
+        self.spectating: Dict[str, str] = {}  # client_id -> 관전 중인 room_id
+        self.bots: Dict[str, BotPlayer] = {}  # 방에 참가한 봇 (ConnectionManager 에도 연결로 등록됨)
+        # 샤드 모드: 모든 샤드가 공유하는 방 디렉터리 (room_id 가 겹치지 않게 샤드 번호를 붙임)
+        self.directory = directory
+        self.room_prefix = f"room_s{directory.shard_id}_" if directory else "room_"
+        self.listing = RoomListing({"shard": directory.shard_id, "port": directory.port} if directory else None)
 
-    def create_room(self, room_name: str, host_id: str, host_name: str, max_players: int = 16, item_mode: bool = False) -> Room:
-        room_id = f"room_{random.randint(1000, 9999)}"
+    def create_room(self, room_name: str, host_id: str, host_name: str, max_players: int = 16, item_mode: bool = False,
+                    authoritative: bool = False) -> Room:
+        room_id = f"{self.room_prefix}{random.randint(1000, 9999)}"
         while room_id in self.rooms:
-            room_id = f"room_{random.randint(1000, 9999)}"
+            room_id = f"{self.room_prefix}{random.randint(1000, 9999)}"
         
-        room = Room(room_id, room_name, host_id, max_players, item_mode)
+        self.stop_spectating(host_id)
+        room = Room(room_id, room_name, host_id, max_players, item_mode, authoritative)
+        room.listing = self.listing
         room.add_player(host_id, host_name)
         self.rooms[room_id] = room
         self.player_rooms[host_id] = room_id
@@ -202,20 +418,72 @@ class LobbyManager:
         
         room = self.rooms[room_id]
         if room.add_player(player_id, player_name):
+            self.stop_spectating(player_id)
             self.player_rooms[player_id] = room_id
             return room
         return None
 
+    def add_bot(self, room_id: str, bot: BotPlayer) -> Optional[Room]:
+        room = self.rooms.get(room_id)
+        if room is None or room.game_active or not room.add_player(bot.player_id, bot.name, bot=True):
+            return None
+        self.player_rooms[bot.player_id] = room_id
+        self.bots[bot.player_id] = bot
+        # 봇은 room.clock 을 직접 읽으므로 game_tick 이 필요 없음 (레거시 클라이언트로 세면 60Hz 로 깨어남)
+        room.clock_clients.add(bot.player_id)
+        return room
+
+    def remove_bot(self, bot_id: str):
+        bot = self.bots.pop(bot_id, None)
+        if bot:
+            self.leave_room(bot_id)
+            bot.stop()
+
+    def spectate(self, room_id: str, client_id: str, focus: Optional[str] = None) -> Optional[Room]:
+        """관전 시작 (다른 방에 플레이어로 있으면 불가, 자기 방은 죽은 뒤 관전용)"""
+        room = self.rooms.get(room_id)
+        if room is None or self.player_rooms.get(client_id, room_id) != room_id:
+            return None
+        if client_id not in room.spectators.focus and len(room.spectators) >= MAX_SPECTATORS:
+            return None
+        if self.spectating.get(client_id) != room_id:
+            self.stop_spectating(client_id)
+        room.spectators.add(client_id, focus)
+        self.spectating[client_id] = room_id
+        return room
+
+    def stop_spectating(self, client_id: str):
+        room_id = self.spectating.pop(client_id, None)
+        if room_id in self.rooms:
+            self.rooms[room_id].spectators.remove(client_id)
+
+    def get_spectated_room(self, client_id: str) -> Optional[Room]:
+        room_id = self.spectating.get(client_id)
+        return self.rooms.get(room_id) if room_id else None
+
     def leave_room(self, player_id: str):
+        self.stop_spectating(player_id)
         if player_id in self.player_rooms:
             room_id = self.player_rooms[player_id]
             if room_id in self.rooms:
                 room = self.rooms[room_id]
-                room.remove_player(player_id)
+                for attacker_id, new_target in room.remove_player(player_id).items():
+                    manager.send_encoded((attacker_id,), "target_changed", encode_message({
+                        "type": "target_changed",
+                        "new_target": new_target
+                    }))
+                # 사람이 모두 나가면 남은 봇도 정리 (봇만으로 방이 남지 않게)
+                if room.players and all(pid in self.bots for pid in room.players):
+                    for bot_id in list(room.players):
+                        room.remove_player(bot_id)
+                        self.player_rooms.pop(bot_id, None)
+                        self.bots.pop(bot_id).stop()
                 
                 # Delete room if empty
                 if len(room.players) == 0:
+                    room.reset_game()  # 틱/브로드캐스트 태스크 정리
                     del self.rooms[room_id]
+                    self.listing.remove(room_id)
             
             del self.player_rooms[player_id]
 
@@ -226,64 +494,775 @@ class LobbyManager:
         return None
 
     def get_available_rooms(self) -> List[dict]:
-        return [room.get_room_info() for room in self.rooms.values() 
-                if not room.game_active and len(room.players) < room.max_players]
+        """들어갈 수 있는 방 (캐시된 목록, 샤드 모드면 다른 샤드의 방 포함)"""
+        return self.listing.view(RoomFilter())
 
-lobby_manager = LobbyManager()
+    async def find_shard(self, room_id: str) -> Optional[tuple]:
+        """다른 샤드가 가진 방이면 (shard_id, port), 이 샤드의 방이거나 모르는 방이면 None"""
+        if not self.directory or room_id in self.rooms:
+            return None
+        owner = await asyncio.to_thread(self.directory.lookup, room_id)  # SQLite 조회는 이벤트 루프 밖에서
+        return owner if owner and owner[0] != self.directory.shard_id else None
+
+    def publish(self):
+        """이 샤드의 방 목록을 디렉터리에 기록 (heartbeat 겸용)"""
+        if self.directory:
+            entries = self.listing.entries
+            self.directory.publish([entries[room_id] for room_id in list(self.rooms) if room_id in entries])
+
+    def refresh_remote_rooms(self, rooms: List[dict]):
+        """디렉터리에서 읽은 방 요약으로 다른 샤드의 방 목록 갱신 (로컬 방은 직접 갱신됨)"""
+        self.listing.replace_all({room["room_id"]: room for room in rooms}, keep=self.rooms)
+
+lobby_manager = LobbyManager(open_directory())
+
+
+async def directory_sync_loop():
+    """샤드 모드에서 방 목록/heartbeat 를 주기적으로 디렉터리에 기록 (SQLite 쓰기는 스레드에서)"""
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(lobby_manager.publish)
+                lobby_manager.refresh_remote_rooms(await asyncio.to_thread(lobby_manager.directory.list_rooms))
+            except Exception:
+                logger.exception("❌ 방 디렉터리 기록 실패")
+            await asyncio.sleep(DIRECTORY_SYNC_INTERVAL)
+    except asyncio.CancelledError:
+        pass
+
+
+async def room_list_push_loop():
+    """방 목록이 바뀌면 구독한 로비 클라이언트에게 바뀐 방만 전송 (최대 ROOM_LIST_PUSH_INTERVAL 마다 한 번)"""
+    listing = lobby_manager.listing
+    try:
+        while True:
+            await listing.dirty.wait()
+            for client_id, diff in listing.take_diffs():
+                await manager.send_to_player(client_id, diff)
+            await asyncio.sleep(ROOM_LIST_PUSH_INTERVAL)
+    except asyncio.CancelledError:
+        pass
 
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+        # 연결마다 송신 큐 + writer 태스크 (느린 클라이언트가 다른 플레이어 전송을 막지 않음)
+        self.active_connections: Dict[str, PlayerConnection] = {}
 
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
-        self.active_connections[client_id] = websocket
+        if client_id in self.active_connections:
+            self.active_connections[client_id].stop()
+        self.active_connections[client_id] = PlayerConnection(client_id, websocket)
 
     def disconnect(self, client_id: str):
         if client_id in self.active_connections:
-            del self.active_connections[client_id]
-        lobby_manager.leave_room(client_id)
+            self.active_connections.pop(client_id).stop()
+        lobby_manager.leave_room(client_id)  # 관전도 함께 종료
+        lobby_manager.listing.unsubscribe(client_id)
 
     async def send_to_player(self, player_id: str, message: dict):
+        """송신 큐에 넣고 바로 반환 (실제 전송은 연결별 writer 태스크)"""
         if player_id in self.active_connections:
-            try:
-                await self.active_connections[player_id].send_json(message)
-                if message.get("type") == "receive_attack":
-                    print(f"📤 메시지 전송 성공: {player_id} - {message.get('type')} ({message.get('lines')}줄)")
-            except Exception as e:
-                print(f"❌ 메시지 전송 실패: {player_id} - {e}")
+            self.active_connections[player_id].enqueue(message.get("type"), message)
         else:
-            print(f"❌ 연결 없음: {player_id} not in active_connections")
+            logger.debug("❌ 연결 없음: %s not in active_connections", player_id)
+
+    async def send_bytes_to_player(self, player_id: str, data: bytes):
+        if player_id in self.active_connections:
+            self.active_connections[player_id].enqueue("game_state_update", data)
+
+    def send_encoded(self, player_ids, kind: str, payload):
+        """미리 인코딩된 텍스트/바이트를 여러 플레이어에게 그대로 전송"""
+        for player_id in player_ids:
+            connection = self.active_connections.get(player_id)
+            if connection:
+                connection.enqueue(kind, payload)
 
     async def broadcast_to_room(self, room_id: str, message: dict):
+        """메시지를 한 번만 인코딩해서 방 전체에 전송"""
         if room_id in lobby_manager.rooms:
             room = lobby_manager.rooms[room_id]
-            for player_id in room.players:
-                await self.send_to_player(player_id, message)
+            kind = message.get("type")
+            start = time.perf_counter()
+            payload = encode_message(message)
+            self.send_encoded(room.players, kind, payload)
+            if kind in SPECTATOR_EVENT_TYPES and room.spectators.focus:
+                self.send_encoded([cid for cid in room.spectators.focus if cid not in room.players], kind, payload)
+            metrics.broadcast_seconds.observe(time.perf_counter() - start, kind)
+            metrics.broadcast_fanout.observe(len(room.players), kind)
 
 manager = ConnectionManager()
 
-# 게임 틱 루프 함수
-async def game_tick_loop(room: Room, connection_manager: ConnectionManager):
-    """서버에서 60 FPS로 게임 틱을 전송"""
+def simulate_room(room: Room, tick: int):
+    """서버 권한 모드 방을 현재 틱까지 진행 (ClockScheduler 가 매 틱 호출)"""
+    if room.simulation is None:
+        return
+    newly_dead = room.simulation.step_to(tick)
+    room.apply_simulation_changes()
+    # 공격은 클라이언트 attack 메시지가 아니라 서버 보드에서 지운 줄로 계산
+    for player_id, lines, combo in room.simulation.drain_attacks():
+        target_id = room.targeting.targets.get(player_id)
+        if room.recorder:
+            room.recorder.record_attack(room.replay_tick(), player_id, target_id, lines, combo)
+        queue_attack(room, player_id, lines, combo, target_id, tick)
+    for player_id in newly_dead:
+        asyncio.create_task(handle_player_game_over(room, player_id))
+
+def queue_attack(room: Room, attacker_id: str, lines: int, combo: int, target_id: Optional[str], tick: int):
+    """자기 대기 쓰레기와 먼저 상쇄하고 남은 줄을 대상의 쓰레기 큐에 쌓음 (다음 틱에 전달)"""
+    lines = room.garbage.cancel(attacker_id, lines)
+    if lines <= 0:
+        return
+    # 타겟이 지정되어 있고 유효하면 그 플레이어에게, 없으면 살아 있는 모든 플레이어에게
+    if target_id and target_id in room.players and target_id != attacker_id:
+        targets = [target_id]
+    else:
+        logger.debug("📢 전체 공격 (타겟 없음)")
+        alive = room.targeting.alive if room.game_active else room.players
+        targets = [player_id for player_id in room.players if player_id != attacker_id and player_id in alive]
+    for player_id in targets:
+        room.garbage.add(attacker_id, player_id, lines, combo, tick)
+    if room.clock:
+        clock_scheduler.request_ticks()
+    else:
+        deliver_garbage(room, tick + 1)
+
+def deliver_garbage(room: Room, tick: int):
+    """tick 이전에 쌓인 쓰레기를 대상마다 receive_attack 하나로 전달"""
+    players = room.players
+    simulation = room.simulation
+    applied = False
+    for target_id, batch in room.garbage.flush(tick):
+        if target_id not in players or batch.lines <= 0:
+            continue
+        if simulation is not None:
+            # 서버 권한 모드 - 쓰레기를 서버 보드에 바로 넣음 (receive_attack 은 알림용)
+            applied = True
+            if simulation.add_garbage(target_id, batch.lines):
+                asyncio.create_task(handle_player_game_over(room, target_id))
+        sources = [{"player_id": pid, "name": players.get(pid, {}).get("name", "?"), "lines": lines}
+                   for pid, lines in batch.sources.items()]
+        top = max(sources, key=lambda source: source["lines"])
+        manager.send_encoded((target_id,), "receive_attack", encode_message({
+            "type": "receive_attack",
+            "from_player": top["player_id"],
+            "from_name": ", ".join(source["name"] for source in sources),
+            "lines": batch.lines,
+            "combo": batch.combo,
+            "sources": sources
+        }))
+    if applied:
+        room.apply_simulation_changes()
+
+def tick_room(room: Room, tick: int):
+    """ClockScheduler 가 매 틱 방마다 호출 - 시뮬레이션 진행 + 쓰레기 큐 전달"""
+    simulate_room(room, tick)
+    if room.garbage.incoming:
+        deliver_garbage(room, tick)
+
+# 서버 전체 공용 게임 시계 (방마다 틱 태스크를 돌리지 않음)
+clock_scheduler = ClockScheduler(manager, on_tick=tick_room)
+
+# 게임 상태 브로드캐스트 루프
+async def state_broadcast_loop(room: Room, connection_manager: ConnectionManager):
+    """dirty 표시된 게임 상태를 STATE_BROADCAST_INTERVAL 마다 최대 1번 합쳐서 전송"""
     try:
         while room.game_active:
-            room.tick_count += 1
+            await room.state_dirty.wait()
+            room.state_dirty.clear()
+            try:
+                send_state_update(room, connection_manager)
+            except Exception:
+                # 프레임 하나가 실패해도 (인코딩할 수 없는 보드 등) 방의 브로드캐스트는 계속
+                logger.exception("❌ 상태 브로드캐스트 에러: %s", room.room_id)
+            await asyncio.sleep(STATE_BROADCAST_INTERVAL)
+    except asyncio.CancelledError:
+        logger.debug("🛑 상태 브로드캐스트 루프 종료: %s", room.room_id)
+    except Exception:
+        logger.exception("❌ 상태 브로드캐스트 루프 에러: %s", room.room_id)
+
+def send_state_update(room: Room, connection_manager: ConnectionManager):
+    """game_state_update 한 번 - 형식마다 한 번만 인코딩해서 플레이어에게 전송"""
+    start = time.perf_counter()
+    room.snapshots_sent += 1
+    broadcast_stats["snapshots_sent"] += 1
+    full_text, delta_text, binary_frame = room.get_state_update_messages()
+    binary_clients = room.grid_sync.binary_clients
+    delta_clients = room.grid_sync.delta_clients
+    spectating = room.spectators.focus
+    for player_id in room.players:
+        if player_id in spectating:
+            continue  # 죽은 뒤 관전 중이면 spectator_loop 의 관전 스트림만 받음
+        kind = "game_state_update"
+        if binary_frame and player_id in binary_clients:
+            payload = binary_frame
+        elif delta_text and player_id in delta_clients:
+            kind, payload = "game_state_delta", delta_text  # 델타는 송신 큐에서 합치지 않음
+        else:
+            payload = full_text
+        connection_manager.send_encoded((player_id,), kind, payload)
+    metrics.broadcast_seconds.observe(time.perf_counter() - start, "game_state_update")
+    metrics.broadcast_fanout.observe(len(room.players), "game_state_update")
+
+async def spectator_loop(room: Room):
+    """관전 스트림 - focus 는 상태가 바뀌면 최대 SPECTATOR_FOCUS_HZ, 썸네일은 최대 SPECTATOR_THUMBNAIL_HZ
+
+    관전자가 없어지면 끝나고, 방이 없어지면 남은 관전자에게 spectate_ended 를 보내고 끝난다.
+    """
+    feed = room.spectators
+    focus_interval = 1.0 / SPECTATOR_FOCUS_HZ
+    thumbnail_interval = 1.0 / SPECTATOR_THUMBNAIL_HZ
+    focus_state = thumbnail_state = None
+    last_thumbnails = 0.0
+    try:
+        while feed.focus and lobby_manager.rooms.get(room.room_id) is room:
+            if room.game_active:
+                state = room.get_game_state()  # 상태가 바뀌면 새 dict (invalidate_state)
+                now = time.monotonic()
+                thumbnails = state is not thumbnail_state and now - last_thumbnails >= thumbnail_interval
+                if feed.resync or thumbnails or state is not focus_state:
+                    start = time.perf_counter()
+                    for recipients, kind, payload in feed.build_frames(state, thumbnails):
+                        manager.send_encoded(recipients, kind, payload)
+                    metrics.broadcast_seconds.observe(time.perf_counter() - start, "spectator")
+                    metrics.broadcast_fanout.observe(len(feed), "spectator")
+                    focus_state = state
+                    if thumbnails:
+                        thumbnail_state, last_thumbnails = state, now
+            await asyncio.sleep(focus_interval)
+    except asyncio.CancelledError:
+        return
+    except Exception:
+        logger.exception("❌ 관전 루프 에러: %s", room.room_id)
+    if room.room_id not in lobby_manager.rooms:
+        ended = [client_id for client_id in feed.focus if lobby_manager.spectating.get(client_id) == room.room_id]
+        for client_id in ended:
+            del lobby_manager.spectating[client_id]
+            feed.remove(client_id)
+        manager.send_encoded(ended, "spectate_ended", encode_message({"type": "spectate_ended", "room_id": room.room_id}))
+    feed.task = None
+
+# 플레이어 게임 오버 처리 (클라이언트 game_over 메시지 / 서버 시뮬레이션 공용)
+async def handle_player_game_over(room: Room, client_id: str):
+    if not room.game_active or client_id not in room.players or room.players[client_id].get("game_over"):
+        return
+    # 플레이어를 게임 오버 상태로 표시
+    room.players[client_id]["game_over"] = True
+    room.garbage.remove(client_id)
+    if room.recorder:
+        room.recorder.record_game_over(room.replay_tick(), client_id)
+    room.invalidate_state()
+
+    # 죽은 플레이어의 타겟을 지우고, 죽은 플레이어를 노리던 사람들에게만 새 타겟 재할당
+    for player_id in room.targeting.remove(client_id):
+        if player_id in room.players:
+            new_target = room.get_best_target_for_player(player_id)
+            room.targeting.set_target(player_id, new_target)
+            room.invalidate_state()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🔄 타겟 재할당: %s -> %s", room.players[player_id]['name'],
+                             room.players.get(new_target, {}).get('name', 'None') if new_target else 'None')
+            # 타겟 변경 알림
+            await manager.send_to_player(player_id, {
+                "type": "target_changed",
+                "new_target": new_target
+            })
+    room.record_targets()
+
+    # 모든 플레이어에게 알림
+    await manager.broadcast_to_room(room.room_id, {
+        "type": "player_game_over",
+        "player_id": client_id,
+        "player_name": room.players[client_id]["name"]
+    })
+
+    # 살아있는 플레이어 확인
+    alive_players = room.get_alive_players()
+
+    if len(alive_players) == 1:
+        # 1명 남음 - 승리!
+        winner_id = alive_players[0]
+        winner_name = room.players[winner_id]["name"]
+        winner_score = room.games[winner_id].score if winner_id in room.games else 0
+
+        game_end = {
+            "type": "game_end",
+            "winner_id": winner_id,
+            "winner_name": winner_name,
+            "winner_score": winner_score,
+            "reason": "last_survivor"
+        }
+        await manager.broadcast_to_room(room.room_id, game_end)
+
+        # 게임 종료 및 초기화
+        room.reset_game(game_end)
+
+        # 방 상태 업데이트 전송
+        await manager.broadcast_to_room(room.room_id, {
+            "type": "room_update",
+            "room": room.get_room_info()
+        })
+
+    elif len(alive_players) == 0:
+        # 모두 죽음 - 무승부
+        game_end = {
+            "type": "game_end",
+            "winner_id": None,
+            "winner_name": None,
+            "winner_score": 0,
+            "reason": "all_dead"
+        }
+        await manager.broadcast_to_room(room.room_id, game_end)
+
+        # 게임 종료 및 초기화
+        room.reset_game(game_end)
+
+        # 방 상태 업데이트 전송
+        await manager.broadcast_to_room(room.room_id, {
+            "type": "room_update",
+            "room": room.get_room_info()
+        })
+
+def record_message(client_id: str, message_type: str, message: ClientMessage):
+    """처리된 게임 메시지를 리플레이에 기록 (router observer)"""
+    room = lobby_manager.get_room_by_player(client_id)
+    recorder = room.recorder if room else None
+    if recorder is None:
+        return
+    tick = room.replay_tick()
+    if message_type == "update_grid":
+        grid = room.grids.get(client_id)
+        if grid is not None and not room.authoritative:
+            recorder.record_grid(tick, client_id, grid)
+            recorder.record_stats(tick, client_id, message.score, message.level, message.lines, message.combo)
+    elif message_type == "input":
+        actions = message.inputs if message.inputs is not None else [(message.tick, message.action)]
+        for _, action in actions:
+            recorder.record_input(tick, client_id, action)
+    elif message_type == "attack" and not room.authoritative:  # 서버 권한 모드는 simulate_room 이 기록
+        recorder.record_attack(tick, client_id, message.target_id, message.lines, message.combo)
+    elif message_type == "switch_target":
+        room.record_targets()
+    elif message_type in ("item_attack", "grid_swap", "send_grid"):
+        recorder.record_item(tick, client_id, {"type": message_type, "target_id": message.target_id,
+                                               "item_type": getattr(message, "item_type", None)})
+
+# 클라이언트 메시지 핸들러 (type -> 핸들러 디스패치 테이블)
+router = MessageRouter()
+router.add_timing_hook(lambda message_type, seconds: metrics.handler_seconds.observe(seconds, message_type))
+router.add_observer(record_message)
+
+@router.route("list_rooms", ListRoomsMessage)
+async def handle_list_rooms(client_id: str, message: ListRoomsMessage):
+    # Send list of available rooms (캐시된 목록, subscribe 면 이후 변경은 room_list_diff 로 push)
+    listing = lobby_manager.listing
+    room_filter = RoomFilter(message.item_mode, message.min_free_slots)
+    if message.subscribe:
+        rooms = listing.subscribe(client_id, room_filter)
+        total, offset = len(rooms), 0
+    else:
+        rooms, total = listing.page(room_filter, message.offset, message.limit)
+        offset = message.offset
+    await manager.send_to_player(client_id, {
+        "type": "room_list",
+        "rooms": rooms,
+        "total": total,
+        "offset": offset,
+        "version": listing.version
+    })
+
+@router.route("unsubscribe_rooms")
+async def handle_unsubscribe_rooms(client_id: str, message: ClientMessage):
+    lobby_manager.listing.unsubscribe(client_id)
+
+@router.route("create_room", CreateRoomMessage)
+async def handle_create_room(client_id: str, message: CreateRoomMessage):
+    # Create a new room
+    room = lobby_manager.create_room(
+        message.room_name,
+        client_id,
+        message.player_name,
+        message.max_players,
+        message.item_mode,
+        message.authoritative
+    )
+    lobby_manager.listing.unsubscribe(client_id)  # 방 안에서는 로비 목록 push 불필요
+    if lobby_manager.directory:
+        # 다른 샤드에서 바로 찾을 수 있도록 주기를 기다리지 않고 기록
+        await asyncio.to_thread(lobby_manager.publish)
+    await manager.send_to_player(client_id, {
+        "type": "room_joined",
+        "room": room.get_room_info()
+    })
+    await manager.broadcast_to_room(room.room_id, {
+        "type": "room_update",
+        "room": room.get_room_info()
+    })
+
+@router.route("join_room", JoinRoomMessage)
+async def handle_join_room(client_id: str, message: JoinRoomMessage):
+    owner = await lobby_manager.find_shard(message.room_id)
+    if owner:
+        # 방이 다른 샤드에 있음 - 클라이언트가 그 샤드로 다시 연결해서 같은 요청을 보냄
+        shard_id, port = owner
+        await manager.send_to_player(client_id, {
+            "type": "shard_redirect",
+            "shard": shard_id,
+            "port": port,
+            "retry": message.model_dump(include={"room_id", "player_name"}) | {"type": "join_room"}
+        })
+        return
+    # Join an existing room
+    room = lobby_manager.join_room(
+        message.room_id,
+        client_id,
+        message.player_name
+    )
+    if room:
+        lobby_manager.listing.unsubscribe(client_id)
+        await manager.send_to_player(client_id, {
+            "type": "room_joined",
+            "room": room.get_room_info()
+        })
+        await manager.broadcast_to_room(room.room_id, {
+            "type": "room_update",
+            "room": room.get_room_info()
+        })
+    else:
+        await manager.send_to_player(client_id, {
+            "type": "error",
+            "message": "Failed to join room"
+        })
+
+@router.route("leave_room")
+async def handle_leave_room(client_id: str, message: ClientMessage):
+    # Leave current room
+    room = lobby_manager.get_room_by_player(client_id)
+    if room:
+        room_id = room.room_id
+        lobby_manager.leave_room(client_id)
+        await manager.send_to_player(client_id, {
+            "type": "room_left"
+        })
+        if room_id in lobby_manager.rooms:
+            await manager.broadcast_to_room(room_id, {
+                "type": "room_update",
+                "room": lobby_manager.rooms[room_id].get_room_info()
+            })
+
+@router.route("add_bot", AddBotMessage)
+async def handle_add_bot(client_id: str, message: AddBotMessage):
+    # 방장이 빈 자리를 봇으로 채움 (연습 게임 등) - 봇은 사람과 같은 경로로 참가하고 스스로 준비
+    room = lobby_manager.get_room_by_player(client_id)
+    if not room or room.host_id != client_id or room.game_active:
+        return
+    pps = min(message.pps or BOT_DEFAULT_PPS, BOT_MAX_PPS)
+    for _ in range(message.count):
+        bot_id = f"bot_{random.randint(100000, 999999)}"
+        while bot_id in manager.active_connections:
+            bot_id = f"bot_{random.randint(100000, 999999)}"
+        bot = BotPlayer(bot_id, f"🤖 Bot {bot_id[-3:]} ({pps:g} pps)", pps, router.dispatch,
+                        lambda bot_id=bot_id: lobby_manager.get_room_by_player(bot_id),
+                        lambda bot_id: manager.active_connections.pop(bot_id, None),
+                        # 배치 탐색은 워커 프로세스에서 (블록 하나 놓는 시간 안에 끝나야 함)
+                        (lambda state, room=room: worker_pool.submit(plan_state, state, group=room.jobs,
+                                                                     timeout=1.0 / pps))
+                        if WORKER_PROCESSES > 0 else None)
+        if not lobby_manager.add_bot(room.room_id, bot):
+            break  # 방이 가득 참
+        manager.active_connections[bot_id] = bot
+    await manager.broadcast_to_room(room.room_id, {
+        "type": "room_update",
+        "room": room.get_room_info()
+    })
+
+@router.route("remove_bot", RemoveBotMessage)
+async def handle_remove_bot(client_id: str, message: RemoveBotMessage):
+    room = lobby_manager.get_room_by_player(client_id)
+    if room and room.host_id == client_id and message.player_id in lobby_manager.bots \
+            and message.player_id in room.players:
+        lobby_manager.remove_bot(message.player_id)
+        await manager.broadcast_to_room(room.room_id, {
+            "type": "room_update",
+            "room": room.get_room_info()
+        })
+
+@router.route("spectate_room", SpectateRoomMessage)
+async def handle_spectate_room(client_id: str, message: SpectateRoomMessage):
+    owner = await lobby_manager.find_shard(message.room_id)
+    if owner:
+        shard_id, port = owner
+        await manager.send_to_player(client_id, {
+            "type": "shard_redirect",
+            "shard": shard_id,
+            "port": port,
+            "retry": message.model_dump(include={"room_id", "focus"}) | {"type": "spectate_room"}
+        })
+        return
+    # 관전은 플레이어 자리를 쓰지 않음 (MAX_SPECTATORS 까지)
+    room = lobby_manager.spectate(message.room_id, client_id, message.focus)
+    if room is None:
+        await manager.send_to_player(client_id, {
+            "type": "error",
+            "message": "Failed to spectate room"
+        })
+        return
+    lobby_manager.listing.unsubscribe(client_id)
+    if room.spectators.task is None:
+        room.spectators.task = asyncio.create_task(spectator_loop(room))
+    await manager.send_to_player(client_id, {
+        "type": "spectate_joined",
+        "room": room.get_room_info(),
+        "focus": message.focus,
+        "focus_hz": SPECTATOR_FOCUS_HZ,
+        "thumbnail_hz": SPECTATOR_THUMBNAIL_HZ
+    })
+
+@router.route("spectate_focus", SpectateFocusMessage)
+async def handle_spectate_focus(client_id: str, message: SpectateFocusMessage):
+    room = lobby_manager.get_spectated_room(client_id)
+    if room:
+        room.spectators.set_focus(client_id, message.player_id)
+
+@router.route("spectate_resync")
+async def handle_spectate_resync(client_id: str, message: ClientMessage):
+    # seq 가 맞지 않는 관전자 - 다음 프레임에 focus/썸네일 키프레임
+    room = lobby_manager.get_spectated_room(client_id)
+    if room:
+        room.spectators.request_keyframe(client_id)
+
+@router.route("stop_spectating")
+async def handle_stop_spectating(client_id: str, message: ClientMessage):
+    lobby_manager.stop_spectating(client_id)
+    await manager.send_to_player(client_id, {
+        "type": "spectate_ended"
+    })
+
+@router.route("ready", ReadyMessage)
+async def handle_ready(client_id: str, message: ReadyMessage):
+    # Toggle ready status (게임 시작은 start_game 메시지에서만)
+    room = lobby_manager.get_room_by_player(client_id)
+    if room:
+        room.set_ready(client_id, message.ready)
+        
+        # 방 상태 업데이트만 브로드캐스트 (자동 시작 제거)
+        await manager.broadcast_to_room(room.room_id, {
+            "type": "room_update",
+            "room": room.get_room_info()
+        })
+
+@router.route("start_game")
+async def handle_start_game(client_id: str, message: ClientMessage):
+    # 방장이 게임 시작 (모두 준비되어야 함)
+    room = lobby_manager.get_room_by_player(client_id)
+    if room and room.host_id == client_id:  # 방장만 게임 시작 가능
+        if room.all_players_ready():
+            room.start_game()
+            # 서버 게임 시계 시작 (clock 정보로 클라이언트가 틱을 직접 계산)
+            clock_scheduler.add_room(room)
+            # 각 플레이어에게 개별적으로 타겟 정보 전송
+            for player_id in room.players:
+                await manager.send_to_player(player_id, {
+                    "type": "game_start",
+                    "game_state": room.get_game_state(),
+                    "item_mode": room.item_mode,
+                    "initial_target": room.current_targets.get(player_id),
+                    "clock": room.clock.handshake()
+                })
+            
+            room.state_broadcast_task = asyncio.create_task(state_broadcast_loop(room, manager))
+            logger.info("🎮 게임 시작: %s (방장: %s)", room.room_name, room.players[client_id]['name'])
+        else:
+            # 모두 준비되지 않았으면 에러 메시지
+            await manager.send_to_player(client_id, {
+                "type": "error",
+                "message": "모든 플레이어가 준비되지 않았습니다."
+            })
+
+@router.route("update_grid", UpdateGridMessage)
+async def handle_update_grid(client_id: str, message: UpdateGridMessage):
+    # Update player's game state (클라이언트가 보낸 게임 상태 저장)
+    room = lobby_manager.get_room_by_player(client_id)
+    if room and room.game_active and not room.authoritative:
+        # grid(전체) 또는 rows(바뀐 줄) + base_seq 를 받음
+        if not room.grid_sync.receive(room.grids, client_id, message):
+            await manager.send_to_player(client_id, {
+                "type": "grid_resync"
+            })
+            return
+        room.scores[client_id] = message.score
+        room.levels[client_id] = message.level
+        room.lines[client_id] = message.lines
+        room.combos[client_id] = message.combo
+        
+        # 브로드캐스트는 state_broadcast_loop 에서 모아서 전송
+        room.mark_state_dirty()
+
+@router.route("sync_mode", SyncModeMessage)
+async def handle_sync_mode(client_id: str, message: SyncModeMessage):
+    # game_state_update 를 줄 단위 delta / 바이너리 프레임으로 받을지 설정
+    room = lobby_manager.get_room_by_player(client_id)
+    if room:
+        room.grid_sync.set_mode(client_id, message.delta, message.binary)
+        # clock: true 면 game_tick 대신 clock_sync 로 틱을 직접 계산
+        if message.clock:
+            room.clock_clients.add(client_id)
+        else:
+            room.clock_clients.discard(client_id)
+
+@router.route("clock_sync_request", ClockSyncRequestMessage)
+async def handle_clock_sync_request(client_id: str, message: ClockSyncRequestMessage):
+    # 시계 동기화 핸드셰이크 (client_time 을 돌려줘서 왕복 시간 보정)
+    room = lobby_manager.get_room_by_player(client_id)
+    if room and room.clock:
+        await manager.send_to_player(client_id, room.clock.sync_message(message.client_time))
+
+@router.route("resync_request")
+async def handle_resync_request(client_id: str, message: ClientMessage):
+    # delta 기준 seq 가 어긋난 클라이언트에게 키프레임 전송
+    room = lobby_manager.get_room_by_player(client_id)
+    if room and room.game_active:
+        # 델타와 같은 종류로 보내야 송신 큐에서 앞뒤 델타와 순서가 유지됨
+        manager.send_encoded((client_id,), "game_state_delta",
+                             encode_message(room.grid_sync.build_keyframe(room.get_game_state())))
+
+@router.route("input", InputMessage)
+async def handle_input(client_id: str, message: InputMessage):
+    # 서버 권한 모드 입력: {"tick", "action"} 하나 또는 "inputs": [[tick, action], ...]
+    room = lobby_manager.get_room_by_player(client_id)
+    if room and room.simulation:
+        inputs = message.inputs or [(message.tick, message.action)]
+        for tick, action in inputs:
+            room.simulation.queue_input(client_id, tick, action)
+
+@router.route("attack", AttackMessage)
+async def handle_attack(client_id: str, message: AttackMessage):
+    # Player sends attack to target (타겟팅 시스템)
+    room = lobby_manager.get_room_by_player(client_id)
+    if room:
+        attack_lines = message.lines
+        combo = message.combo
+        target_id = message.target_id
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            target_name = room.players.get(target_id, {}).get('name', 'Unknown') if target_id else 'All'
+            logger.debug("⚔️ 공격 메시지 수신: %s → %s줄 (콤보 %sx) → 타겟: %s (ID: %s)",
+                         room.players[client_id]['name'], attack_lines, combo, target_name, target_id)
+        
+        if room.simulation:
+            return  # 서버 권한 모드는 서버 보드에서 공격을 계산하므로 클라이언트가 보낸 줄 수는 무시
+        queue_attack(room, client_id, attack_lines, combo, target_id,
+                     room.clock.current_tick() if room.clock else 0)
+    else:
+        logger.debug("❌ room not found for player %s", client_id)
+
+@router.route("switch_target")
+async def handle_switch_target(client_id: str, message: ClientMessage):
+    # Player wants to switch target (Tab key)
+    room = lobby_manager.get_room_by_player(client_id)
+    if room and room.game_active:
+        new_target = room.get_best_target_for_player(client_id)
+        room.targeting.set_target(client_id, new_target)
+        room.invalidate_state()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔄 타겟 전환: %s -> %s", room.players[client_id]['name'],
+                         room.players.get(new_target, {}).get('name', 'None') if new_target else 'None')
+        await manager.send_to_player(client_id, {
+            "type": "target_changed",
+            "new_target": new_target
+        })
+
+@router.route("item_attack", ItemAttackMessage)
+async def handle_item_attack(client_id: str, message: ItemAttackMessage):
+    # Player sends item attack to target
+    room = lobby_manager.get_room_by_player(client_id)
+    if room:
+        target_id = message.target_id
+        item_type = message.item_type
+        
+        # 아이템 정화 - 모든 상대방에게
+        if item_type == "item_to_clear":
+            for player_id in room.players:
+                if player_id != client_id:
+                    await manager.send_to_player(player_id, {
+                        "type": "item_change",
+                        "from_player": client_id,
+                        "from_name": room.players[client_id]["name"],
+                        "change_type": "to_clear"
+                    })
+        
+        # 타겟 변경 - 특정 타겟
+        elif item_type == "redirect_target":
+            if target_id and target_id in room.players and target_id != client_id:
+                # 타겟 리스트에서 랜덤 선택 (자신과 현재 타겟 제외)
+                available_targets = [pid for pid in room.players.keys() 
+                                   if pid != target_id and pid != client_id]
+                if available_targets:
+                    new_target = random.choice(available_targets)
+                    await manager.send_to_player(target_id, {
+                        "type": "target_redirect",
+                        "from_player": client_id,
+                        "from_name": room.players[client_id]["name"],
+                        "new_target": new_target
+                    })
+        
+        # 일반 공격 아이템
+        elif target_id and target_id in room.players and target_id != client_id:
+            await manager.send_to_player(target_id, {
+                "type": "item_attack",
+                "from_player": client_id,
+                "from_name": room.players[client_id]["name"],
+                "item_type": item_type
+            })
+
+@router.route("grid_swap", GridSwapMessage)
+async def handle_grid_swap(client_id: str, message: GridSwapMessage):
+    # Player swaps grid with target
+    room = lobby_manager.get_room_by_player(client_id)
+    if room:
+        target_id = message.target_id
+        my_grid = message.my_grid
+        
+        if target_id and target_id in room.players and target_id != client_id:
+            # 타겟에게 내 그리드 전송 (타겟은 이걸 받음)
+            await manager.send_to_player(target_id, {
+                "type": "grid_swap",
+                "from_player": client_id,
+                "from_name": room.players[client_id]["name"],
+                "grid": my_grid
+            })
             
-            # 모든 플레이어에게 틱 신호 전송
-            await connection_manager.broadcast_to_room(room.room_id, {
-                "type": "game_tick",
-                "tick": room.tick_count,
-                "timestamp": datetime.now().timestamp()
+            # 타겟에게 그리드 요청 메시지 전송
+            await manager.send_to_player(target_id, {
+                "type": "request_grid",
+                "requester_id": client_id
             })
             
-            # 60 FPS = 16.67ms per frame
-            await asyncio.sleep(0.0167)
-    except asyncio.CancelledError:
-        print(f"🛑 게임 틱 루프 종료: {room.room_id}")
-    except Exception as e:
-        print(f"❌ 게임 틱 루프 에러: {e}")
+            logger.debug("🔀 그리드 교환: %s ↔ %s", client_id, target_id)
+
+@router.route("send_grid", GridSwapMessage)
+async def handle_send_grid(client_id: str, message: GridSwapMessage):
+    # 그리드 응답 (맵 교환 완료)
+    room = lobby_manager.get_room_by_player(client_id)
+    if room:
+        target_id = message.target_id
+        
+        if target_id and target_id in room.players:
+            await manager.send_to_player(target_id, {
+                "type": "grid_swap",
+                "from_player": client_id,
+                "from_name": room.players[client_id]["name"],
+                "grid": message.my_grid
+            })
+            logger.debug("✅ 그리드 응답: %s → %s", client_id, target_id)
+
+@router.route("game_over")
+async def handle_game_over(client_id: str, message: ClientMessage):
+    # Player lost
+    room = lobby_manager.get_room_by_player(client_id)
+    if room and room.game_active:
+        await handle_player_game_over(room, client_id)
 
 # WebSocket endpoint
 @app.websocket("/ws/{client_id}")
@@ -291,333 +1270,21 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await manager.connect(websocket, client_id)
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            if message["type"] == "list_rooms":
-                # Send list of available rooms
-                rooms = lobby_manager.get_available_rooms()
-                await manager.send_to_player(client_id, {
-                    "type": "room_list",
-                    "rooms": rooms
-                })
-                
-            elif message["type"] == "create_room":
-                # Create a new room
-                room = lobby_manager.create_room(
-                    message["room_name"],
-                    client_id,
-                    message["player_name"],
-                    message.get("max_players", 16),
-                    message.get("item_mode", False)
-                )
-                await manager.send_to_player(client_id, {
-                    "type": "room_joined",
-                    "room": room.get_room_info()
-                })
-                await manager.broadcast_to_room(room.room_id, {
-                    "type": "room_update",
-                    "room": room.get_room_info()
-                })
-                
-            elif message["type"] == "join_room":
-                # Join an existing room
-                room = lobby_manager.join_room(
-                    message["room_id"],
-                    client_id,
-                    message["player_name"]
-                )
-                if room:
-                    await manager.send_to_player(client_id, {
-                        "type": "room_joined",
-                        "room": room.get_room_info()
-                    })
-                    await manager.broadcast_to_room(room.room_id, {
-                        "type": "room_update",
-                        "room": room.get_room_info()
-                    })
-                else:
-                    await manager.send_to_player(client_id, {
-                        "type": "error",
-                        "message": "Failed to join room"
-                    })
-                    
-            elif message["type"] == "leave_room":
-                # Leave current room
-                room = lobby_manager.get_room_by_player(client_id)
-                if room:
-                    room_id = room.room_id
-                    lobby_manager.leave_room(client_id)
-                    await manager.send_to_player(client_id, {
-                        "type": "room_left"
-                    })
-                    if room_id in lobby_manager.rooms:
-                        await manager.broadcast_to_room(room_id, {
-                            "type": "room_update",
-                            "room": lobby_manager.rooms[room_id].get_room_info()
-                        })
-                
-            elif message["type"] == "ready":
-                # Toggle ready status (게임 시작은 start_game 메시지에서만)
-                room = lobby_manager.get_room_by_player(client_id)
-                if room:
-                    room.set_ready(client_id, message["ready"])
-                    
-                    # 방 상태 업데이트만 브로드캐스트 (자동 시작 제거)
-                    await manager.broadcast_to_room(room.room_id, {
-                        "type": "room_update",
-                        "room": room.get_room_info()
-                    })
-            
-            elif message["type"] == "start_game":
-                # 방장이 게임 시작 (모두 준비되어야 함)
-                room = lobby_manager.get_room_by_player(client_id)
-                if room and room.host_id == client_id:  # 방장만 게임 시작 가능
-                    if room.all_players_ready():
-                        room.start_game()
-                        # 각 플레이어에게 개별적으로 타겟 정보 전송
-                        for player_id in room.players:
-                            await manager.send_to_player(player_id, {
-                                "type": "game_start",
-                                "game_state": room.get_game_state(),
-                                "item_mode": room.item_mode,
-                                "initial_target": room.current_targets.get(player_id)
-                            })
-                        
-                        # 서버 게임 틱 시작
-                        room.game_tick_task = asyncio.create_task(game_tick_loop(room, manager))
-                        print(f"🎮 게임 시작: {room.room_name} (방장: {room.players[client_id]['name']})")
-                    else:
-                        # 모두 준비되지 않았으면 에러 메시지
-                        await manager.send_to_player(client_id, {
-                            "type": "error",
-                            "message": "모든 플레이어가 준비되지 않았습니다."
-                        })
-                
-            elif message["type"] == "update_grid":
-                # Update player's game state (클라이언트가 보낸 게임 상태 저장)
-                room = lobby_manager.get_room_by_player(client_id)
-                if room and room.game_active:
-                    room.grids[client_id] = message.get("grid", [])
-                    room.scores[client_id] = message.get("score", 0)
-                    room.levels[client_id] = message.get("level", 1)
-                    room.lines[client_id] = message.get("lines", 0)
-                    room.combos[client_id] = message.get("combo", 0)
-                    
-                    # 모든 플레이어에게 게임 상태 브로드캐스트
-                    await manager.broadcast_to_room(room.room_id, {
-                        "type": "game_state_update",
-                        "game_state": room.get_game_state()
-                    })
-                    
-            elif message["type"] == "attack":
-                # Player sends attack to target (타겟팅 시스템)
-                room = lobby_manager.get_room_by_player(client_id)
-                if room:
-                    attack_lines = message["lines"]
-                    combo = message.get("combo", 0)
-                    target_id = message.get("target_id")
-                    
-                    attacker_name = room.players[client_id]['name']
-                    target_name = room.players.get(target_id, {}).get('name', 'Unknown') if target_id else 'All'
-                    print(f"⚔️ 공격 메시지 수신: {attacker_name} → {attack_lines}줄 (콤보 {combo}x) → 타겟: {target_name} (ID: {target_id})")
-                    
-                    # 타겟이 지정되어 있고 유효한 경우
-                    if target_id and target_id in room.players and target_id != client_id:
-                        print(f"🎯 타겟 공격: {target_id} ({room.players[target_id]['name']})")
-                        await manager.send_to_player(target_id, {
-                            "type": "receive_attack",
-                            "from_player": client_id,
-                            "from_name": room.players[client_id]["name"],
-                            "lines": attack_lines,
-                            "combo": combo
-                        })
-                        print(f"✅ 공격 메시지 전송 완료 → {target_id}")
-                    # 타겟이 없으면 모든 플레이어에게 (기존 방식)
-                    else:
-                        print(f"📢 전체 공격 (타겟 없음)")
-                        for player_id in room.players:
-                            if player_id != client_id:
-                                print(f"  → {player_id} ({room.players[player_id]['name']})")
-                                await manager.send_to_player(player_id, {
-                                    "type": "receive_attack",
-                                    "from_player": client_id,
-                                    "from_name": room.players[client_id]["name"],
-                                    "lines": attack_lines,
-                                    "combo": combo
-                                })
-                        print(f"✅ 전체 공격 메시지 전송 완료")
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            try:
+                if frame.get("bytes") is not None:
+                    # 바이너리 프레임은 PackedBoard 로 인코딩된 update_grid
+                    message = decode_update_grid(frame["bytes"])
                 else:
-                    print(f"❌ room not found for player {client_id}")
-            
-            elif message["type"] == "switch_target":
-                # Player wants to switch target (Tab key)
-                room = lobby_manager.get_room_by_player(client_id)
-                if room and room.game_active:
-                    new_target = room.get_best_target_for_player(client_id)
-                    room.current_targets[client_id] = new_target
-                    print(f"🔄 타겟 전환: {room.players[client_id]['name']} -> {room.players.get(new_target, {}).get('name', 'None') if new_target else 'None'}")
-                    await manager.send_to_player(client_id, {
-                        "type": "target_changed",
-                        "new_target": new_target
-                    })
-                    
-            elif message["type"] == "item_attack":
-                # Player sends item attack to target
-                room = lobby_manager.get_room_by_player(client_id)
-                if room:
-                    target_id = message.get("target_id")
-                    item_type = message.get("item_type")
-                    
-                    # 아이템 정화 - 모든 상대방에게
-                    if item_type == "item_to_clear":
-                        for player_id in room.players:
-                            if player_id != client_id:
-                                await manager.send_to_player(player_id, {
-                                    "type": "item_change",
-                                    "from_player": client_id,
-                                    "from_name": room.players[client_id]["name"],
-                                    "change_type": "to_clear"
-                                })
-                    
-                    # 타겟 변경 - 특정 타겟
-                    elif item_type == "redirect_target":
-                        if target_id and target_id in room.players and target_id != client_id:
-                            # 타겟 리스트에서 랜덤 선택 (자신과 현재 타겟 제외)
-                            available_targets = [pid for pid in room.players.keys() 
-                                               if pid != target_id and pid != client_id]
-                            if available_targets:
-                                new_target = random.choice(available_targets)
-                                await manager.send_to_player(target_id, {
-                                    "type": "target_redirect",
-                                    "from_player": client_id,
-                                    "from_name": room.players[client_id]["name"],
-                                    "new_target": new_target
-                                })
-                    
-                    # 일반 공격 아이템
-                    elif target_id and target_id in room.players and target_id != client_id:
-                        await manager.send_to_player(target_id, {
-                            "type": "item_attack",
-                            "from_player": client_id,
-                            "from_name": room.players[client_id]["name"],
-                            "item_type": item_type
-                        })
-            
-            elif message["type"] == "grid_swap":
-                # Player swaps grid with target
-                room = lobby_manager.get_room_by_player(client_id)
-                if room:
-                    target_id = message.get("target_id")
-                    my_grid = message.get("my_grid")
-                    
-                    if target_id and target_id in room.players and target_id != client_id:
-                        # 타겟에게 내 그리드 전송 (타겟은 이걸 받음)
-                        await manager.send_to_player(target_id, {
-                            "type": "grid_swap",
-                            "from_player": client_id,
-                            "from_name": room.players[client_id]["name"],
-                            "grid": my_grid
-                        })
-                        
-                        # 타겟에게 그리드 요청 메시지 전송
-                        await manager.send_to_player(target_id, {
-                            "type": "request_grid",
-                            "requester_id": client_id
-                        })
-                        
-                        print(f"🔀 그리드 교환: {room.players[client_id]['name']} ↔ {room.players[target_id]['name']}")
-            
-            elif message["type"] == "send_grid":
-                # 그리드 응답 (맵 교환 완료)
-                room = lobby_manager.get_room_by_player(client_id)
-                if room:
-                    target_id = message.get("target_id")
-                    my_grid = message.get("my_grid")
-                    
-                    if target_id and target_id in room.players:
-                        await manager.send_to_player(target_id, {
-                            "type": "grid_swap",
-                            "from_player": client_id,
-                            "from_name": room.players[client_id]["name"],
-                            "grid": my_grid
-                        })
-                        print(f"✅ 그리드 응답: {room.players[client_id]['name']} → {room.players[target_id]['name']}")
-                        
-            elif message["type"] == "game_over":
-                # Player lost
-                room = lobby_manager.get_room_by_player(client_id)
-                if room and room.game_active:
-                    # 플레이어를 게임 오버 상태로 표시
-                    room.players[client_id]["game_over"] = True
-                    
-                    # 죽은 플레이어의 타겟 제거
-                    if client_id in room.current_targets:
-                        del room.current_targets[client_id]
-                    
-                    # 죽은 플레이어를 타겟으로 하고 있던 사람들에게 새 타겟 재할당
-                    for player_id, target_id in list(room.current_targets.items()):
-                        if target_id == client_id:
-                            new_target = room.get_best_target_for_player(player_id)
-                            room.current_targets[player_id] = new_target
-                            print(f"🔄 타겟 재할당: {room.players[player_id]['name']} -> {room.players.get(new_target, {}).get('name', 'None') if new_target else 'None'}")
-                            # 타겟 변경 알림
-                            await manager.send_to_player(player_id, {
-                                "type": "target_changed",
-                                "new_target": new_target
-                            })
-                    
-                    # 모든 플레이어에게 알림
-                    await manager.broadcast_to_room(room.room_id, {
-                        "type": "player_game_over",
-                        "player_id": client_id,
-                        "player_name": room.players[client_id]["name"]
-                    })
-                    
-                    # 살아있는 플레이어 확인
-                    alive_players = room.get_alive_players()
-                    
-                    if len(alive_players) == 1:
-                        # 1명 남음 - 승리!
-                        winner_id = alive_players[0]
-                        winner_name = room.players[winner_id]["name"]
-                        winner_score = room.games[winner_id].score if winner_id in room.games else 0
-                        
-                        await manager.broadcast_to_room(room.room_id, {
-                            "type": "game_end",
-                            "winner_id": winner_id,
-                            "winner_name": winner_name,
-                            "winner_score": winner_score,
-                            "reason": "last_survivor"
-                        })
-                        
-                        # 게임 종료 및 초기화
-                        room.reset_game()
-                        
-                        # 방 상태 업데이트 전송
-                        await manager.broadcast_to_room(room.room_id, {
-                            "type": "room_update",
-                            "room": room.get_room_info()
-                        })
-                        
-                    elif len(alive_players) == 0:
-                        # 모두 죽음 - 무승부
-                        await manager.broadcast_to_room(room.room_id, {
-                            "type": "game_end",
-                            "winner_id": None,
-                            "winner_name": None,
-                            "winner_score": 0,
-                            "reason": "all_dead"
-                        })
-                        
-                        # 게임 종료 및 초기화
-                        room.reset_game()
-                        
-                        # 방 상태 업데이트 전송
-                        await manager.broadcast_to_room(room.room_id, {
-                            "type": "room_update",
-                            "room": room.get_room_info()
-                        })
+                    message = json.loads(frame["text"])
+            except Exception as e:
+                # 디코딩할 수 없는 프레임(깨진 JSON, 잘린 바이너리 등)은 버리고 연결은 유지
+                messages_rejected.inc("undecodable")
+                logger.debug("❌ 메시지 디코딩 실패: %s - %s", client_id, e)
+                continue
+            await router.dispatch(client_id, message)
                     
     except WebSocketDisconnect:
         manager.disconnect(client_id)
@@ -643,6 +1310,78 @@ static_react_dir.mkdir(exist_ok=True)
 async def api_info():
     return {"message": "Tetris Multiplayer Server"}
 
+@app.get("/api/stats")
+async def api_stats():
+    # 받은 update_grid 수 대비 실제로 보낸 game_state_update 스냅샷 수
+    return {
+        "state_broadcast_hz": STATE_BROADCAST_HZ,
+        "updates_received": broadcast_stats["updates_received"],
+        "snapshots_sent": broadcast_stats["snapshots_sent"],
+        "outbound": outbound_stats,
+        "clock_wakeups": clock_scheduler.wakeups,
+        "rooms": [room.get_broadcast_stats() for room in lobby_manager.rooms.values()]
+    }
+
+def _replay_path(name: str) -> Optional[Path]:
+    path = Path(REPLAY_DIR) / name
+    if not REPLAY_DIR or Path(name).name != name or path.suffix != ".trp" or not path.is_file():
+        return None
+    return path
+
+@app.get("/api/replays")
+async def api_replays():
+    # 기록된 리플레이 파일 목록 (최근 것부터)
+    if not REPLAY_DIR or not os.path.isdir(REPLAY_DIR):
+        return {"replays": []}
+    files = sorted(Path(REPLAY_DIR).glob("*.trp"), key=lambda path: path.stat().st_mtime, reverse=True)
+    return {"replays": [{"name": path.name, "size": path.stat().st_size} for path in files]}
+
+@app.get("/api/replays/{name}")
+async def api_replay(name: str, tick: Optional[int] = None, player: Optional[str] = None):
+    # tick 시점의 방 상태 (player 를 주면 그 플레이어의 보드 포함) - 가장 가까운 키프레임부터 재생
+    path = _replay_path(name)
+    if path is None:
+        return {"error": "Replay not found"}
+    try:
+        return await worker_pool.submit(load_summary, str(path), tick, player, timeout=REPLAY_LOAD_TIMEOUT)
+    except (JobTimeout, QueueFull):
+        return {"error": "Replay is busy, try again"}
+
+# 현재 값은 /metrics 요청 시에만 계산
+metrics.REGISTRY.callback("tetris_active_rooms", "Rooms currently open", lambda: len(lobby_manager.rooms))
+metrics.REGISTRY.callback("tetris_active_games", "Rooms with a game in progress",
+                          lambda: sum(1 for room in lobby_manager.rooms.values() if room.game_active))
+metrics.REGISTRY.callback("tetris_active_players", "Players in a room", lambda: len(lobby_manager.player_rooms))
+metrics.REGISTRY.callback("tetris_active_bots", "Bot players in a room", lambda: len(lobby_manager.bots))
+metrics.REGISTRY.callback("tetris_active_spectators", "Clients spectating a room",
+                          lambda: len(lobby_manager.spectating))
+metrics.REGISTRY.callback("tetris_active_connections", "Open WebSocket connections",
+                          lambda: len(manager.active_connections))
+metrics.REGISTRY.callback("tetris_outbound_messages_total", "Outbound queue events (queued, sent, coalesced, ...)",
+                          lambda: {(event,): count for event, count in outbound_stats.items()},
+                          kind="counter", labelnames=("event",))
+
+@app.get("/metrics")
+async def api_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+async def start_event_loop_monitor():
+    app.state.loop_lag_task = asyncio.create_task(metrics.monitor_event_loop_lag())
+    app.state.room_list_task = asyncio.create_task(room_list_push_loop())
+    if lobby_manager.directory:
+        app.state.directory_task = asyncio.create_task(directory_sync_loop())
+        logger.info("🧩 샤드 %d 시작 (포트 %d)", SHARD_ID, lobby_manager.directory.port)
+
+@app.on_event("shutdown")
+async def stop_event_loop_monitor():
+    app.state.loop_lag_task.cancel()
+    app.state.room_list_task.cancel()
+    if lobby_manager.directory:
+        app.state.directory_task.cancel()
+        lobby_manager.directory.withdraw()
+    worker_pool.shutdown()
+
 @app.get("/v2")
 async def serve_react():
     # Green: React 버전
@@ -0,0 +1,115 @@
+"""클라이언트 -> 서버 메시지 스키마 (pydantic 모델은 클래스 정의 시 한 번만 컴파일됨)
+
+모르는 필드는 무시하고, 필요한 필드가 없거나 타입이 맞지 않으면 ValidationError.
+"""
+from typing import Annotated, List, Optional, Tuple, Union
+
+from pydantic import BaseModel, ConfigDict, Field, StrictInt, StrictStr, conlist
+
+from board import GRID_COLS, GRID_ROWS, MAX_SCORE, MAX_STAT
+from room_list import ROOM_LIST_PAGE_SIZE
+
+# 칸 값은 0(빈 칸) 또는 색 문자열 (클라이언트마다 다름) - strict 가 lax Union 보다 빠름
+# 보드 크기가 다른 그리드는 방 상태/패킹/녹화에 닿기 전에 여기서 거절
+Cell = Union[StrictInt, Annotated[StrictStr, Field(max_length=32)], None]
+Row = conlist(Cell, min_length=GRID_COLS, max_length=GRID_COLS)
+Grid = conlist(Row, min_length=GRID_ROWS, max_length=GRID_ROWS)
+RowIndex = Annotated[int, Field(ge=0, lt=GRID_ROWS)]
+
+
+class ClientMessage(BaseModel):
+    """필드가 없는 메시지 (unsubscribe_rooms, leave_room, start_game, switch_target, resync_request, game_over,
+    stop_spectating, spectate_resync)"""
+    model_config = ConfigDict(extra="ignore")
+
+
+class ListRoomsMessage(ClientMessage):
+    """offset/limit 페이지 + 필터, subscribe 면 전체 목록 후 room_list_diff push"""
+    offset: int = Field(0, ge=0)
+    limit: int = Field(ROOM_LIST_PAGE_SIZE, ge=1, le=200)
+    item_mode: Optional[bool] = None
+    min_free_slots: int = Field(1, ge=1)
+    subscribe: bool = False
+
+
+class CreateRoomMessage(ClientMessage):
+    room_name: str
+    player_name: str
+    max_players: int = Field(16, ge=1, le=64)
+    item_mode: bool = False
+    authoritative: bool = False
+
+
+class JoinRoomMessage(ClientMessage):
+    room_id: str
+    player_name: str
+
+
+class SpectateRoomMessage(ClientMessage):
+    """관전 시작 - focus 가 없으면 살아 있는 첫 플레이어"""
+    room_id: str
+    focus: Optional[str] = None
+
+
+class SpectateFocusMessage(ClientMessage):
+    player_id: str
+
+
+class AddBotMessage(ClientMessage):
+    """방장이 봇 추가 - pps 는 초당 놓는 블록 수 (없으면 BOT_DEFAULT_PPS)"""
+    count: int = Field(1, ge=1, le=63)
+    pps: Optional[float] = Field(None, gt=0)
+
+
+class RemoveBotMessage(ClientMessage):
+    player_id: str
+
+
+class ReadyMessage(ClientMessage):
+    ready: bool
+
+
+class UpdateGridMessage(ClientMessage):
+    """grid(전체) 또는 rows(바뀐 줄 [y, row]) + base_seq"""
+    seq: Optional[int] = None
+    base_seq: Optional[int] = None
+    grid: Optional[Grid] = None
+    rows: Optional[conlist(Tuple[RowIndex, Row], max_length=GRID_ROWS)] = None
+    score: int = Field(0, ge=0, le=MAX_SCORE)  # 바이너리 프레임 필드 크기 안
+    level: int = Field(1, ge=0, le=MAX_STAT)
+    lines: int = Field(0, ge=0, le=MAX_STAT)
+    combo: int = Field(0, ge=0, le=MAX_STAT)
+
+
+class SyncModeMessage(ClientMessage):
+    delta: bool = False
+    binary: bool = False
+    clock: bool = False
+
+
+class ClockSyncRequestMessage(ClientMessage):
+    client_time: Optional[float] = None
+
+
+class InputMessage(ClientMessage):
+    """{"tick", "action"} 하나 또는 "inputs": [[tick, action], ...]"""
+    tick: int = 0
+    action: Optional[str] = None
+    inputs: Optional[List[Tuple[int, str]]] = None
+
+
+class AttackMessage(ClientMessage):
+    lines: int = Field(ge=0, le=GRID_ROWS)  # 보드 높이보다 많은 쓰레기 줄은 의미 없음
+    combo: int = Field(0, ge=0, le=MAX_STAT)
+    target_id: Optional[str] = None
+
+
+class ItemAttackMessage(ClientMessage):
+    target_id: Optional[str] = None
+    item_type: Optional[str] = None
+
+
+class GridSwapMessage(ClientMessage):
+    """grid_swap / send_grid - 상대에게 내 그리드 전달"""
+    target_id: Optional[str] = None
+    my_grid: Optional[Grid] = None
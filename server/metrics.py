@@ -0,0 +1,175 @@
+"""프로세스 내 Prometheus 텍스트 포맷 메트릭 (외부 수집기/라이브러리 불필요)
+
+핫 패스에서는 dict 조회와 덧셈만 하고, 문자열 생성은 /metrics 요청 시에만 한다.
+현재 값을 바로 읽을 수 있는 것(방 수, 연결 수 등)은 CallbackMetric 으로 요청 시 계산한다.
+"""
+import asyncio
+from bisect import bisect_left
+from typing import Callable, Dict, Tuple
+
+# 레이블 조합이 이 수를 넘으면 나머지는 "other" 로 합침 (클라이언트가 보낸 type 값 등)
+MAX_LABEL_SETS = 64
+
+# 초 단위 기본 버킷 (핸들러/브로드캐스트/이벤트 루프 지연)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# 브로드캐스트 수신자 수
+FANOUT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+EVENT_LOOP_LAG_INTERVAL = 0.25  # 이벤트 루프 지연 측정 주기(초)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: tuple, values: dict) -> tuple:
+        if labels in values or len(values) < MAX_LABEL_SETS:
+            return labels
+        return ("other",) * len(self.labelnames)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount=1):
+        values = self.values
+        key = self._key(labels, values)
+        values[key] = values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = self.header()
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.values: Dict[tuple, list] = {}  # labels -> [버킷별 개수..., +Inf 개수, 합계]
+
+    def observe(self, value, *labels):
+        values = self.values
+        key = self._key(labels, values)
+        entry = values.get(key)
+        if entry is None:
+            entry = values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def render(self) -> list:
+        lines = self.header()
+        for labels, entry in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(entry[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """요청 시 callback() 으로 값을 읽는 메트릭 - 숫자 하나 또는 {레이블 튜플: 값}"""
+
+    def __init__(self, name, documentation, callback: Callable, kind="gauge", labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.callback = callback
+
+    def render(self) -> list:
+        lines = self.header()
+        value = self.callback()
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        for labels, item in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(item)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, callback, kind="gauge", labelnames=()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, callback, kind, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# 서버 공용 메트릭
+messages_received = REGISTRY.counter(
+    "tetris_messages_received_total", "WebSocket messages received by type", ("type",))
+handler_seconds = REGISTRY.histogram(
+    "tetris_handler_seconds", "Time spent handling one received message by type", ("type",))
+broadcast_fanout = REGISTRY.histogram(
+    "tetris_broadcast_fanout", "Recipients per broadcast by message type", ("type",), FANOUT_BUCKETS)
+broadcast_seconds = REGISTRY.histogram(
+    "tetris_broadcast_seconds", "Time to encode and enqueue one broadcast by message type", ("type",))
+outbound_bytes = REGISTRY.counter(
+    "tetris_outbound_bytes_total", "Bytes written to WebSockets (text frames counted in characters)", ("frame",))
+send_failures = REGISTRY.counter(
+    "tetris_send_failures_total", "Outbound messages that could not be delivered by reason", ("reason",))
+event_loop_lag = REGISTRY.histogram(
+    "tetris_event_loop_lag_seconds", "Extra delay of a periodic asyncio sleep (event loop lag)")
+
+
+async def monitor_event_loop_lag(interval: float = EVENT_LOOP_LAG_INTERVAL):
+    """interval 만큼 잠들었다가 실제로 늦게 깨어난 시간을 event_loop_lag 에 기록"""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            event_loop_lag.observe(max(0.0, loop.time() - start - interval))
+    except asyncio.CancelledError:
+        pass
+
@@ -0,0 +1,106 @@
+"""블록 7종 x 회전 4방향 테이블과 SRS 월킥 데이터
+
+모듈을 불러올 때 한 번만 만들고 모든 TetrisGame 인스턴스가 공유한다.
+테이블의 값은 모두 튜플이므로 수정할 수 없다.
+"""
+from typing import NamedTuple, Tuple
+
+# 기본(회전 0) 모양 - 순서가 shape_index
+SPAWN_SHAPES = (
+    ((1, 1, 1, 1),),  # I
+    ((1, 1), (1, 1)),  # O
+    ((0, 1, 0), (1, 1, 1)),  # T
+    ((1, 1, 1), (1, 0, 0)),  # L
+    ((1, 1, 1), (0, 0, 1)),  # J
+    ((0, 1, 1), (1, 1, 0)),  # S
+    ((1, 1, 0), (0, 1, 1)),  # Z
+)
+
+COLORS = ('#00ffff', '#ffff00', '#ff00ff', '#ff9900', '#0000ff', '#00ff00', '#ff0000')
+
+I_PIECE = 0
+O_PIECE = 1
+
+
+class Rotation(NamedTuple):
+    """블록 하나의 회전 상태 하나"""
+    shape: Tuple[Tuple[int, ...], ...]  # 모양 행렬
+    cells: Tuple[Tuple[int, int], ...]  # 채워진 칸의 (dx, dy)
+    width: int
+    height: int
+    row_masks: Tuple[int, ...]  # 줄마다 비트마스크 (비트 x = x 번째 열)
+
+
+def shape_row_masks(shape) -> tuple:
+    """블록 모양 행렬을 줄마다 비트마스크로 변환"""
+    return tuple(sum(1 << x for x, cell in enumerate(row) if cell) for row in shape)
+
+
+def _build_rotations(shape) -> Tuple[Rotation, ...]:
+    """회전 r 의 모양은 기본 모양을 시계 방향으로 r 번 돌린 것"""
+    rotations = []
+    for _ in range(4):
+        cells = tuple((x, y) for y, row in enumerate(shape) for x, cell in enumerate(row) if cell)
+        rotations.append(Rotation(shape, cells, len(shape[0]), len(shape), shape_row_masks(shape)))
+        shape = tuple(zip(*shape[::-1]))
+    return tuple(rotations)
+
+
+# PIECES[shape_index][rotation]
+PIECES = tuple(_build_rotations(shape) for shape in SPAWN_SHAPES)
+
+# SRS 월킥 (from_rot, to_rot) -> (dx, dy) 순서대로 시도, 아래가 +y (static/game.js 와 같은 값)
+JLSTZ_KICKS = {
+    (0, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (1, 0): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    (1, 2): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    (2, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (2, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+    (3, 2): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (3, 0): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (0, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+}
+
+I_KICKS = {
+    (0, 1): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+    (1, 0): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+    (1, 2): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+    (2, 1): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    (2, 3): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+    (3, 2): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+    (3, 0): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    (0, 3): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+}
+
+NO_KICKS = ((0, 0),)
+
+# KICKS[shape_index] - O 블록은 제자리 회전만
+KICKS = tuple(
+    I_KICKS if index == I_PIECE else {} if index == O_PIECE else JLSTZ_KICKS
+    for index in range(len(SPAWN_SHAPES))
+)
+
+
+def kick_offsets(shape_index: int, from_rot: int, to_rot: int) -> tuple:
+    return KICKS[shape_index].get((from_rot, to_rot), NO_KICKS)
+
+
+class Piece:
+    """게임 중인 블록 하나 - 모양/색은 테이블에서 찾고 위치와 회전만 가진다"""
+
+    __slots__ = ("shape_index", "shape", "rotation", "x", "y")
+
+    def __init__(self, shape_index: int, x: int = 0, y: int = 0):
+        self.reset(shape_index, x, y)
+
+    def reset(self, shape_index: int, x: int = 0, y: int = 0):
+        """회전 0 상태로 되돌림 (새 객체를 만들지 않고 재사용)"""
+        self.shape_index = shape_index
+        self.shape = SPAWN_SHAPES[shape_index]
+        self.rotation = 0
+        self.x = x
+        self.y = y
+
+    @property
+    def color(self) -> str:
+        return COLORS[self.shape_index]
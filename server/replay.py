@@ -0,0 +1,481 @@
+"""매치 리플레이 - 추가 전용 바이너리 로그 기록 + 빠른 재생
+
+파일 구조 (little-endian):
+    b"TRP1" + u32 길이 + JSON 메타 (방 정보, 플레이어 목록, tick_rate, keyframe 간격)
+    레코드 반복: u8 타입, u32 틱, u8 플레이어 인덱스(255 = 없음), u16 길이 + payload
+    (정상 종료 시) 키프레임 인덱스: [u32 틱, u64 오프셋] * n + u32 n + b"TIDX"
+
+보드는 바뀐 줄만 기록하고 (줄마다 u16 점유 마스크 + 점유 칸의 팔레트 인덱스 바이트),
+REPLAY_KEYFRAME_INTERVAL 틱마다 모든 보드를 통째로 기록해서 원하는 틱 근처부터 읽을 수 있다.
+인덱스가 없으면 (서버가 죽은 경우) 레코드 헤더만 훑어서 키프레임 위치를 찾는다.
+
+    python replay.py info replays/room_1234-....trp
+    python replay.py board replays/... --player p1 --tick 3600
+    python replay.py play replays/... --player p1 --speed 20
+"""
+import argparse
+import bisect
+import json
+import os
+import struct
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from board import DEFAULT_PALETTE
+from logger import get_logger
+
+REPLAY_DIR = os.environ.get("REPLAY_DIR", "")  # 기본은 기록 안 함 (예: REPLAY_DIR=replays)
+REPLAY_MAX_FILES = int(os.environ.get("REPLAY_MAX_FILES", "200"))  # 넘으면 오래된 파일부터 삭제 (0 이면 무제한)
+REPLAY_KEYFRAME_INTERVAL = int(os.environ.get("REPLAY_KEYFRAME_INTERVAL", "600"))  # 키프레임 간격(틱)
+
+MAGIC = b"TRP1"
+INDEX_MAGIC = b"TIDX"
+NO_PLAYER = 255
+
+_LENGTH = struct.Struct("<I")
+_RECORD = struct.Struct("<BIBH")  # type, tick, player, payload length
+_ROW = struct.Struct("<BH")  # y, mask
+_MASK = struct.Struct("<H")
+_STATS = struct.Struct("<IHHH")  # score, level, lines, combo
+_ATTACK = struct.Struct("<BHB")  # target, lines, combo
+_INDEX_ENTRY = struct.Struct("<IQ")  # tick, offset
+
+# 레코드 타입
+REC_ROWS = 1  # 바뀐 줄 [y, mask, 색...]
+REC_KEYFRAME = 2  # 키프레임 시작 - JSON 추가 팔레트, 뒤따르는 REC_BOARD 들이 모든 보드
+REC_BOARD = 3  # 보드 전체 (줄 순서대로 mask, 색...)
+REC_STATS = 4
+REC_INPUT = 5  # 서버 권한 모드 입력 (INPUT_CODES)
+REC_ATTACK = 6
+REC_TARGET = 7
+REC_ITEM = 8  # JSON (item_attack / grid_swap / send_grid)
+REC_GAME_OVER = 9
+REC_LEAVE = 10
+REC_PALETTE = 11  # JSON 값 하나 - 다음 팔레트 인덱스
+REC_END = 12  # JSON 결과
+
+RECORD_NAMES = {
+    REC_ROWS: "rows", REC_KEYFRAME: "keyframe", REC_BOARD: "board", REC_STATS: "stats", REC_INPUT: "input",
+    REC_ATTACK: "attack", REC_TARGET: "target", REC_ITEM: "item", REC_GAME_OVER: "game_over",
+    REC_LEAVE: "leave", REC_PALETTE: "palette", REC_END: "end",
+}
+INPUT_CODES = ("left", "right", "soft_drop", "hard_drop", "rotate_cw", "rotate_ccw", "hold")
+MAX_COLS = _MASK.size * 8  # 줄 마스크가 u16
+
+logger = get_logger("replay")
+
+
+def _encode_row(row, lookup: Dict, new_colors: List) -> Tuple[int, bytes]:
+    mask = 0
+    colors = bytearray()
+    for x, cell in enumerate(row):
+        if cell:
+            mask |= 1 << x
+            index = lookup.get(cell)
+            if index is None:
+                if len(lookup) > 255:
+                    index = len(DEFAULT_PALETTE) - 1  # 색이 너무 많으면 쓰레기 색으로
+                else:
+                    index = lookup[cell] = len(lookup)
+                    new_colors.append(cell)
+            colors.append(index)
+    return mask, bytes(colors)
+
+
+class ReplayRecorder:
+    """매치 하나의 리플레이 기록 - 기록 메서드는 버퍼에 쓰기만 하고 키프레임마다 flush"""
+
+    def __init__(self, path: str, meta: dict, player_ids: List[str],
+                 keyframe_interval: int = REPLAY_KEYFRAME_INTERVAL):
+        self.path = path
+        self.player_index = {player_id: i for i, player_id in enumerate(player_ids)}
+        self.keyframe_interval = keyframe_interval
+        self.lookup = {value: i for i, value in enumerate(DEFAULT_PALETTE)}
+        self.rows: Dict[int, List[bytes]] = {}  # 플레이어 인덱스 -> 줄별 인코딩 (마지막 기록 상태)
+        self.stats: Dict[int, tuple] = {}
+        self.targets: Dict[int, int] = {}
+        self.dead: set = set()
+        self.index: List[Tuple[int, int]] = []  # (tick, offset) 키프레임
+        self.next_keyframe = 0
+        self.closed = False
+        header = json.dumps(dict(meta, players=player_ids, keyframe_interval=keyframe_interval),
+                            ensure_ascii=False).encode()
+        self.file = open(path, "xb")  # 이미 있는 파일에 헤더를 덧붙이지 않음
+        self.file.write(MAGIC + _LENGTH.pack(len(header)) + header)
+
+    def _write(self, kind: int, tick: int, player: int, payload: bytes = b""):
+        self.file.write(_RECORD.pack(kind, tick, player, len(payload)) + payload)
+
+    def _player(self, player_id: Optional[str]) -> int:
+        return self.player_index.get(player_id, NO_PLAYER)
+
+    def _maybe_keyframe(self, tick: int):
+        if tick < self.next_keyframe or not self.rows:
+            return
+        self.next_keyframe = tick + self.keyframe_interval
+        self.index.append((tick, self.file.tell()))
+        extra = list(self.lookup)[len(DEFAULT_PALETTE):]
+        self._write(REC_KEYFRAME, tick, NO_PLAYER, json.dumps(extra, ensure_ascii=False).encode())
+        for player, rows in self.rows.items():
+            self._write(REC_BOARD, tick, player, b"".join(rows))
+            if player in self.stats:
+                self._write(REC_STATS, tick, player, _STATS.pack(*self.stats[player]))
+        # 키프레임부터 읽어도 타겟/게임 오버 상태가 맞도록 함께 기록
+        for player, target in self.targets.items():
+            self._write(REC_TARGET, tick, player, bytes((target,)))
+        for player in self.dead:
+            self._write(REC_GAME_OVER, tick, player)
+        self.file.flush()
+
+    def record_grid(self, tick: int, player_id: str, grid: list):
+        """보드에서 마지막 기록 이후 바뀐 줄만 기록 (처음이면 보드 전체)"""
+        player = self._player(player_id)
+        if player == NO_PLAYER or self.closed:
+            return
+        if any(len(row) > MAX_COLS for row in grid):
+            logger.warning("⚠️ %d열을 넘는 보드는 리플레이에 기록하지 않음: %s", MAX_COLS, player_id)
+            return
+        new_colors = []
+        encoded = []
+        for row in grid:
+            mask, colors = _encode_row(row, self.lookup, new_colors)
+            encoded.append(_MASK.pack(mask) + colors)
+        for value in new_colors:
+            self._write(REC_PALETTE, tick, NO_PLAYER, json.dumps(value).encode())
+        previous = self.rows.get(player)
+        self.rows[player] = encoded
+        if previous is None or len(previous) != len(encoded):
+            self._write(REC_BOARD, tick, player, b"".join(encoded))
+        else:
+            changed = b"".join(bytes((y,)) + row for y, row in enumerate(encoded) if row != previous[y])
+            if changed:
+                self._write(REC_ROWS, tick, player, changed)
+        self._maybe_keyframe(tick)
+
+    def record_stats(self, tick: int, player_id: str, score: int, level: int, lines: int, combo: int):
+        player = self._player(player_id)
+        stats = (min(max(score, 0), 0xFFFFFFFF), min(max(level, 0), 0xFFFF), min(max(lines, 0), 0xFFFF),
+                 min(max(combo, 0), 0xFFFF))
+        if player != NO_PLAYER and not self.closed and self.stats.get(player) != stats:
+            self.stats[player] = stats
+            self._write(REC_STATS, tick, player, _STATS.pack(*stats))
+
+    def record_input(self, tick: int, player_id: str, action: str):
+        if action in INPUT_CODES and not self.closed:
+            self._write(REC_INPUT, tick, self._player(player_id), bytes((INPUT_CODES.index(action),)))
+
+    def record_attack(self, tick: int, player_id: str, target_id: Optional[str], lines: int, combo: int):
+        if not self.closed:
+            self._write(REC_ATTACK, tick, self._player(player_id),
+                        _ATTACK.pack(self._player(target_id), min(max(lines, 0), 0xFFFF), min(max(combo, 0), 255)))
+
+    def record_target(self, tick: int, player_id: str, target_id: Optional[str]):
+        player, target = self._player(player_id), self._player(target_id)
+        if not self.closed and self.targets.get(player) != target:
+            self.targets[player] = target
+            self._write(REC_TARGET, tick, player, bytes((target,)))
+
+    def record_item(self, tick: int, player_id: str, info: dict):
+        if not self.closed:
+            self._write(REC_ITEM, tick, self._player(player_id), json.dumps(info, ensure_ascii=False).encode())
+
+    def record_game_over(self, tick: int, player_id: str):
+        if not self.closed:
+            self.dead.add(self._player(player_id))
+            self._write(REC_GAME_OVER, tick, self._player(player_id))
+
+    def record_leave(self, tick: int, player_id: str):
+        if not self.closed:
+            self._write(REC_LEAVE, tick, self._player(player_id))
+
+    def close(self, tick: int, result: Optional[dict] = None):
+        """결과 기록 후 키프레임 인덱스를 붙이고 닫음"""
+        if self.closed:
+            return
+        self.closed = True
+        self._write(REC_END, tick, NO_PLAYER, json.dumps(result or {}, ensure_ascii=False).encode())
+        for entry in self.index:
+            self.file.write(_INDEX_ENTRY.pack(*entry))
+        self.file.write(_LENGTH.pack(len(self.index)) + INDEX_MAGIC)
+        self.file.close()
+
+
+def open_recorder(room_id: str, meta: dict, player_ids: List[str]) -> Optional[ReplayRecorder]:
+    """REPLAY_DIR 에 새 리플레이 파일을 열고 기록기 반환 (REPLAY_DIR 이 비어 있으면 None)"""
+    if not REPLAY_DIR:
+        return None
+    os.makedirs(REPLAY_DIR, exist_ok=True)
+    prune_replays(REPLAY_MAX_FILES - 1)
+    base = f"{room_id}-{datetime.now():%Y%m%d-%H%M%S}"
+    # 같은 방에서 1초 안에 게임이 다시 시작되면 -2, -3 ... 을 붙임
+    for attempt in range(1, 100):
+        name = base if attempt == 1 else f"{base}-{attempt}"
+        try:
+            return ReplayRecorder(os.path.join(REPLAY_DIR, f"{name}.trp"), meta, player_ids)
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"no free replay file name for {base}")
+
+
+def prune_replays(keep: int):
+    """REPLAY_DIR 의 리플레이를 최근 keep 개만 남기고 삭제 (keep < 0 이면 그대로)"""
+    if not REPLAY_DIR or keep < 0:
+        return
+    files = sorted(Path(REPLAY_DIR).glob("*.trp"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in files[keep:]:
+        try:
+            path.unlink()
+        except OSError as e:
+            logger.warning("⚠️ 오래된 리플레이 삭제 실패: %s - %s", path.name, e)
+
+
+class Replay:
+    """리플레이 파일 읽기 - 파일 전체를 읽지 않고 키프레임부터 필요한 만큼만 스트리밍"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(4) != MAGIC:
+                raise ValueError(f"{path}: not a replay file")
+            (length,) = _LENGTH.unpack(f.read(4))
+            self.meta = json.loads(f.read(length))
+            self.records_start = 8 + length
+            self.players: List[str] = self.meta["players"]
+            self.records_end, self.index = self._read_index(f)
+        self.index_ticks = [tick for tick, _ in self.index]
+
+    def _read_index(self, f) -> Tuple[int, List[Tuple[int, int]]]:
+        size = f.seek(0, os.SEEK_END)
+        if size >= self.records_start + 8:
+            f.seek(size - 8)
+            tail = f.read(8)
+            if tail[4:] == INDEX_MAGIC:
+                (count,) = _LENGTH.unpack(tail[:4])
+                start = size - 8 - count * _INDEX_ENTRY.size
+                f.seek(start)
+                data = f.read(count * _INDEX_ENTRY.size)
+                return start, [_INDEX_ENTRY.unpack_from(data, i * _INDEX_ENTRY.size) for i in range(count)]
+        # 인덱스 없음 (기록 중이거나 비정상 종료) - 레코드 헤더만 훑음
+        index = []
+        for kind, tick, _, _, offset in self._scan(f, self.records_start, size, with_payload=False):
+            if kind == REC_KEYFRAME:
+                index.append((tick, offset))
+        return size, index
+
+    def _scan(self, f, start: int, end: int, with_payload: bool = True) -> Iterator[tuple]:
+        """(타입, 틱, 플레이어, payload 또는 None, 오프셋) - 잘린 마지막 레코드는 무시"""
+        f.seek(start)
+        offset = start
+        header_size = _RECORD.size
+        while offset + header_size <= end:
+            header = f.read(header_size)
+            if len(header) < header_size:
+                return
+            kind, tick, player, length = _RECORD.unpack(header)
+            if offset + header_size + length > end:
+                return
+            if with_payload:
+                payload = f.read(length)
+            else:
+                payload = None
+                f.seek(length, os.SEEK_CUR)
+            yield kind, tick, player, payload, offset
+            offset += header_size + length
+
+    def records(self, from_tick: int = 0) -> Iterator[tuple]:
+        """from_tick 이전 마지막 키프레임부터 (타입, 틱, 플레이어, payload) 스트리밍"""
+        i = bisect.bisect_right(self.index_ticks, from_tick) - 1
+        start = self.index[i][1] if i >= 0 else self.records_start
+        with open(self.path, "rb") as f:
+            for kind, tick, player, payload, _ in self._scan(f, start, self.records_end):
+                yield kind, tick, player, payload
+
+    def play(self, from_tick: int = 0, to_tick: Optional[int] = None) -> Iterator["ReplayState"]:
+        """from_tick 부터 to_tick 까지 틱이 바뀔 때마다 재구성한 상태를 돌려줌 (같은 ReplayState 객체를 갱신)"""
+        state = ReplayState(self)
+        current = None
+        for kind, tick, player, payload in self.records(from_tick):
+            if to_tick is not None and tick > to_tick:
+                break
+            if current is not None and tick != current and current >= from_tick:
+                yield state
+            current = tick
+            state.tick = tick
+            state.apply(kind, player, payload)
+        if current is not None and current >= from_tick:
+            yield state
+
+    def state_at(self, tick: int) -> "ReplayState":
+        """tick 시점의 모든 보드/스탯/타겟 (가장 가까운 앞 키프레임부터 재생)"""
+        state = ReplayState(self)
+        for kind, record_tick, player, payload in self.records(tick):
+            if record_tick > tick:
+                break
+            state.tick = record_tick
+            state.apply(kind, player, payload)
+        return state
+
+
+class ReplayState:
+    """재생 중인 방 상태 (플레이어 인덱스 -> 보드/스탯/타겟)"""
+
+    def __init__(self, replay: Replay):
+        self.replay = replay
+        self.tick = 0
+        self.palette = list(DEFAULT_PALETTE)
+        self.boards: Dict[int, List[Tuple[int, bytes]]] = {}  # 줄별 (mask, 색 인덱스)
+        self.stats: Dict[int, tuple] = {}
+        self.targets: Dict[int, int] = {}
+        self.dead: set = set()
+        self.events: List[tuple] = []  # (틱, 이름, 플레이어, 내용) - 보드 외 이벤트
+        self.result: Optional[dict] = None
+
+    def apply(self, kind: int, player: int, payload: bytes):
+        if kind == REC_BOARD:
+            self.boards[player] = _decode_rows(payload)
+        elif kind == REC_ROWS:
+            rows = self.boards.get(player)
+            offset = 0
+            while offset < len(payload):
+                y, mask = _ROW.unpack_from(payload, offset)
+                offset += _ROW.size
+                count = bin(mask).count("1")
+                if rows is not None and y < len(rows):
+                    rows[y] = (mask, payload[offset:offset + count])
+                offset += count
+        elif kind == REC_STATS:
+            self.stats[player] = _STATS.unpack(payload)
+        elif kind == REC_PALETTE:
+            self.palette.append(json.loads(payload))
+        elif kind == REC_TARGET:
+            self.targets[player] = payload[0]
+        elif kind == REC_GAME_OVER:
+            self.dead.add(player)
+        elif kind == REC_END:
+            self.result = json.loads(payload)
+        elif kind == REC_KEYFRAME:
+            self.palette = list(DEFAULT_PALETTE) + json.loads(payload)
+        else:
+            self.events.append((self.tick, RECORD_NAMES.get(kind, kind), player, self._decode_event(kind, payload)))
+
+    def _decode_event(self, kind: int, payload: bytes):
+        if kind == REC_INPUT:
+            return INPUT_CODES[payload[0]]
+        if kind == REC_ATTACK:
+            target, lines, combo = _ATTACK.unpack(payload)
+            return {"target": self.player_id(target), "lines": lines, "combo": combo}
+        if kind == REC_ITEM:
+            return json.loads(payload)
+        return None
+
+    def player_id(self, player: int) -> Optional[str]:
+        players = self.replay.players
+        return players[player] if player < len(players) else None
+
+    def grid(self, player_id: str) -> Optional[list]:
+        """플레이어 보드를 색 값 그리드로 (기록된 적 없으면 None)"""
+        rows = self.boards.get(self.replay.players.index(player_id))
+        if rows is None:
+            return None
+        palette = self.palette
+        cols = self.replay.meta.get("cols", 10)
+        grid = []
+        for mask, colors in rows:
+            row = [0] * cols
+            i = 0
+            while mask:
+                low = mask & -mask
+                row[low.bit_length() - 1] = palette[colors[i]] if colors[i] < len(palette) else "?"
+                i += 1
+                mask ^= low
+            grid.append(row)
+        return grid
+
+    def summary(self) -> dict:
+        return {
+            "tick": self.tick,
+            "players": {
+                player_id: {
+                    "stats": dict(zip(("score", "level", "lines", "combo"), self.stats.get(i, (0, 1, 0, 0)))),
+                    "target": self.player_id(self.targets[i]) if i in self.targets else None,
+                    "game_over": i in self.dead,
+                }
+                for i, player_id in enumerate(self.replay.players)
+            },
+            "result": self.result,
+        }
+
+
+def _decode_rows(payload: bytes) -> List[Tuple[int, bytes]]:
+    rows = []
+    offset = 0
+    while offset < len(payload):
+        (mask,) = _MASK.unpack_from(payload, offset)
+        offset += _MASK.size
+        count = bin(mask).count("1")
+        rows.append((mask, payload[offset:offset + count]))
+        offset += count
+    return rows
+
+
+def load_summary(path: str, tick: Optional[int] = None, player: Optional[str] = None) -> dict:
+    """tick 시점의 방 상태 요약 (player 를 주면 그 보드 포함) - /api/replays 용, 워커 프로세스에서 실행"""
+    replay = Replay(path)
+    state = replay.state_at(tick if tick is not None else 1 << 31)
+    result = {"meta": replay.meta, "keyframes": len(replay.index), **state.summary()}
+    if player in replay.players:
+        result["grid"] = state.grid(player)
+    return result
+
+
+def format_grid(grid: list) -> str:
+    return "\n".join("|" + "".join("#" if cell else "." for cell in row) + "|" for row in grid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and play back Tetris match replays")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="header, players, keyframes and result")
+    info.add_argument("path")
+    board = sub.add_parser("board", help="one player's board at a tick")
+    board.add_argument("path")
+    board.add_argument("--player", required=True)
+    board.add_argument("--tick", type=int, default=1 << 31)
+    play = sub.add_parser("play", help="fast-forward a player's board in the terminal")
+    play.add_argument("path")
+    play.add_argument("--player", required=True)
+    play.add_argument("--from-tick", type=int, default=0)
+    play.add_argument("--speed", type=float, default=10.0, help="multiple of real time (0 = as fast as possible)")
+    args = parser.parse_args()
+
+    replay = Replay(args.path)
+    if args.command == "info":
+        end = replay.state_at(1 << 31)
+        print(json.dumps({"meta": replay.meta, "keyframes": len(replay.index),
+                          "size": os.path.getsize(args.path), **end.summary()}, ensure_ascii=False, indent=2))
+    elif args.command == "board":
+        start = time.perf_counter()
+        state = replay.state_at(args.tick)
+        grid = state.grid(args.player)
+        print(format_grid(grid) if grid else "(no board recorded)")
+        print(json.dumps(state.summary()["players"][args.player], ensure_ascii=False))
+        print(f"tick {state.tick} rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms")
+    else:
+        tick_rate = replay.meta.get("tick_rate", 60)
+        player = replay.players.index(args.player)
+        last_tick = None
+        for state in replay.play(args.from_tick):
+            if player not in state.boards:
+                continue
+            if args.speed and last_tick is not None:
+                time.sleep((state.tick - last_tick) / tick_rate / args.speed)
+            last_tick = state.tick
+            sys.stdout.write("\x1b[H\x1b[2J" + format_grid(state.grid(args.player)) + f"\ntick {state.tick}\n")
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""로비 방 목록 캐시 (버전 관리) + 구독한 클라이언트에게 바뀐 방만 push
+
+방이 생성/참가/퇴장/게임 시작/종료될 때만 그 방의 요약을 갱신하고 version 을 올린다.
+list_rooms 는 필터별로 캐시된 목록을 잘라서 돌려주고, 구독자는 push 주기마다
+{"type": "room_list_diff", "base_version", "version", "upsert", "remove"} 를 받는다.
+"""
+import asyncio
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+ROOM_LIST_PAGE_SIZE = int(os.environ.get("ROOM_LIST_PAGE_SIZE", "50"))  # list_rooms 기본 limit
+ROOM_LIST_PUSH_INTERVAL = float(os.environ.get("ROOM_LIST_PUSH_INTERVAL", "0.25"))  # diff push 최소 간격(초)
+
+
+class RoomFilter(NamedTuple):
+    item_mode: Optional[bool] = None  # None 이면 모두
+    min_free_slots: int = 1
+
+    def matches(self, entry: dict) -> bool:
+        return (not entry["game_active"]
+                and entry["max_players"] - entry["player_count"] >= self.min_free_slots
+                and (self.item_mode is None or entry["item_mode"] == self.item_mode))
+
+
+class _Subscriber:
+    __slots__ = ("filter", "version", "visible")
+
+    def __init__(self, room_filter: RoomFilter, version: int, visible: Set[str]):
+        self.filter = room_filter
+        self.version = version  # 이 구독자에게 마지막으로 보낸 version
+        self.visible = visible  # 이 구독자가 목록에 가지고 있는 room_id
+
+
+class RoomListing:
+    """room_id -> 방 요약(Room.get_list_entry) 과 필터별 목록 캐시
+
+    extra 는 모든 로컬 방 요약에 덧붙일 필드 (샤드 모드의 shard/port).
+    """
+
+    def __init__(self, extra: Optional[dict] = None):
+        self.extra = extra or {}
+        self.entries: Dict[str, dict] = {}  # 생성 순서 유지
+        self.version = 0
+        self._views: Dict[RoomFilter, List[dict]] = {}  # version 이 바뀌면 비움
+        self.changed: Dict[str, None] = {}  # 마지막 push 이후 바뀐 room_id (순서 있는 집합)
+        self.subscribers: Dict[str, _Subscriber] = {}
+        self.dirty = asyncio.Event()
+
+    def update_room(self, room):
+        entry = room.get_list_entry()
+        if self.extra:
+            entry.update(self.extra)
+        self.set(room.room_id, entry)
+
+    def set(self, room_id: str, entry: dict):
+        if self.entries.get(room_id) != entry:
+            self.entries[room_id] = entry
+            self._touch(room_id)
+
+    def remove(self, room_id: str):
+        if self.entries.pop(room_id, None) is not None:
+            self._touch(room_id)
+
+    def replace_all(self, entries: Dict[str, dict], keep: Iterable[str] = ()):
+        """entries 로 목록 교체 (keep 에 있는 room_id 는 건드리지 않음 - 샤드 모드의 로컬 방)"""
+        keep = set(keep)
+        for room_id in [room_id for room_id in self.entries if room_id not in entries and room_id not in keep]:
+            self.remove(room_id)
+        for room_id, entry in entries.items():
+            if room_id not in keep:
+                self.set(room_id, entry)
+
+    def _touch(self, room_id: str):
+        self.version += 1
+        self._views.clear()
+        if self.subscribers:
+            self.changed[room_id] = None
+            self.dirty.set()
+
+    def view(self, room_filter: RoomFilter) -> List[dict]:
+        rooms = self._views.get(room_filter)
+        if rooms is None:
+            rooms = self._views[room_filter] = [entry for entry in self.entries.values() if room_filter.matches(entry)]
+        return rooms
+
+    def page(self, room_filter: RoomFilter, offset: int = 0, limit: int = ROOM_LIST_PAGE_SIZE) -> Tuple[List[dict], int]:
+        """(offset 부터 limit 개, 필터에 맞는 전체 방 수)"""
+        rooms = self.view(room_filter)
+        return rooms[offset:offset + limit], len(rooms)
+
+    def subscribe(self, client_id: str, room_filter: RoomFilter) -> List[dict]:
+        """구독 등록 후 현재 목록 전체 반환 (이후 변경은 take_diffs 로 전달)"""
+        rooms = self.view(room_filter)
+        self.subscribers[client_id] = _Subscriber(room_filter, self.version, {entry["room_id"] for entry in rooms})
+        return rooms
+
+    def unsubscribe(self, client_id: str):
+        self.subscribers.pop(client_id, None)
+        if not self.subscribers:
+            self.changed.clear()
+
+    def take_diffs(self) -> List[Tuple[str, dict]]:
+        """구독자별 room_list_diff 메시지 (바뀐 방이 그 구독자의 목록에 영향이 없으면 생략)"""
+        changed, self.changed = self.changed, {}
+        self.dirty.clear()
+        diffs = []
+        for client_id, subscriber in self.subscribers.items():
+            upsert, remove = [], []
+            for room_id in changed:
+                entry = self.entries.get(room_id)
+                if entry is not None and subscriber.filter.matches(entry):
+                    upsert.append(entry)
+                    subscriber.visible.add(room_id)
+                elif room_id in subscriber.visible:
+                    remove.append(room_id)
+                    subscriber.visible.discard(room_id)
+            if upsert or remove:
+                diffs.append((client_id, {
+                    "type": "room_list_diff",
+                    "base_version": subscriber.version,
+                    "version": self.version,
+                    "upsert": upsert,
+                    "remove": remove,
+                }))
+                subscriber.version = self.version
+        return diffs
@@ -0,0 +1,77 @@
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple, Type
+
+from pydantic import ValidationError
+
+import metrics
+from logger import get_logger
+from messages import ClientMessage
+
+logger = get_logger("router")
+
+Handler = Callable[[str, ClientMessage], Awaitable[None]]
+TimingHook = Callable[[str, float], None]  # (message_type, seconds)
+Observer = Callable[[str, str, ClientMessage], None]  # (client_id, message_type, message) - 핸들러 성공 후
+
+messages_rejected = metrics.REGISTRY.counter(
+    "tetris_messages_rejected_total", "Received messages dropped before reaching a handler by reason", ("reason",))
+handler_errors = metrics.REGISTRY.counter(
+    "tetris_handler_errors_total", "Handlers that raised an exception by message type", ("type",))
+
+
+class MessageRouter:
+    """메시지 type -> (스키마, 핸들러) 디스패치 테이블
+
+    dispatch() 는 type 으로 한 번에 핸들러를 찾고, 스키마로 검증한 모델을 핸들러에 넘긴다.
+    모르는 type, 검증 실패, 핸들러 예외는 기록만 하고 연결은 유지한다.
+    핸들러가 끝날 때마다 timing hook(type, 초)이 호출되고, 성공하면 observer 가 검증된 메시지를 받는다.
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, Tuple[Type[ClientMessage], Handler]] = {}
+        self.timing_hooks: List[TimingHook] = []
+        self.observers: List[Observer] = []
+
+    def route(self, message_type: str, schema: Type[ClientMessage] = ClientMessage):
+        def decorator(handler: Handler) -> Handler:
+            self.routes[message_type] = (schema, handler)
+            return handler
+        return decorator
+
+    def add_timing_hook(self, hook: TimingHook):
+        self.timing_hooks.append(hook)
+
+    def add_observer(self, observer: Observer):
+        self.observers.append(observer)
+
+    async def dispatch(self, client_id: str, message) -> bool:
+        """message(dict) 를 처리, 핸들러까지 가지 못하면 False"""
+        message_type = message.get("type") if isinstance(message, dict) else None
+        route = self.routes.get(message_type) if isinstance(message_type, str) else None
+        if route is None:
+            messages_rejected.inc("unknown_type")
+            logger.debug("❓ 알 수 없는 메시지: %s - %r", client_id, message_type)
+            return False
+        metrics.messages_received.inc(message_type)
+
+        schema, handler = route
+        try:
+            parsed = schema.model_validate(message)
+        except ValidationError as e:
+            messages_rejected.inc("invalid")
+            logger.debug("❌ 잘못된 %s 메시지: %s - %s", message_type, client_id, e.errors(include_url=False))
+            return False
+
+        start = time.perf_counter()
+        try:
+            await handler(client_id, parsed)
+            for observer in self.observers:
+                observer(client_id, message_type, parsed)
+        except Exception:
+            handler_errors.inc(message_type)
+            logger.exception("❌ %s 처리 중 에러: %s", message_type, client_id)
+        finally:
+            elapsed = time.perf_counter() - start
+            for hook in self.timing_hooks:
+                hook(message_type, elapsed)
+        return True
@@ -0,0 +1,58 @@
+"""방 샤드 모드로 서버 여러 개 실행 (코어마다 uvicorn 프로세스 하나)
+
+    cd server
+    python shards.py --shards 4 --base-port 8000
+
+샤드 i 는 base_port + i 포트에서 돌고, 방은 만든 샤드에 고정된다. 모든 샤드가 같은
+SQLite 방 디렉터리(directory.py)를 공유하므로 어느 샤드에 접속해도 전체 방 목록이 보이고,
+다른 샤드의 방에 들어가면 클라이언트가 그 샤드로 다시 연결한다.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from directory import SHARD_DIRECTORY
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Tetris server as N room shards")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--base-port", type=int, default=8000)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--directory", default=SHARD_DIRECTORY)
+    args = parser.parse_args()
+
+    # 이전 실행의 방 목록이 남지 않도록 새로 시작
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.directory + suffix):
+            os.remove(args.directory + suffix)
+
+    processes = []
+    for shard_id in range(args.shards):
+        port = args.base_port + shard_id
+        env = dict(os.environ, SHARD_COUNT=str(args.shards), SHARD_ID=str(shard_id),
+                   SHARD_PORT=str(port), SHARD_DIRECTORY=args.directory)
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", args.host, "--port", str(port)],
+            env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        ))
+        print(f"shard {shard_id}: port {port} (pid {processes[-1].pid})")
+
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signal.SIGINT)
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import os
+import random
+from collections import deque
+from typing import Dict, List, Tuple
+
+from bitboard import BitboardTetrisGame
+from game import TetrisGame
+from garbage import GARBAGE_CELL, AttackCounter
+
+# 시뮬레이션 보드 엔진 (둘 다 같은 동작, bitboard 가 더 빠름)
+ENGINES = {"list": TetrisGame, "bitboard": BitboardTetrisGame}
+SIM_ENGINE = os.environ.get("SIM_ENGINE", "bitboard")
+
+# 클라이언트가 보낼 수 있는 입력
+INPUT_ACTIONS = {
+    "left": lambda game: game.move_left(),
+    "right": lambda game: game.move_right(),
+    "soft_drop": lambda game: game.move_down(),
+    "hard_drop": lambda game: game.hard_drop(),
+    "rotate_cw": lambda game: game.rotate(True),
+    "rotate_ccw": lambda game: game.rotate(False),
+    "hold": lambda game: game.hold_piece(),
+}
+
+MAX_INPUT_LEAD = 120  # 현재 틱보다 너무 앞선 입력은 이 틱 수 이내로 당김
+MAX_PENDING_INPUTS = 256  # 플레이어당 대기 입력 최대 수
+
+
+def gravity_ticks(level: int, tick_rate: int) -> int:
+    """한 칸 떨어지는 데 걸리는 틱 수 (클라이언트 fall_speed 와 같은 곡선)"""
+    fall_speed = max(0.05, 0.5 - (level - 1) * 0.05)
+    return max(1, int(tick_rate * fall_speed))
+
+
+class PlayerSimulation:
+    """플레이어 한 명의 서버 시뮬레이션 상태 (게임 + 대기 입력 + 다음 중력 틱)"""
+
+    __slots__ = ("game", "inputs", "next_gravity", "changed", "attack")
+
+    def __init__(self, game: TetrisGame, tick_rate: int):
+        self.game = game
+        self.inputs: deque = deque()  # (tick, action) - 틱 순서
+        self.next_gravity = gravity_ticks(game.level, tick_rate)
+        self.changed = True
+        self.attack = AttackCounter()  # 블록이 놓일 때 서버가 공격 계산
+
+
+class RoomSimulation:
+    """서버 권한 모드 - 클라이언트는 입력만 보내고 서버가 모든 TetrisGame 을 결정적으로 진행
+
+    같은 seed 로 모든 플레이어의 블록 순서를 맞추고, step_to() 한 번에 방 전체를 진행한다.
+    틱마다 모든 보드를 도는 대신 플레이어마다 다음 이벤트(입력 또는 중력)까지 바로 건너뛴다.
+    공격도 서버 보드에서 지운 줄로 계산하고 (attacks), 받은 쓰레기는 add_garbage 로 서버 보드에 넣는다.
+    """
+
+    def __init__(self, player_ids, tick_rate: int, seed: int = None, engine: str = SIM_ENGINE):
+        self.seed = seed if seed is not None else random.randrange(1 << 30)
+        self.tick_rate = tick_rate
+        self.tick = 0
+        game_class = ENGINES[engine]
+        self.players: Dict[str, PlayerSimulation] = {
+            player_id: PlayerSimulation(game_class(seed=self.seed), tick_rate) for player_id in player_ids
+        }
+        self.events_processed = 0
+        self.rng = random.Random(self.seed)  # 쓰레기 줄 구멍 위치
+        self.attacks: List[Tuple[str, int, int]] = []  # (player_id, 공격 줄 수, 콤보) - 호출자가 꺼내 감
+
+    def remove_player(self, player_id: str):
+        self.players.pop(player_id, None)
+
+    def queue_input(self, player_id: str, tick: int, action: str) -> bool:
+        """입력을 대기열에 넣음 (알 수 없는 입력이나 죽은 플레이어면 False)"""
+        sim = self.players.get(player_id)
+        if sim is None or sim.game.game_over or action not in INPUT_ACTIONS:
+            return False
+        if len(sim.inputs) >= MAX_PENDING_INPUTS:
+            return False
+        # 이미 지난 틱의 입력은 다음 틱에, 너무 먼 미래 입력은 MAX_INPUT_LEAD 안으로 적용
+        tick = min(max(tick, self.tick + 1), self.tick + MAX_INPUT_LEAD)
+        if sim.inputs and tick < sim.inputs[-1][0]:
+            tick = sim.inputs[-1][0]
+        sim.inputs.append((tick, action))
+        return True
+
+    def step_to(self, target_tick: int) -> List[str]:
+        """target_tick 까지 모든 보드 진행, 이번에 게임 오버된 플레이어 목록 반환"""
+        if target_tick <= self.tick:
+            return []
+        tick_rate = self.tick_rate
+        newly_dead = []
+        events = 0
+        for player_id, sim in self.players.items():
+            game = sim.game
+            if game.game_over:
+                continue
+            inputs = sim.inputs
+            while True:
+                next_input = inputs[0][0] if inputs else None
+                # 같은 틱이면 입력 먼저
+                if next_input is not None and next_input <= sim.next_gravity and next_input <= target_tick:
+                    _, action = inputs.popleft()
+                    moved = INPUT_ACTIONS[action](game)
+                    locked = action == "hard_drop" or (action == "soft_drop" and not moved)
+                    if action in ("hard_drop", "soft_drop"):
+                        sim.next_gravity = next_input + gravity_ticks(game.level, tick_rate)
+                elif sim.next_gravity <= target_tick:
+                    locked = not game.move_down()
+                    sim.next_gravity += gravity_ticks(game.level, tick_rate)
+                else:
+                    break
+                if locked:
+                    attack = sim.attack.on_lock(game.last_lines_cleared)
+                    if attack:
+                        self.attacks.append((player_id, attack, sim.attack.combo))
+                events += 1
+                sim.changed = True
+                if game.game_over:
+                    inputs.clear()
+                    newly_dead.append(player_id)
+                    break
+        self.tick = target_tick
+        self.events_processed += events
+        return newly_dead
+
+    def drain_attacks(self) -> List[Tuple[str, int, int]]:
+        attacks, self.attacks = self.attacks, []
+        return attacks
+
+    def add_garbage(self, player_id: str, lines: int) -> bool:
+        """쓰레기 줄을 보드 아래에 추가 (줄마다 구멍 하나), 현재 블록과 겹쳐서 게임 오버가 되면 True"""
+        sim = self.players.get(player_id)
+        if sim is None or sim.game.game_over or lines <= 0:
+            return False
+        game = sim.game
+        count = min(lines, game.rows)
+        garbage = []
+        for _ in range(count):
+            row = [GARBAGE_CELL] * game.cols
+            row[self.rng.randrange(game.cols)] = 0
+            garbage.append(row)
+        game.grid = game.grid[count:] + garbage
+        sim.changed = True
+        piece = game.current_piece
+        if not game.is_valid_position(piece.shape, piece.x, piece.y):
+            game.game_over = True
+            sim.inputs.clear()
+            return True
+        return False
+
+    def snapshot(self, player_id: str) -> dict:
+        """브로드캐스트용 상태 - 그리드는 줄 단위로 복사 (delta 비교가 줄 교체에 의존)"""
+        game = self.players[player_id].game
+        piece = game.current_piece
+        return {
+            "grid": [row[:] for row in game.grid],
+            "score": game.score,
+            "level": game.level,
+            "lines": game.lines_cleared,
+            "piece": {
+                "shape_index": piece.shape_index,
+                "x": piece.x,
+                "y": piece.y,
+                "rotation": piece.rotation,
+                "shape": piece.shape,
+            },
+            "next": game.next_piece.shape_index,
+            "hold": game.held_piece.shape_index if game.held_piece else None,
+        }
+
+    def collect_changes(self) -> Dict[str, dict]:
+        """마지막 호출 이후 바뀐 플레이어의 스냅샷"""
+        changes = {}
+        for player_id, sim in self.players.items():
+            if sim.changed:
+                sim.changed = False
+                changes[player_id] = self.snapshot(player_id)
+        return changes
@@ -0,0 +1,155 @@
+"""관전 스트림 - room.players 에 들어가지 않는 (max_players 자리를 쓰지 않는) 관전자에게 등급별 주기로 보드 전송
+
+- focus: 관전자가 고른 보드 하나, 상태가 바뀌면 최대 SPECTATOR_FOCUS_HZ
+- thumbnails: 방의 모든 보드, 최대 SPECTATOR_THUMBNAIL_HZ
+두 스트림 모두 직전 프레임 대비 바뀐 줄만 보내고 (seq/base_seq), 프레임은 스트림마다 한 번만 인코딩해서
+같은 텍스트를 관전자 모두에게 보낸다. 델타는 base_seq 로 이어지므로 송신 큐에서 합치지 않고 모두 보내며,
+그래도 프레임이 어긋난 관전자는 base_seq 로 알아채고 spectate_resync 로 키프레임을 요청한다.
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from connection import encode_message
+from grid_sync import diff_rows
+
+SPECTATOR_FOCUS_HZ = float(os.environ.get("SPECTATOR_FOCUS_HZ", "15"))
+SPECTATOR_THUMBNAIL_HZ = float(os.environ.get("SPECTATOR_THUMBNAIL_HZ", "2"))
+MAX_SPECTATORS = int(os.environ.get("MAX_SPECTATORS", "500"))  # 방 하나의 관전자 최대 수
+
+# 관전자에게도 그대로 전달하는 방 이벤트
+SPECTATOR_EVENT_TYPES = {"room_update", "player_game_over", "game_end"}
+
+
+class _Stream:
+    """델타 스트림 하나 - seq 와 마지막으로 보낸 그리드/스탯"""
+
+    __slots__ = ("seq", "grids", "stats")
+
+    def __init__(self):
+        self.seq = 0
+        self.grids: Dict[str, list] = {}
+        self.stats: Dict[str, dict] = {}
+
+    def delta(self, game_states: dict, player_ids: Iterable[str]) -> Optional[Tuple[int, dict]]:
+        """(base_seq, player_id -> 바뀐 줄/스탯), 바뀐 것이 없으면 None"""
+        boards = {}
+        for player_id in player_ids:
+            state = game_states.get(player_id)
+            if state is None:
+                continue
+            entry = {}
+            grid = state["grid"]
+            previous = self.grids.get(player_id)
+            if grid is not previous:  # 그리드는 바뀔 때 교체되므로 같은 객체면 비교 생략
+                rows = diff_rows(previous, grid)
+                if rows:
+                    entry["rows"] = rows
+                self.grids[player_id] = grid
+            stats = {key: value for key, value in state.items() if key != "grid"}
+            if stats != self.stats.get(player_id):
+                self.stats[player_id] = stats
+                entry.update(stats)
+            if entry:
+                boards[player_id] = entry
+        if not boards:
+            return None
+        base_seq = self.seq
+        self.seq += 1
+        return base_seq, boards
+
+    def keyframe(self, player_ids: Iterable[str]) -> dict:
+        return {player_id: dict(self.stats.get(player_id, {}), grid=self.grids[player_id])
+                for player_id in player_ids if player_id in self.grids}
+
+
+class SpectatorFeed:
+    """방 하나의 관전자와 스트림 상태 (프레임 생성만 하고 전송은 호출자가)"""
+
+    def __init__(self):
+        self.focus: Dict[str, Optional[str]] = {}  # client_id -> 보고 있는 player_id
+        self.thumbnails = _Stream()
+        self.focus_streams: Dict[str, _Stream] = {}  # player_id -> focus 스트림
+        self.resync: set = set()  # 다음 프레임에서 키프레임을 받아야 하는 관전자
+        self.task = None  # spectator_loop
+
+    def __len__(self):
+        return len(self.focus)
+
+    def add(self, client_id: str, focus: Optional[str] = None):
+        self.focus[client_id] = focus
+        self.resync.add(client_id)
+
+    def remove(self, client_id: str):
+        self.focus.pop(client_id, None)
+        self.resync.discard(client_id)
+
+    def set_focus(self, client_id: str, player_id: Optional[str]):
+        if client_id in self.focus:
+            self.focus[client_id] = player_id
+            self.resync.add(client_id)
+
+    def request_keyframe(self, client_id: str):
+        if client_id in self.focus:
+            self.resync.add(client_id)
+
+    def reset(self):
+        """새 게임 시작 - 스트림을 새로 시작하고 모든 관전자에게 키프레임"""
+        self.thumbnails = _Stream()
+        self.focus_streams.clear()
+        self.resync.update(self.focus)
+
+    def _default_focus(self, game_states: dict) -> Optional[str]:
+        alive = [player_id for player_id, state in game_states.items() if not state.get("game_over")]
+        return alive[0] if alive else next(iter(game_states), None)
+
+    def build_frames(self, game_state: dict, thumbnails: bool) -> List[Tuple[list, str, str]]:
+        """(수신자 목록, kind, 인코딩된 텍스트) 목록 - 같은 프레임은 한 번만 인코딩"""
+        game_states = game_state["game_states"]
+        frames = []
+        resync = self.resync
+
+        # 보고 있는 보드가 없어졌거나 정하지 않은 관전자는 살아 있는 첫 플레이어로
+        watchers: Dict[str, list] = {}
+        for client_id, player_id in self.focus.items():
+            if player_id not in game_states:
+                player_id = self.focus[client_id] = self._default_focus(game_states)
+                resync.add(client_id)
+            if player_id is not None:
+                watchers.setdefault(player_id, []).append(client_id)
+        for player_id in [player_id for player_id in self.focus_streams if player_id not in watchers]:
+            del self.focus_streams[player_id]
+
+        for player_id, clients in watchers.items():
+            stream = self.focus_streams.get(player_id)
+            if stream is None:
+                stream = self.focus_streams[player_id] = _Stream()
+            delta = stream.delta(game_states, (player_id,))
+            if delta:
+                base_seq, boards = delta
+                recipients = [client_id for client_id in clients if client_id not in resync]
+                if recipients:
+                    frames.append((recipients, "spectator_focus", encode_message(dict(
+                        boards[player_id], type="spectator_focus", player_id=player_id,
+                        seq=stream.seq, base_seq=base_seq))))
+            for client_id in clients:
+                if client_id in resync:
+                    frames.append(([client_id], "spectator_focus", encode_message(dict(
+                        stream.keyframe((player_id,)).get(player_id, {}), type="spectator_focus",
+                        player_id=player_id, seq=stream.seq, base_seq=None, keyframe=True))))
+
+        meta = {"game_active": game_state["game_active"], "targeting_info": game_state["targeting_info"]}
+        if thumbnails or resync:
+            delta = self.thumbnails.delta(game_states, game_states)
+            if delta:
+                base_seq, boards = delta
+                recipients = [client_id for client_id in self.focus if client_id not in resync]
+                if recipients:
+                    frames.append((recipients, "spectator_thumbnails", encode_message(dict(
+                        meta, type="spectator_thumbnails", seq=self.thumbnails.seq, base_seq=base_seq,
+                        boards=boards))))
+        if resync:
+            frames.append((list(resync), "spectator_thumbnails", encode_message(dict(
+                meta, type="spectator_thumbnails", seq=self.thumbnails.seq, base_seq=None, keyframe=True,
+                boards=self.thumbnails.keyframe(game_states)))))
+            resync.clear()
+        return frames
@@ -54,16 +54,17 @@ class LobbyManager {
         document.getElementById('cancel-create-room').onclick = () => this.hideCreateRoomModal();
         document.getElementById('ready-btn').onclick = () => this.toggleReady();
         document.getElementById('leave-room-btn').onclick = () => this.leaveRoom();
+        document.getElementById('add-bot-btn').onclick = () => this.send({ type: 'add_bot' });
         document.getElementById('return-lobby-btn').onclick = () => this.returnToLobby();
         document.getElementById('restart-game-btn').onclick = () => this.restartGame();
         document.getElementById('spectate-btn').onclick = () => this.startSpectating();
         document.getElementById('stop-spectate-btn').onclick = () => this.stopSpectating();
     }
     
-    connect() {
-        this.playerId = 'player_' + Math.floor(Math.random() * 10000);
+    connect(host = window.location.host, firstMessage = null) {
+        this.playerId = this.playerId || 'player_' + Math.floor(Math.random() * 10000);
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        const wsUrl = `${protocol}//${window.location.host}/ws/${this.playerId}`;
+        const wsUrl = `${protocol}//${host}/ws/${this.playerId}`;
         
         this.ws = new WebSocket(wsUrl);
         
@@ -72,7 +73,11 @@ class LobbyManager {
             this.connected = true;
             this.connectionStatus.textContent = '✅ 연결됨';
             this.connectionStatus.classList.add('connected');
-            this.requestRoomList();
+            if (firstMessage) {
+                this.send(firstMessage);
+            } else {
+                this.requestRoomList();
+            }
         };
         
         this.ws.onmessage = (event) => {
@@ -123,8 +128,12 @@ class LobbyManager {
         
         switch(data.type) {
             case 'room_list':
+                this.roomListVersion = data.version;
                 this.updateRoomsList(data.rooms);
                 break;
+            case 'room_list_diff':
+                this.applyRoomListDiff(data);
+                break;
             case 'room_joined':
                 this.currentRoom = data.room;
                 this.showRoomScreen();
@@ -139,7 +148,7 @@ class LobbyManager {
                 this.requestRoomList();
                 break;
             case 'game_start':
-                this.startGame(data.game_state, data.item_mode, data.initial_target);
+                this.startGame(data.game_state, data.item_mode, data.initial_target, data.clock);
                 break;
             case 'target_changed':
                 // 서버에서 새 타겟 할당
@@ -157,8 +166,22 @@ class LobbyManager {
             case 'game_state_update':
                 // 다른 플레이어의 미니 그리드 업데이트
                 if (this.currentRoom && !this.isSoloMode && data.game_state) {
-                    this.updateOtherPlayersGrids(data.game_state);
+                    const gameState = data.delta ? this.applyStateDelta(data) : data.game_state;
+                    if (gameState) {
+                        this.updateOtherPlayersGrids(gameState);
+                    }
+                }
+                break;
+            case 'clock_sync':
+                // 서버 시계 보정 (요청 응답이면 왕복 시간의 절반을 지연으로 기억)
+                if (data.client_time !== undefined) {
+                    this.clockLatency = (Date.now() / 1000 - data.client_time) / 2;
                 }
+                this.clockOffset = data.server_time + (this.clockLatency || 0) - Date.now() / 1000;
+                break;
+            case 'grid_resync':
+                // 서버가 전체 그리드를 다시 요청함
+                this.lastSentGrid = null;
                 break;
             case 'receive_attack':
                 console.log(`💥 공격 메시지 수신:`, data);
@@ -217,11 +240,47 @@ class LobbyManager {
                     console.log(`타겟 변경됨: ${data.from_name}`);
                 }
                 break;
+            case 'shard_redirect':
+                this.switchShard(data.port, data.retry);
+                break;
         }
     }
     
+    switchShard(port, retry) {
+        // 방이 다른 샤드(서버 프로세스)에 있음 - 그 포트로 다시 연결한 뒤 요청 재전송
+        console.log(`샤드 이동: 포트 ${port}`);
+        const oldWs = this.ws;
+        oldWs.onclose = null;
+        oldWs.close();
+        this.connected = false;
+        this.connect(`${window.location.hostname}:${port}`, retry);
+    }
+    
     requestRoomList() {
-        this.send({ type: 'list_rooms' });
+        // 전체 목록을 한 번 받고, 이후 바뀐 방은 room_list_diff 로 push 받음
+        this.send({ type: 'list_rooms', subscribe: true });
+    }
+    
+    applyRoomListDiff(diff) {
+        if (diff.base_version !== this.roomListVersion) {
+            this.requestRoomList();  // 중간 diff 를 놓침 - 전체 목록 다시 요청
+            return;
+        }
+        this.roomListVersion = diff.version;
+        const removed = new Set(diff.remove);
+        const upserts = new Map(diff.upsert.map(room => [room.room_id, room]));
+        const rooms = [];
+        (this.rooms || []).forEach(room => {
+            if (removed.has(room.room_id)) return;
+            if (upserts.has(room.room_id)) {
+                rooms.push(upserts.get(room.room_id));
+                upserts.delete(room.room_id);
+            } else {
+                rooms.push(room);
+            }
+        });
+        upserts.forEach(room => rooms.push(room));
+        this.updateRoomsList(rooms);
     }
     
     updateRoomsList(rooms) {
@@ -365,6 +424,90 @@ class LobbyManager {
         });
     }
     
+    startLocalClock(clock) {
+        this.tickRate = clock.tick_rate;
+        this.startEpoch = clock.start_epoch;
+        this.clockLatency = 0;
+        this.clockOffset = clock.server_time - Date.now() / 1000;
+        this.localTick = Math.floor((Date.now() / 1000 + this.clockOffset - this.startEpoch) * this.tickRate);
+        this.send({ type: 'clock_sync_request', client_time: Date.now() / 1000 });
+        
+        if (this.clockInterval) clearInterval(this.clockInterval);
+        this.clockInterval = setInterval(() => {
+            if (!window.game || window.game.gameOver) {
+                clearInterval(this.clockInterval);
+                this.clockInterval = null;
+                return;
+            }
+            const serverTick = Math.floor((Date.now() / 1000 + this.clockOffset - this.startEpoch) * this.tickRate);
+            // 밀린 틱은 최대 5개까지만 따라잡기
+            if (serverTick - this.localTick > 5) {
+                this.localTick = serverTick - 5;
+            }
+            while (this.localTick < serverTick) {
+                window.game.update(performance.now());
+                this.localTick++;
+            }
+        }, 1000 / this.tickRate);
+    }
+    
+    applyStateDelta(data) {
+        // 바뀐 줄만 온 game_state_update 를 이전 스냅샷에 적용
+        if (!data.keyframe && data.base_seq !== this.stateSeq) {
+            if (!this.resyncRequested) {
+                this.resyncRequested = true;
+                this.send({ type: 'resync_request' });
+            }
+            return null;
+        }
+        if (data.keyframe) {
+            this.remoteGrids = {};
+        }
+        for (const playerId in data.game_state.game_states) {
+            const state = data.game_state.game_states[playerId];
+            if (state.grid) {
+                this.remoteGrids[playerId] = state.grid;
+            } else {
+                const grid = this.remoteGrids[playerId] || Array(20).fill().map(() => Array(10).fill(0));
+                for (const [y, row] of state.rows || []) {
+                    grid[y] = row;
+                }
+                this.remoteGrids[playerId] = grid;
+                state.grid = grid;
+            }
+        }
+        this.stateSeq = data.seq;
+        this.resyncRequested = false;
+        return data.game_state;
+    }
+    
+    buildGridUpdate() {
+        // 직전 전송 대비 바뀐 줄만 전송 (50번마다 / 재동기화 요청 시 전체 그리드)
+        const grid = window.game.grid;
+        const message = {
+            type: 'update_grid',
+            seq: ++this.gridSeq,
+            score: window.game.score,
+            level: window.game.level,
+            lines: window.game.lines,
+            combo: window.game.combo
+        };
+        if (!this.lastSentGrid || this.gridSeq % 50 === 0) {
+            message.grid = grid;
+        } else {
+            message.base_seq = this.gridSeq - 1;
+            message.rows = [];
+            grid.forEach((row, y) => {
+                const sent = this.lastSentGrid[y];
+                if (!sent || row.length !== sent.length || row.some((cell, x) => cell !== sent[x])) {
+                    message.rows.push([y, row]);
+                }
+            });
+        }
+        this.lastSentGrid = grid.map(row => row.slice());
+        return message;
+    }
+    
     updateOtherPlayersGrids(gameState) {
         if (!this.currentRoom || !gameState.game_states) return;
 
@@ -535,6 +678,10 @@ class LobbyManager {
             itemModeEl.style.display = this.currentRoom.item_mode ? 'inline' : 'none';
         }
         
+        // 방장만 빈 자리를 봇으로 채울 수 있음
+        document.getElementById('add-bot-btn').style.display =
+            this.currentRoom.host_id === this.playerId ? 'inline-block' : 'none';
+        
         // 플레이어 목록 업데이스트
         const playersList = document.getElementById('players-list');
         playersList.innerHTML = '';
@@ -575,13 +722,21 @@ class LobbyManager {
         this.gameScreen.classList.add('active');
     }
     
-    startGame(initialGameState, itemMode = false, initialTarget = null) {
+    startGame(initialGameState, itemMode = false, initialTarget = null, clock = null) {
         console.log('게임 시작!' + (itemMode ? ' (아이템 모드)' : ''));
         this.showGameScreen();
         this.isSoloMode = false; // 멀티플레이 게임 시작
         this.myGameOverSent = false; // 게임 오버 플래그 초기화
         this.deadPlayers = new Set(); // 죽은 플레이어 초기화
         
+        // 그리드 delta 동기화 초기화
+        this.gridSeq = 0;
+        this.lastSentGrid = null;
+        this.stateSeq = null;
+        this.resyncRequested = false;
+        this.remoteGrids = {};
+        this.send({ type: 'sync_mode', delta: true, clock: !!clock });
+        
         // 서버에서 받은 초기 타겟 설정
         this.currentTarget = initialTarget;
         console.log(`🎯 초기 타겟 설정: ID=${this.currentTarget}, 이름=${this.currentTarget ? this.getPlayerName(this.currentTarget) : '없음'}`);
@@ -592,6 +747,11 @@ class LobbyManager {
         
         // 초기 화면 그리기 (블럭이 보이도록)
         window.game.draw();
+        
+        // 서버 시계로 틱을 직접 계산 (매 프레임 game_tick 을 받지 않음)
+        if (clock) {
+            this.startLocalClock(clock);
+        }
 
         document.getElementById('items-section').style.display = itemMode ? 'block' : 'none';
         document.getElementById('current-target-display').style.display = 'block';
@@ -604,14 +764,7 @@ class LobbyManager {
         // 주기적으로 게임 상태를 서버로 전송 (다른 플레이어에게 보여주기 위해)
         this.syncInterval = setInterval(() => {
             if (window.game && !window.game.gameOver) {
-                this.send({
-                    type: 'update_grid',
-                    grid: window.game.grid,
-                    score: window.game.score,
-                    level: window.game.level,
-                    lines: window.game.lines,
-                    combo: window.game.combo
-                });
+                this.send(this.buildGridUpdate());
             } else if (window.game && window.game.gameOver && !this.myGameOverSent) {
                 this.myGameOverSent = true;
                 clearInterval(this.syncInterval); // 동기화 중지
@@ -1110,6 +1263,10 @@ class LobbyManager {
             clearInterval(this.syncInterval);
             this.syncInterval = null;
         }
+        if (this.clockInterval) {
+            clearInterval(this.clockInterval);
+            this.clockInterval = null;
+        }
         
         // 관전 모드 종료
         this.stopSpectating();
@@ -0,0 +1,140 @@
+import random
+from typing import Dict, List, Optional
+
+# 한 플레이어를 동시에 노릴 수 있는 인원 (모두 이 수 이상이면 가장 적게 노려지는 플레이어 선택)
+MAX_ATTACKERS_PER_TARGET = 2
+
+
+class _IndexedSet:
+    """추가/삭제/무작위 선택이 모두 O(1) 인 집합"""
+
+    __slots__ = ("items", "positions")
+
+    def __init__(self):
+        self.items: List[str] = []
+        self.positions: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def add(self, item: str):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item: str):
+        index = self.positions.pop(item, None)
+        if index is None:
+            return
+        last = self.items.pop()
+        if index < len(self.items):
+            self.items[index] = last
+            self.positions[last] = index
+
+
+class TargetIndex:
+    """방 하나의 타겟팅 상태 - 살아 있는 플레이어와 "누가 누구를 노리는지" 역방향 인덱스
+
+    targets(공격자 -> 타겟)와 함께 타겟마다 공격자 집합과, 노려지는 수별 살아 있는 플레이어
+    버킷을 증분으로 유지한다. 그래서 타겟 선택은 매번 전체를 세지 않고 버킷에서 바로 뽑고,
+    플레이어가 죽거나 나가면 그 플레이어를 노리던 공격자만 다시 할당한다.
+    """
+
+    def __init__(self):
+        self.targets: Dict[str, Optional[str]] = {}  # player_id -> target_id
+        self.attackers: Dict[str, set] = {}  # target_id -> 노리는 player_id 집합
+        self.alive: set = set()
+        self._buckets: Dict[int, _IndexedSet] = {}  # 노려지는 수 -> 살아 있는 플레이어
+
+    def reset(self, player_ids=()):
+        self.targets.clear()
+        self.attackers.clear()
+        self.alive = set(player_ids)
+        self._buckets.clear()
+        if self.alive:
+            bucket = self._buckets[0] = _IndexedSet()
+            for player_id in player_ids:
+                bucket.add(player_id)
+
+    def count(self, target_id: str) -> int:
+        """특정 플레이어를 타겟으로 하는 플레이어 수"""
+        return len(self.attackers.get(target_id, ()))
+
+    def _move_bucket(self, player_id: str, old: int, new: int):
+        if player_id not in self.alive:
+            return
+        bucket = self._buckets.get(old)
+        if bucket is not None:
+            bucket.discard(player_id)
+            if not bucket:
+                del self._buckets[old]
+        self._buckets.setdefault(new, _IndexedSet()).add(player_id)
+
+    def set_target(self, player_id: str, target_id: Optional[str]):
+        old_target = self.targets.get(player_id)
+        if old_target == target_id and player_id in self.targets:
+            return
+        if old_target is not None:
+            attackers = self.attackers[old_target]
+            attackers.discard(player_id)
+            self._move_bucket(old_target, len(attackers) + 1, len(attackers))
+            if not attackers:
+                del self.attackers[old_target]
+        self.targets[player_id] = target_id
+        if target_id is not None:
+            attackers = self.attackers.setdefault(target_id, set())
+            attackers.add(player_id)
+            self._move_bucket(target_id, len(attackers) - 1, len(attackers))
+
+    def clear_target(self, player_id: str):
+        if player_id in self.targets:
+            self.set_target(player_id, None)
+            del self.targets[player_id]
+
+    def remove(self, player_id: str) -> List[str]:
+        """죽거나 나간 플레이어 제거 - 이 플레이어를 노리던 공격자 목록 반환 (타겟은 None 이 됨)"""
+        self.clear_target(player_id)
+        if player_id in self.alive:
+            self.alive.discard(player_id)
+            count = self.count(player_id)
+            bucket = self._buckets.get(count)
+            if bucket is not None:
+                bucket.discard(player_id)
+                if not bucket:
+                    del self._buckets[count]
+        attackers = self.attackers.pop(player_id, set())
+        for attacker in attackers:
+            self.targets[attacker] = None
+        return list(attackers)
+
+    def _pick(self, counts, exclude: str) -> Optional[str]:
+        """counts 버킷들에 있는 플레이어 중 exclude 를 뺀 하나를 균등하게 무작위 선택"""
+        buckets = [self._buckets[c] for c in counts if c in self._buckets]
+        size = sum(len(bucket) for bucket in buckets)
+        excluded = 1 if any(exclude in bucket for bucket in buckets) else 0
+        if size - excluded <= 0:
+            return None
+        while True:
+            index = random.randrange(size)
+            for bucket in buckets:
+                if index < len(bucket):
+                    candidate = bucket.items[index]
+                    break
+                index -= len(bucket)
+            if candidate != exclude:
+                return candidate
+
+    def best_target(self, player_id: str) -> Optional[str]:
+        """player_id 를 뺀 살아 있는 플레이어 중 노려지는 수가 적은 쪽에서 무작위 선택"""
+        selected = self._pick(range(MAX_ATTACKERS_PER_TARGET), player_id)
+        if selected is None:
+            # 모두 MAX_ATTACKERS_PER_TARGET 명 이상에게 노려지고 있으면 가장 적게 노려지는 플레이어
+            for count in sorted(self._buckets):
+                if count >= MAX_ATTACKERS_PER_TARGET:
+                    selected = self._pick((count,), player_id)
+                    if selected is not None:
+                        break
+        return selected
@@ -0,0 +1,5 @@
+"""server 모듈은 서로 평면 import (from bot import ...) 하므로 server 디렉터리를 경로에 추가"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,63 @@
+"""TetrisGame(리스트) 과 BitboardTetrisGame 에 같은 seed/입력을 주면 매 입력마다 상태가 같아야 한다"""
+import random
+
+import pytest
+
+from bitboard import BitboardTetrisGame
+from bot import plan
+from game import TetrisGame
+from simulation import INPUT_ACTIONS
+
+MOVES = ["left", "right", "rotate_cw", "rotate_ccw", "soft_drop", "hold"]
+
+
+def state(game):
+    piece = game.current_piece
+    return (game.grid, game.score, game.lines_cleared, game.level, game.game_over,
+            piece.shape, piece.x, piece.y, piece.rotation, game.can_hold,
+            game.held_piece and game.held_piece.shape_index)
+
+
+def play(seed, pieces, grid=None, bot=False):
+    """두 엔진에 같은 입력 (무작위, bot=True 면 봇 탐색 결과) 을 주고 입력마다 상태 비교, 지운 줄 수를 돌려준다"""
+    rng = random.Random(seed)
+    games = [TetrisGame(seed=seed), BitboardTetrisGame(seed=seed)]
+    if grid is not None:
+        for game in games:
+            game.grid = [list(row) for row in grid]
+    for _ in range(pieces):
+        if bot:
+            actions = plan(games[0])[1] or ["hard_drop"]
+        else:
+            actions = [rng.choice(MOVES) for _ in range(rng.randrange(8))] + ["hard_drop"]
+        for action in actions:
+            for game in games:
+                INPUT_ACTIONS[action](game)
+            assert state(games[0]) == state(games[1]), f"engines diverged after {action!r}"
+        if games[0].game_over:
+            break
+    return games[0].lines_cleared
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_play_matches(seed):
+    play(seed, 300)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_line_clears_match(seed):
+    # 한 칸씩 빈 쓰레기 줄이 깔린 보드에서 시작 (grid setter 와 구멍 있는 보드의 충돌 검사)
+    rng = random.Random(seed)
+    rows, cols = 20, 10
+    grid = [[0] * cols for _ in range(rows - 12)]
+    for _ in range(12):
+        row = [rng.randrange(1, 8) for _ in range(cols)]
+        row[rng.randrange(cols)] = 0
+        grid.append(row)
+    play(seed, 200, grid)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_bot_play_matches(seed):
+    # 무작위 입력은 금방 쌓여 끝나므로 줄 지우기/점수/레벨은 봇 입력으로 확인
+    assert play(seed, 150, bot=True) >= 10
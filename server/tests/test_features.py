@@ -0,0 +1,63 @@
+"""board_features (NumPy 한 번에) 와 features_reference (칸마다 파이썬 루프) 가 같은 값인지"""
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from features import board_features, candidate_boards, features_reference  # noqa: E402
+
+ROWS, COLS = 20, 10
+FULL = (1 << COLS) - 1
+
+
+def grid_of(masks):
+    return [[1 if mask >> x & 1 else 0 for x in range(COLS)] for mask in masks]
+
+
+def assert_matches(boards):
+    matrix = board_features(boards, COLS)
+    for masks, row in zip(boards, matrix.tolist()):
+        assert row == features_reference(grid_of(masks)), masks
+
+
+def column(x, top, bottom=ROWS):
+    """열 x 의 top ~ bottom - 1 줄을 채운 보드"""
+    return [1 << x if top <= y < bottom else 0 for y in range(ROWS)]
+
+
+def test_edge_boards():
+    boards = [
+        [0] * ROWS,                                            # 빈 보드
+        [FULL] * ROWS,                                         # 가득 찬 보드
+        [0] * (ROWS - 4) + [FULL] * 4,                         # 아래 네 줄만
+        [0] * 10 + [FULL] + [0] * (ROWS - 11),                 # 떠 있는 줄 아래가 전부 구멍
+        [0] * (ROWS - 6) + [FULL & ~1] * 6,                    # 왼쪽 벽에 붙은 우물
+        [0] * (ROWS - 6) + [FULL >> 1] * 6,                    # 오른쪽 벽에 붙은 우물
+        [0] * (ROWS - 5) + [FULL & ~(1 << 4)] * 5,             # 가운데 우물
+        [0] * (ROWS - 3) + [0b1111100000, 0b0000011111, FULL],  # 구멍과 걸친 블록
+        column(0, 0),                                          # 맨 위까지 찬 벽쪽 열
+        column(COLS - 1, 5, 6),                                # 오버행 하나
+        [0] * (ROWS - 8) + [0b1010101010, 0b0101010101] * 4,   # 체스판
+    ]
+    assert_matches(boards)
+
+
+@pytest.mark.parametrize("density", [0.1, 0.3, 0.6, 0.9])
+def test_random_boards(density):
+    rng = random.Random(int(density * 100))
+    boards = []
+    for _ in range(200):
+        top = rng.randrange(ROWS + 1)
+        boards.append([0] * top + [sum(1 << x for x in range(COLS) if rng.random() < density)
+                                   for _ in range(ROWS - top)])
+    assert_matches(boards)
+
+
+def test_candidate_boards():
+    rng = random.Random(7)
+    masks = [0] * (ROWS - 6) + [rng.randrange(FULL) for _ in range(6)]
+    for shape_index in range(7):
+        boards, placements = candidate_boards(masks, ROWS, COLS, shape_index)
+        assert len(boards) == len(placements) > 0
+        assert_matches(boards)
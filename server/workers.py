@@ -0,0 +1,163 @@
+"""CPU 를 많이 쓰는 작업을 이벤트 루프 밖 프로세스 풀에서 실행 (봇 배치 탐색, 리플레이 재생 등)
+
+    result = await worker_pool.submit(plan_state, state, group=room.jobs)
+
+- fn 은 모듈 최상위 함수여야 한다 (피클로 워커 프로세스에 전달). 반환값이 곧 결과 타입.
+- timeout 을 넘기면 JobTimeout. 아직 시작하지 않은 작업은 풀 큐에서 빠지고, 이미 돌고 있는 작업은
+  결과만 버린다 (프로세스를 죽이지 않음).
+- group(JobGroup) 에 묶인 작업은 방이 끝날 때 cancel_all() 로 한꺼번에 취소된다.
+- WORKER_PROCESSES=0 이면 프로세스 풀 없이 스레드 풀에서 같은 방식으로 실행한다.
+- submit 하는 순간 작업이 풀에 들어가고 inflight 에 잡힌다 (돌려받은 awaitable 을 기다리지 않아도 끝나면 빠짐).
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Optional, Set, TypeVar
+
+import metrics
+from logger import get_logger
+
+WORKER_PROCESSES = int(os.environ.get("WORKER_PROCESSES", str(min(4, os.cpu_count() or 1))))
+WORKER_JOB_TIMEOUT = float(os.environ.get("WORKER_JOB_TIMEOUT", "5"))  # 작업 하나 기본 제한 시간(초)
+WORKER_QUEUE_LIMIT = int(os.environ.get("WORKER_QUEUE_LIMIT", "1024"))  # 끝나지 않은 작업 최대 수
+
+logger = get_logger("workers")
+
+T = TypeVar("T")
+
+worker_jobs = metrics.REGISTRY.counter(
+    "tetris_worker_jobs_total", "Worker pool jobs by outcome (ok, error, timeout, cancelled, rejected)",
+    ("job", "outcome"))
+worker_job_seconds = metrics.REGISTRY.histogram(
+    "tetris_worker_job_seconds", "Time from submit to result for one worker pool job", ("job",))
+
+
+class JobTimeout(Exception):
+    pass
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobGroup:
+    """함께 취소할 작업 묶음 (방 하나의 게임 동안 제출된 작업)"""
+
+    def __init__(self):
+        self.futures: Set[Future] = set()
+
+    def __len__(self):
+        return len(self.futures)
+
+    def cancel_all(self):
+        """아직 시작하지 않은 작업은 취소, 실행 중인 작업은 결과를 버림 (기다리던 쪽은 CancelledError)"""
+        for future in list(self.futures):
+            future.cancel()
+            self.futures.discard(future)
+            waiter = getattr(future, "waiter", None)
+            if waiter is not None and not waiter.done():
+                waiter.cancel()
+
+
+class WorkerPool:
+    def __init__(self, processes: int = WORKER_PROCESSES, queue_limit: int = WORKER_QUEUE_LIMIT):
+        self.processes = processes
+        self.queue_limit = queue_limit
+        self.executor: Optional[Executor] = None
+        self.inflight = 0  # 제출했지만 아직 끝나지 않은 작업
+
+    @property
+    def queue_depth(self) -> int:
+        """워커가 모두 바빠서 풀 큐에서 기다리는 작업 수 (추정)"""
+        return max(0, self.inflight - max(1, self.processes))
+
+    def _executor(self) -> Executor:
+        if self.executor is None:
+            if self.processes > 0:
+                # fork 는 이벤트 루프/스레드 상태까지 복사하므로 spawn 사용 (워커는 fn 의 모듈만 불러옴)
+                self.executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+                logger.info("🧵 워커 프로세스 풀 시작: %d개", self.processes)
+            else:
+                self.executor = ThreadPoolExecutor(thread_name_prefix="worker")
+        return self.executor
+
+    def submit(self, fn: Callable[..., T], *args, group: Optional[JobGroup] = None,
+               timeout: Optional[float] = None) -> Awaitable[T]:
+        """fn(*args) 를 워커에서 실행하고 결과를 기다리는 awaitable (큐가 가득 차면 QueueFull)"""
+        name = fn.__name__
+        if self.inflight >= self.queue_limit:
+            worker_jobs.inc(name, "rejected")
+            raise QueueFull(f"{self.inflight} jobs in flight")
+        start = time.perf_counter()
+        # 여러 submit 이 await 전에 몰려도 한도를 넘지 않도록 제출과 동시에 셈
+        self.inflight += 1
+        try:
+            future = self._executor().submit(fn, *args)
+        except BaseException as e:
+            self.inflight -= 1
+            if isinstance(e, BrokenProcessPool):
+                self._broken(name)
+            raise
+        if group is not None:
+            group.futures.add(future)
+        loop = asyncio.get_running_loop()
+        # 완료 콜백은 워커 결과를 받는 스레드에서 불리므로 이벤트 루프로 넘겨서 셈
+        future.add_done_callback(lambda done: self._call_in_loop(loop, self._finished, done, group))
+        return self._wait(name, future, start, WORKER_JOB_TIMEOUT if timeout is None else timeout)
+
+    @staticmethod
+    def _call_in_loop(loop: asyncio.AbstractEventLoop, callback: Callable, *args):
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:  # 루프가 이미 닫힘 (종료 중)
+            callback(*args)
+
+    def _finished(self, future: Future, group: Optional[JobGroup]):
+        self.inflight -= 1
+        if group is not None:
+            group.futures.discard(future)
+
+    async def _wait(self, name: str, future: Future, start: float, timeout: float):
+        try:
+            waiter = asyncio.wrap_future(future)
+            future.waiter = waiter  # JobGroup.cancel_all 이 기다리는 쪽도 깨움
+            result = await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            worker_jobs.inc(name, "timeout")
+            raise JobTimeout(f"{name} did not finish in {timeout}s") from None
+        except asyncio.CancelledError:
+            future.cancel()
+            worker_jobs.inc(name, "cancelled")
+            raise
+        except BrokenProcessPool:
+            self._broken(name)
+            raise
+        except Exception:
+            worker_jobs.inc(name, "error")
+            raise
+        worker_jobs.inc(name, "ok")
+        worker_job_seconds.observe(time.perf_counter() - start, name)
+        return result
+
+    def _broken(self, name: str):
+        # 워커가 죽으면 (메모리 부족 등) 다음 작업부터 새 풀 사용
+        worker_jobs.inc(name, "error")
+        logger.error("❌ 워커 프로세스 풀 깨짐 - 다시 만듦")
+        self.executor = None
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+worker_pool = WorkerPool()
+
+metrics.REGISTRY.callback("tetris_worker_jobs_inflight", "Worker pool jobs submitted and not finished",
+                          lambda: worker_pool.inflight)
+metrics.REGISTRY.callback("tetris_worker_queue_depth", "Worker pool jobs waiting for a free process (estimate)",
+                          lambda: worker_pool.queue_depth)